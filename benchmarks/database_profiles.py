@@ -0,0 +1,131 @@
+"""Compares the SQLite engine profiles of `Database`.
+
+For each profile, measures the latency of small write transactions, like the user
+upserts of `|j|` messages, and the throughput of point lookups run by several threads
+while another thread keeps writing. "default" is a bare engine with the SQLite
+defaults, as used before the profiles were introduced; the read-only profile is only
+read from, since it can't be written.
+
+Usage: python -m benchmarks.database_profiles
+"""
+
+import os
+import tempfile
+import threading
+from itertools import count
+from statistics import mean, quantiles
+from time import perf_counter
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+
+import cerbottana.databases.database as d
+from cerbottana.database import (
+    READ_ONLY_PROFILE,
+    READ_WRITE_PROFILE,
+    Database,
+    EngineProfile,
+)
+
+PROFILES = {
+    "default": EngineProfile(),
+    "read-write": READ_WRITE_PROFILE,
+    "read-only": READ_ONLY_PROFILE,
+}
+USERS = 10_000
+WRITES = 500
+READER_THREADS = 4
+READ_SECONDS = 2.0
+
+
+def upsert_user(db: Database, i: int) -> None:
+    stmt = insert(d.Users)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[d.Users.userid], set_={"username": stmt.excluded.username}
+    )
+    with db.get_session() as session:
+        session.execute(stmt, [{"userid": f"user{i}", "username": f"User {i}"}])
+
+
+def populate(dbname: str) -> None:
+    db = Database(dbname, EngineProfile())
+    d.Base.metadata.create_all(db.engine)
+    with db.get_session() as session:
+        session.execute(
+            insert(d.Users),
+            [{"userid": f"user{i}", "username": f"User {i}"} for i in range(USERS)],
+        )
+    db.engine.dispose()
+
+
+def write_latencies(db: Database) -> list[float]:
+    latencies = []
+    for i in range(WRITES):
+        start = perf_counter()
+        upsert_user(db, i)
+        latencies.append(perf_counter() - start)
+    return latencies
+
+
+def read_throughput(db: Database, *, with_writer: bool) -> float:
+    stop = threading.Event()
+    reads = [0] * READER_THREADS
+
+    def reader(n: int) -> None:
+        stmt = select(d.Users.username)
+        with db.get_session() as session:
+            for i in count(n * 7919):
+                session.scalar(stmt.filter_by(userid=f"user{i % USERS}"))
+                session.rollback()  # end the read transaction, like get_session
+                reads[n] += 1
+                if stop.is_set():
+                    return
+
+    def writer() -> None:
+        for i in count():
+            upsert_user(db, i % USERS)
+            if stop.is_set():
+                return
+
+    threads = [
+        threading.Thread(target=reader, args=(n,)) for n in range(READER_THREADS)
+    ]
+    if with_writer:
+        threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    stop.wait(READ_SECONDS)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return sum(reads) / READ_SECONDS
+
+
+def main() -> None:
+    # Measure on the same filesystem as the real databases, not on a tmpfs
+    with tempfile.TemporaryDirectory(dir=".") as config_path:
+        os.environ["CERBOTTANA_CONFIG_PATH"] = config_path
+
+        for name, profile in PROFILES.items():
+            dbname = f"benchmark-{name}"
+            populate(dbname)
+            db = Database(dbname, profile)
+
+            if profile.read_only:
+                writes = f"{'n/a':>18}"
+            else:
+                latencies = write_latencies(db)
+                p99 = quantiles(latencies, n=100)[-1]
+                writes = f"{mean(latencies) * 1e3:5.2f} / {p99 * 1e3:5.2f} ms"
+            reads = read_throughput(db, with_writer=not profile.read_only)
+            db.engine.dispose()
+
+            print(
+                f"{name:>10}: write {writes} (mean / p99), "
+                f"{reads:8.0f} reads/s with {READER_THREADS} threads"
+            )
+
+
+if __name__ == "__main__":
+    main()
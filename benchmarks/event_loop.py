@@ -0,0 +1,101 @@
+"""Compares frame throughput and command latency across event loop backends.
+
+Throughput is measured by replaying a synthetic capture, latency by connecting the bot
+to `FakeShowdownServer`. Both run on the whole bot, so the databases are written to:
+point CERBOTTANA_CONFIG_PATH to a scratch directory.
+
+Usage: python -m benchmarks.event_loop [--duration SECONDS]
+uvloop is not a dependency of cerbottana, use e.g. `uv run --with uvloop` to include it.
+"""
+
+import argparse
+import asyncio
+import tempfile
+from pathlib import Path
+
+from aiohttp import web
+
+from benchmarks.frames import sample_frames
+from cerbottana import event_loop
+from cerbottana.capture import CaptureRecorder
+from cerbottana.connection import Connection
+from cerbottana.fake_server import FakeShowdownServer, LoadProfile, LoadStats
+from cerbottana.replay import ReplayConnection, replay
+
+
+def write_capture(path: Path) -> None:
+    recorder = CaptureRecorder(path)
+    for frame in sample_frames():
+        recorder.record(frame)
+    recorder.close()
+
+
+async def measure_latency(profile: LoadProfile, duration: float) -> LoadStats:
+    server = FakeShowdownServer(profile, seed=0)
+    runner = web.AppRunner(server.app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "localhost", 0).start()
+    port = runner.addresses[0][1]
+
+    conn = Connection(
+        url=f"ws://localhost:{port}/showdown/websocket",
+        username="cerbottana",
+        password="benchmark",
+        avatar="",
+        statustext="",
+        rooms=[f"room{i}" for i in range(profile.rooms)],
+        main_room="room0",
+        command_character=".",
+        base_url="",
+        webhooks={},
+        # Measure how fast commands are processed, not the throttling
+        outbound_rate=10_000,
+        outbound_burst=100,
+        login_url=f"http://localhost:{port}/api/login",
+    )
+    task = asyncio.create_task(conn.open_connection())
+    try:
+        # Init tasks and joining rooms are not part of the measurement
+        while len(conn.rooms) < profile.rooms:  # noqa: ASYNC110
+            await asyncio.sleep(0.1)
+        server.stats = LoadStats()
+        await asyncio.sleep(duration)
+    finally:
+        task.cancel()
+        await task
+        await runner.cleanup()
+    return server.stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=30)
+    args = parser.parse_args()
+
+    profile = LoadProfile(rooms=10, users=200, rate=50, command_ratio=0.02)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        capture = Path(tmpdir) / "capture.jsonl.gz"
+        write_capture(capture)
+
+        for backend in event_loop.BACKENDS:
+            if backend != "asyncio" and event_loop.get_loop_factory(backend) is None:
+                print(f"{backend}: not available")
+                continue
+
+            conn = ReplayConnection(capture, username="cerbottana")
+            replay_stats = event_loop.run(replay(conn), backend=backend)
+            load_stats = event_loop.run(
+                measure_latency(profile, args.duration), backend=backend
+            )
+
+            print(f"{backend}:")
+            print(
+                f"  Replay: {replay_stats.frames_per_second:.0f} frames/s, "
+                f"{replay_stats.lines_per_second:.0f} lines/s"
+            )
+            print("  " + load_stats.summary().replace("\n", "\n  "))
+
+
+if __name__ == "__main__":
+    main()
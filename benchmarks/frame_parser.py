@@ -0,0 +1,60 @@
+"""Compares `frame_parser.parse_frame` with the previous line-by-line parser.
+
+Usage: python -m benchmarks.frame_parser
+"""
+
+import re
+import timeit
+from collections.abc import Callable
+from functools import partial
+
+from benchmarks.frames import sample_frames
+from cerbottana import utils
+from cerbottana.frame_parser import parse_frame
+
+
+def legacy_parse(message: str) -> list[tuple[str, list[str]]]:
+    # Mirrors the loop previously in `Connection._parse_text_message`, including the
+    # repeated splits done by `ProtocolMessage.type` and `ProtocolMessage.params`
+    lines: list[tuple[str, list[str]]] = []
+    init = False
+    roomname = ""
+    if message[0] == ">":
+        roomname = message.split("\n")[0]
+    utils.to_room_id(roomname)
+    for raw_msg in message.split("\n"):
+        if re.match(r"This room's primary language is (.*)", raw_msg):
+            continue
+        if not raw_msg or raw_msg[0] != "|":
+            continue
+        msg = raw_msg[1:]
+        if msg.split("|")[0] == "init":
+            init = True
+        if init and msg.split("|")[0] == "tournament":
+            break
+        lines.append((msg.split("|")[0], msg.split("|")[1:]))
+    return lines
+
+
+def parse(message: str) -> list[tuple[str, list[str]]]:
+    return [(line.type, line.params) for line in parse_frame(message).lines]
+
+
+def map_all(
+    func: Callable[[str], list[tuple[str, list[str]]]], frames: list[str]
+) -> None:
+    for frame in frames:
+        func(frame)
+
+
+def main() -> None:
+    frames = sample_frames()
+    lines = sum(frame.count("\n") + 1 for frame in frames)
+    for name, func in (("legacy", legacy_parse), ("parse_frame", parse)):
+        best = min(timeit.repeat(partial(map_all, func, frames), number=5, repeat=5))
+        per_line = best / 5 / lines * 1e9
+        print(f"{name:>12}: {best / 5 * 1e3:8.2f} ms/pass, {per_line:6.0f} ns/line")
+
+
+if __name__ == "__main__":
+    main()
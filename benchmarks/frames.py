@@ -0,0 +1,47 @@
+"""Frames shaped like the ones recorded on busy rooms, used by the benchmarks."""
+
+import random
+
+
+def init_frame(roomid: str, users: int, backlog: int, *, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    ranks = " " * 20 + "+%@*"
+    userlist = ",".join(
+        f"{rng.choice(ranks)}User {i}{'@!' if i % 7 == 0 else ''}" for i in range(users)
+    )
+    lines = [
+        f">{roomid}",
+        "|init|chat",
+        f"|title|{roomid.title()}",
+        f"|users|{users},{userlist}",
+        "|:|1700000000",
+    ]
+    lines.extend(
+        f"|c:|{1699990000 + i}| User {rng.randrange(users)}|message number {i}"
+        for i in range(backlog)
+    )
+    lines.append("This room's primary language is Italian")
+    return "\n".join(lines)
+
+
+def chat_frames(roomid: str, count: int, *, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    frames = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.7:
+            line = f"|c:|{1700000000 + i}| User {rng.randrange(500)}|hello there {i}"
+        elif kind < 0.9:
+            line = f"|j| User {rng.randrange(500)}"
+        else:
+            line = f"|l| User {rng.randrange(500)}"
+        frames.append(f">{roomid}\n{line}")
+    return frames
+
+
+def sample_frames() -> list[str]:
+    return [
+        init_frame("italiano", 2000, 100),
+        init_frame("lobby", 500, 100, seed=1),
+        *chat_frames("italiano", 2000),
+    ]
@@ -0,0 +1,83 @@
+"""Compares the slotted, parse-once `ProtocolMessage` with the previous model.
+
+Every line of the sample frames is turned into a message whose `type` and `params`
+are read a few times, like `Room._process_message_queue`, `check_required_parameters`
+and a typical handler do. Messages are kept alive, as they would be while queued in a
+room, to measure their memory footprint.
+
+Usage: python -m benchmarks.message_models
+"""
+
+import timeit
+import tracemalloc
+from collections.abc import Callable
+from functools import partial
+from types import SimpleNamespace
+
+from benchmarks.frames import sample_frames
+from cerbottana.frame_parser import ProtocolLine, parse_frame
+from cerbottana.models.protocol_message import ProtocolMessage
+
+
+class LegacyProtocolMessage:
+    # Mirrors the model before it was slotted: a `__dict__` per instance, and a new
+    # list for every access to `params`
+    def __init__(self, room: SimpleNamespace, msg: str, args: list[str]) -> None:
+        self.conn = room.conn
+        self.room = room
+        self.msg = msg
+        self._args = args
+
+    @property
+    def type(self) -> str:
+        return self._args[0]
+
+    @property
+    def params(self) -> list[str]:
+        return self._args[1:]
+
+
+def legacy(room: SimpleNamespace, line: ProtocolLine) -> LegacyProtocolMessage:
+    return LegacyProtocolMessage(room, line.msg, [line.type, *line.params])
+
+
+def current(room: SimpleNamespace, line: ProtocolLine) -> ProtocolMessage:
+    return ProtocolMessage.from_line(room, line)  # type: ignore[arg-type]
+
+
+def process(
+    lines: list[ProtocolLine],
+    factory: Callable[
+        [SimpleNamespace, ProtocolLine], LegacyProtocolMessage | ProtocolMessage
+    ],
+) -> list[LegacyProtocolMessage | ProtocolMessage]:
+    room = SimpleNamespace(conn=None)
+    messages = []
+    for line in lines:
+        msg = factory(room, line)
+        if msg.type and len(msg.params) >= 1:
+            msg.params[0]
+            "|".join(msg.params[1:])
+        messages.append(msg)
+    return messages
+
+
+def main() -> None:
+    lines = [line for frame in sample_frames() for line in parse_frame(frame).lines]
+    for name, factory in (("legacy", legacy), ("slotted", current)):
+        best = min(timeit.repeat(partial(process, lines, factory), number=5, repeat=5))
+
+        tracemalloc.start()
+        messages = process(lines, factory)
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del messages
+
+        print(
+            f"{name:>8}: {best / 5 / len(lines) * 1e9:6.0f} ns/line, "
+            f"{retained / len(lines):5.0f} bytes/queued line"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Compares the normalization functions with their previous regex implementations.
+
+Inputs are the usernames of a large room, which repeat often, a few roomids and
+language names, and Pokemon names with and without diacritics. The `lru_cache` of
+`to_id` and `to_room_id` is measured both warm and bypassed.
+
+Usage: python -m benchmarks.normalization
+"""
+
+import re
+import timeit
+import unicodedata
+from collections.abc import Callable
+
+from cerbottana import normalization
+
+USERNAMES = [f"User {i % 200}{'@!' if i % 7 == 0 else ''}" for i in range(2000)]
+ROOMS = ["Italiano", "Lobby", "Tournaments", "Pokémon Games", "groupchat-user-1"] * 400
+LANGUAGES = ["Italian", "English", "Spanish", "it", "Japanese Kana"] * 400
+POKEMON = ["Pikachu", "Flabébé", "Mr. Mime", "Type: Null", "Nidoran♀"] * 400
+
+
+def legacy_to_id(text: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", text.lower())
+
+
+def legacy_to_room_id(room: str) -> str:
+    return re.sub(r"[^a-z0-9-]", "", room.lower()) or "lobby"
+
+
+def legacy_remove_diacritics(text: str) -> str:
+    return "".join(
+        [c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c)]
+    )
+
+
+def legacy_get_language_id(language_name: str) -> int:
+    table = dict(normalization.LANGUAGE_IDS)
+    return table.get(legacy_to_id(language_name), 9)
+
+
+def measure(func: Callable[[str], object], inputs: list[str]) -> float:
+    def run() -> None:
+        for text in inputs:
+            func(text)
+
+    return min(timeit.repeat(run, number=10, repeat=5)) / 10 / len(inputs)
+
+
+def main() -> None:
+    cases: list[tuple[str, list[str], dict[str, Callable[[str], object]]]] = [
+        (
+            "to_id",
+            USERNAMES,
+            {
+                "legacy": legacy_to_id,
+                "uncached": normalization.to_id.__wrapped__,
+                "cached": normalization.to_id,
+            },
+        ),
+        (
+            "to_room_id",
+            ROOMS,
+            {
+                "legacy": legacy_to_room_id,
+                "cached": normalization.to_room_id,
+            },
+        ),
+        (
+            "remove_diacritics",
+            POKEMON,
+            {
+                "legacy": legacy_remove_diacritics,
+                "current": normalization.remove_diacritics,
+            },
+        ),
+        (
+            "get_language_id",
+            LANGUAGES,
+            {
+                "legacy": legacy_get_language_id,
+                "current": normalization.get_language_id,
+            },
+        ),
+    ]
+    for name, inputs, funcs in cases:
+        print(f"{name}:")
+        for variant, func in funcs.items():
+            print(f"  {variant:>8}: {measure(func, inputs) * 1e9:6.0f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Compares `User.has_role` with the previous per-call rank tables.
+
+Every user of a large room is checked against a few roles, like
+`command_check_permission` and `HTMLPageCommand._add_action_buttons` do.
+
+Usage: python -m benchmarks.permissions
+"""
+
+import string
+import timeit
+from functools import partial
+
+from cerbottana.connection import Connection
+from cerbottana.models.room import Room
+from cerbottana.models.user import User
+from cerbottana.typedefs import Role, RoomId
+
+ROLES: list[Role] = ["voice", "driver", "owner", "regularuser"]
+
+
+def legacy_has_role(role: Role, user: str) -> bool:
+    roles: dict[Role, str] = {
+        "admin": "~&",
+        "sectionleader": "~&§",
+        "owner": "~&#",
+        "bot": "*",
+        "host": "★",
+        "mod": "~&§#@",
+        "driver": "~&§#@%",
+        "player": "☆",
+        "voice": "~&§#@%+",
+        "prizewinner": "^",
+    }
+    if user:
+        if role == "disabled":
+            return False
+        if role == "regularuser":
+            return True
+        if user[0] in roles[role]:
+            return True
+        if (
+            role == "voice"
+            and user[0] not in "*★☆^ "
+            and user[0] not in string.ascii_letters + string.digits
+        ):
+            return True
+    return False
+
+
+def legacy_rank(user: User, room: Room) -> str | None:
+    rank_orders = {
+        "~": 101,
+        "#": 102,
+        "&": 103,
+        "★": 104,
+        "@": 105,
+        "%": 106,
+        "§": 107,
+        "*": 109,
+        "☆": 110,
+        "+": 200,
+        " ": 201,
+        "!": 301,
+        "✖": 302,
+        "‽": 303,
+        None: 401,
+    }
+    rank_: str | None = user.global_rank
+    if user in room:
+        rank_ = min(rank_, room.users[user], key=lambda x: rank_orders.get(x, 108))
+    return rank_
+
+
+def legacy(room: Room, users: list[User]) -> None:
+    for user in users:
+        for role in ROLES:
+            if rank := legacy_rank(user, room):
+                legacy_has_role(role, rank)
+
+
+def current(room: Room, users: list[User]) -> None:
+    for user in users:
+        for role in ROLES:
+            user.has_role(role, room)
+
+
+def main() -> None:
+    conn = Connection(
+        url="",
+        username="cerbottana",
+        password="",
+        avatar="",
+        statustext="",
+        rooms=[],
+        main_room="lobby",
+        command_character=".",
+        base_url="",
+        webhooks={},
+    )
+    room = Room(conn, RoomId("room1"))
+    users = [User(conn, f"User {i}") for i in range(2000)]
+    for i, user in enumerate(users):
+        room.add_user(user, "+%@ "[i % 4])
+        user.global_rank = " +"[i % 2]
+
+    checks = len(users) * len(ROLES)
+    for name, func in (("legacy", legacy), ("current", current)):
+        best = min(timeit.repeat(partial(func, room, users), number=10, repeat=5))
+        print(f"{name:>8}: {best / 10 / checks * 1e9:6.0f} ns/check")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Compares rank and membership checks with a cached `User.userid` and without.
+
+Every user of a large room is checked with `user in room`, `User.rank` and
+`User.has_role`, which hash the user and compare it with the ones in `Room.users`.
+
+Usage: python -m benchmarks.user_identity
+"""
+
+import timeit
+
+from cerbottana import utils
+from cerbottana.connection import Connection
+from cerbottana.models.room import Room
+from cerbottana.models.user import User
+from cerbottana.typedefs import RoomId, UserId
+
+
+class LegacyUser(User):
+    # Mirrors the model before the userid was cached: a regex for every hash and
+    # equality check
+    @property
+    def userid(self) -> UserId:
+        return utils.to_user_id(self.userstring)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, User):
+            raise NotImplementedError
+        return self.userid == other.userid
+
+    def __hash__(self) -> int:
+        return hash(self.userid)
+
+
+def check(room: Room, users: list[User]) -> None:
+    for user in users:
+        assert user in room
+        user.rank(room)
+        user.has_role("driver", room)
+
+
+def measure(cls: type[User]) -> float:
+    conn = Connection(
+        url="",
+        username="cerbottana",
+        password="",
+        avatar="",
+        statustext="",
+        rooms=[],
+        main_room="lobby",
+        command_character=".",
+        base_url="",
+        webhooks={},
+    )
+    room = Room(conn, RoomId("room1"))
+    users = [cls(conn, f"User {i}") for i in range(2000)]
+    for i, user in enumerate(users):
+        room.add_user(user, "+%@ "[i % 4])
+
+    best = min(timeit.repeat(lambda: check(room, users), number=10, repeat=5))
+    return best / 10 / len(users)
+
+
+def main() -> None:
+    for name, cls in (("legacy", LegacyUser), ("cached", User)):
+        print(f"{name:>8}: {measure(cls) * 1e9:6.0f} ns/user")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Compares `tasks.veekun.update_database` with the previous full rebuild.
+
+Measures a cold rebuild into an empty config folder, the startup check of an
+up-to-date database, and a cold start loading the artifact of `build_artifact`. The
+previous rebuild is also used to check that all of them produce the same rows.
+
+Usage: python -m benchmarks.veekun_rebuild
+"""
+
+import csv
+import inspect
+import re
+import tempfile
+from collections.abc import Callable
+from functools import partial
+from itertools import chain
+from pathlib import Path
+from time import perf_counter
+from zlib import crc32
+
+from sqlalchemy import create_engine, func, insert, select, text, update
+from sqlalchemy.orm import Session
+
+import cerbottana.databases.veekun as v
+from cerbottana import utils
+from cerbottana.tasks.veekun import SCHEMA_FILES, build_artifact, update_database
+
+CSV_DIR = utils.get_data_file("veekun")
+
+
+def legacy_crc() -> int:
+    new_crc = crc32(b"")
+    for file in sorted(chain(CSV_DIR.iterdir(), SCHEMA_FILES)):
+        new_crc = crc32(file.read_bytes(), new_crc)
+    return new_crc
+
+
+def legacy_check(db_path: Path) -> bool:
+    new_crc = legacy_crc()
+    engine = create_engine(f"sqlite:///{db_path}")
+    with Session(engine) as session:
+        up_to_date = session.scalar(select(v.LatestVersion.crc)) == new_crc
+    engine.dispose()
+    return up_to_date
+
+
+def legacy_rebuild(db_path: Path) -> None:
+    new_crc = legacy_crc()
+    engine = create_engine(f"sqlite:///{db_path}")
+    v.Base.metadata.create_all(engine)
+
+    tables_classes = {
+        obj.__tablename__: obj
+        for name, obj in inspect.getmembers(v)
+        if inspect.isclass(obj)
+        and obj.__module__ == v.__name__
+        and hasattr(obj, "__tablename__")
+    }
+
+    with Session(engine) as session:
+        session.add(v.LatestVersion(crc=new_crc))
+
+        for table in v.Base.metadata.sorted_tables:
+            tname = table.key
+            csv_file = CSV_DIR / f"{tname}.csv"
+            if not csv_file.is_file():
+                continue
+            with csv_file.open(encoding="utf-8") as f:
+                csv_data = csv.DictReader(f)
+                csv_keys = csv_data.fieldnames
+                if csv_keys is None:
+                    continue
+                data = [dict(i) for i in csv_data]
+
+                if hasattr(table.columns, "name_normalized"):
+                    for row in data:
+                        row["name_normalized"] = utils.to_user_id(
+                            utils.remove_diacritics(row["name"])
+                        )
+
+                if tname == "locations":
+                    for row in data:
+                        if num := re.search(r"route-(\d+)", row["identifier"]):
+                            row["route_number"] = num[1]
+
+                session.execute(insert(tables_classes[tname]), data)
+
+                if "identifier" in csv_keys:
+                    session.execute(
+                        update(tables_classes[tname])
+                        .values(
+                            identifier=func.replace(
+                                tables_classes[tname].identifier,  # type: ignore[attr-defined]
+                                "-",
+                                "",
+                            )
+                        )
+                        .execution_options(synchronize_session=False)
+                    )
+        session.commit()
+    engine.dispose()
+
+
+def dump(db_path: Path) -> dict[str, list[tuple[object, ...]]]:
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.connect() as connection:
+        tables = {
+            table.name: sorted(
+                map(tuple, connection.execute(text(f"SELECT * FROM {table.name}"))),
+                key=repr,
+            )
+            for table in v.Base.metadata.sorted_tables
+            if table.name not in ("latest_version", "table_versions")
+        }
+    engine.dispose()
+    return tables
+
+
+def measure(name: str, func: Callable[[], object]) -> None:
+    start = perf_counter()
+    func()
+    print(f"{name:>16}: {(perf_counter() - start) * 1e3:8.1f} ms")
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory(dir=".") as tmp:
+        legacy_path = Path(tmp) / "legacy.sqlite"
+        current_path = Path(tmp) / "veekun.sqlite"
+        artifact_path = Path(tmp) / "artifact.sqlite"
+        loaded_path = Path(tmp) / "loaded.sqlite"
+
+        measure("legacy rebuild", partial(legacy_rebuild, legacy_path))
+        measure("current rebuild", partial(update_database, current_path, CSV_DIR))
+        measure("legacy check", partial(legacy_check, legacy_path))
+        measure("current check", partial(update_database, current_path, CSV_DIR))
+        measure("artifact build", partial(build_artifact, artifact_path, CSV_DIR))
+        measure(
+            "artifact load",
+            partial(update_database, loaded_path, CSV_DIR, artifact_path),
+        )
+
+        legacy_rows = dump(legacy_path)
+        assert legacy_rows == dump(current_path)
+        assert legacy_rows == dump(loaded_path)
+
+
+if __name__ == "__main__":
+    main()
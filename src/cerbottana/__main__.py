@@ -1,29 +1,303 @@
-import asyncio
+import argparse
+import json
+import sys
+from collections.abc import Callable
+from contextlib import suppress
+from pathlib import Path
 
+from cerbottana import event_loop
 from cerbottana.connection import Connection
-from cerbottana.utils import env
+from cerbottana.database import Database
+from cerbottana.fake_server import FakeShowdownServer, LoadProfile, serve
+from cerbottana.log import setup_logging
+from cerbottana.replay import ReplayConnection, replay
+from cerbottana.supervisor import Supervisor
+from cerbottana.tasks.veekun import ARTIFACT_PATH, build_artifact
+from cerbottana.typedefs import JsonDict
+from cerbottana.utils import env, get_data_file
 
 
-def main() -> None:
-    host = env.str("SHOWDOWN_HOST")
-    port = env.int("SHOWDOWN_PORT")
+def get_setting[T](
+    account: JsonDict,
+    name: str,
+    getter: Callable[..., T],
+    **kwargs: T,
+) -> T:
+    """Reads a setting of an account, falling back to the environment.
+
+    Args:
+        account (JsonDict): Account settings, keyed by the lowercase name of the
+            environment variables.
+        name (str): Name of the environment variable.
+        getter (Callable[..., T]): typenv getter, e.g. `env.str`.
+        **kwargs (T): Passed to the getter, e.g. the default value.
+
+    Returns:
+        T: Setting value.
+    """
+    if (key := name.lower()) in account:
+        value: T = account[key]
+        return value
+    return getter(name, **kwargs)
+
+
+def create_connection(
+    account: JsonDict | None = None,
+    *,
+    metrics_host: str = "localhost",
+    metrics_port: int | None = None,
+    watchdog_threshold: float | None = None,
+) -> Connection:
+    """Creates a connection configured by the environment variables.
+
+    Args:
+        account (JsonDict | None): Settings overriding the environment variables, see
+            `get_setting`. Defaults to None.
+        metrics_host (str): Interface the metrics endpoint listens on. Defaults to
+            "localhost".
+        metrics_port (int | None): Port of the metrics endpoint. Defaults to None.
+        watchdog_threshold (float | None): Threshold of the event loop watchdog.
+            Defaults to None.
+
+    Returns:
+        Connection: New connection.
+    """
+    if account is None:
+        account = {}
+
+    host = get_setting(account, "SHOWDOWN_HOST", env.str)
+    port = get_setting(account, "SHOWDOWN_PORT", env.int)
     protocol = "wss" if port == 443 else "ws"
     url = f"{protocol}://{host}:{port}/showdown/websocket"
 
-    conn = Connection(
+    capture_path = get_setting(account, "CAPTURE_PATH", env.str, default="")
+
+    return Connection(
         url=url,
+        username=get_setting(account, "USERNAME", env.str),
+        password=get_setting(account, "PASSWORD", env.str),
+        avatar=get_setting(account, "AVATAR", env.str, default=""),
+        statustext=get_setting(account, "STATUSTEXT", env.str, default=""),
+        rooms=get_setting(account, "ROOMS", env.list, default=[]),
+        main_room=get_setting(account, "MAIN_ROOM", env.str),
+        command_character=get_setting(account, "COMMAND_CHARACTER", env.str),
+        base_url=get_setting(account, "BASE_URL", env.str),
+        webhooks=get_setting(account, "WEBHOOKS", env.json, default={}),
+        outbound_rate=get_setting(account, "OUTBOUND_RATE", env.float, default=10),
+        outbound_burst=get_setting(account, "OUTBOUND_BURST", env.int, default=5),
+        capture_path=Path(capture_path) if capture_path else None,
+        login_url=get_setting(
+            account,
+            "LOGIN_URL",
+            env.str,
+            default="https://play.pokemonshowdown.com/api/login",
+        ),
+        database=get_setting(account, "DATABASE", env.str, default="database"),
+        metrics_host=metrics_host,
+        metrics_port=metrics_port,
+        watchdog_threshold=watchdog_threshold,
+    )
+
+
+async def run_connection(conn: Connection) -> None:
+    try:
+        await conn.open_connection()
+    finally:
+        await Database.open(conn.database).close()
+
+
+def run_bot(*, backend: str) -> None:
+    metrics_port = env.int("METRICS_PORT", default=0)
+
+    conn = create_connection(
+        metrics_host=env.str("METRICS_HOST", default="localhost"),
+        metrics_port=metrics_port or None,
+        watchdog_threshold=env.float("WATCHDOG_THRESHOLD", default=0) or None,
+    )
+
+    event_loop.run(run_connection(conn), backend=backend)
+
+
+def run_supervisor(config: Path, *, backend: str) -> None:
+    with config.open(encoding="utf-8") as f:
+        accounts: list[JsonDict] = json.load(f)
+
+    metrics_port = env.int("METRICS_PORT", default=0)
+
+    supervisor = Supervisor(
+        [create_connection(account) for account in accounts],
+        metrics_host=env.str("METRICS_HOST", default="localhost"),
+        metrics_port=metrics_port or None,
+        watchdog_threshold=env.float("WATCHDOG_THRESHOLD", default=0) or None,
+    )
+
+    if not event_loop.run(supervisor.run(), backend=backend):
+        sys.exit(1)
+
+
+def run_replay(capture: Path, *, realtime: bool, backend: str) -> None:
+    conn = ReplayConnection(
+        capture,
+        realtime=realtime,
         username=env.str("USERNAME"),
-        password=env.str("PASSWORD"),
-        avatar=env.str("AVATAR", default=""),
-        statustext=env.str("STATUSTEXT", default=""),
-        rooms=env.list("ROOMS", default=[]),
-        main_room=env.str("MAIN_ROOM"),
-        command_character=env.str("COMMAND_CHARACTER"),
-        base_url=env.str("BASE_URL"),
-        webhooks=env.json("WEBHOOKS", default={}),
+        main_room=env.str("MAIN_ROOM", default="lobby"),
+        command_character=env.str("COMMAND_CHARACTER", default="."),
+    )
+
+    stats = event_loop.run(replay(conn), backend=backend)
+
+    print(f"Frames: {stats.frames} ({stats.frames_per_second:.0f}/s)")
+    print(f"Lines: {stats.lines} ({stats.lines_per_second:.0f}/s)")
+    print(f"Elapsed: {stats.elapsed:.3f}s")
+    print(f"Messages sent: {stats.sent.total()}")
+
+
+def run_fake_server(
+    profile: LoadProfile,
+    *,
+    host: str,
+    port: int,
+    duration: float | None,
+    backend: str,
+) -> None:
+    server = FakeShowdownServer(profile)
+    with suppress(KeyboardInterrupt):
+        event_loop.run(
+            serve(server, host=host, port=port, duration=duration), backend=backend
+        )
+    print(server.stats.summary())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="cerbottana")
+    subparsers = parser.add_subparsers(dest="command")
+
+    replay_parser = subparsers.add_parser(
+        "replay",
+        help="feed a capture recorded with CAPTURE_PATH through the bot, offline",
+        description=(
+            "Feed a capture recorded with CAPTURE_PATH through the bot. Messages are "
+            "not sent anywhere, but the databases are written as usual: consider "
+            "pointing CERBOTTANA_CONFIG_PATH to a scratch directory."
+        ),
+    )
+    replay_parser.add_argument("capture", type=Path)
+    replay_parser.add_argument(
+        "--realtime",
+        action="store_true",
+        help="respect the original timing instead of replaying as fast as possible",
+    )
+
+    supervise_parser = subparsers.add_parser(
+        "supervise",
+        help="run several accounts in the same process",
+        description=(
+            "Run several accounts in the same process. CONFIG is a JSON list with "
+            "the settings of each account, keyed by the lowercase name of the "
+            "environment variables: missing settings are read from the environment."
+        ),
+    )
+    supervise_parser.add_argument("config", type=Path)
+
+    fake_server_parser = subparsers.add_parser(
+        "fake-server",
+        help="run a local Pokemon Showdown stand-in generating synthetic traffic",
+        description=(
+            "Run a local Pokemon Showdown stand-in. Point SHOWDOWN_HOST and "
+            "SHOWDOWN_PORT to it, set LOGIN_URL to http://HOST:PORT/api/login and "
+            "ROOMS to room0,room1,... to load test the bot."
+        ),
+    )
+    fake_server_parser.add_argument("--host", default="localhost")
+    fake_server_parser.add_argument("--port", type=int, default=8000)
+    fake_server_parser.add_argument(
+        "--duration", type=float, help="seconds to run for, forever if omitted"
+    )
+    fake_server_parser.add_argument("--rooms", type=int, default=LoadProfile.rooms)
+    fake_server_parser.add_argument("--users", type=int, default=LoadProfile.users)
+    fake_server_parser.add_argument(
+        "--rate", type=float, default=LoadProfile.rate, help="events/s in each room"
     )
+    fake_server_parser.add_argument(
+        "--command-ratio", type=float, default=LoadProfile.command_ratio
+    )
+    fake_server_parser.add_argument(
+        "--pm-ratio", type=float, default=LoadProfile.pm_ratio
+    )
+    fake_server_parser.add_argument(
+        "--churn-ratio", type=float, default=LoadProfile.churn_ratio
+    )
+    fake_server_parser.add_argument(
+        "--tour-ratio", type=float, default=LoadProfile.tour_ratio
+    )
+    fake_server_parser.add_argument(
+        "--command",
+        dest="load_command",  # args.command is the subcommand
+        default=LoadProfile.command,
+        help="command used to measure the latency",
+    )
+    fake_server_parser.add_argument(
+        "--reply-pattern",
+        default=LoadProfile.reply_pattern,
+        help="regular expression matching the replies to the command",
+    )
+
+    build_veekun_parser = subparsers.add_parser(
+        "build-veekun",
+        help="build the veekun database, to be loaded instead of rebuilt at startup",
+        description=(
+            "Build a compacted veekun database from the bundled CSV files. At "
+            "startup, it is copied to CERBOTTANA_CONFIG_PATH if it matches the CSV "
+            "files and the configured database is outdated."
+        ),
+    )
+    build_veekun_parser.add_argument(
+        "--output",
+        type=Path,
+        default=ARTIFACT_PATH,
+        help="path of the database, loaded at startup by default",
+    )
+
+    args = parser.parse_args()
+
+    log_listener = setup_logging(
+        env.str("LOG_LEVEL", default="INFO"),
+        levels=env.json("LOG_LEVELS", default={}),
+        sampling=env.json("LOG_SAMPLING", default={}),
+    )
+
+    backend = env.str("CERBOTTANA_EVENT_LOOP", default="asyncio")
 
-    asyncio.run(conn.open_connection())
+    try:
+        if args.command == "supervise":
+            run_supervisor(args.config, backend=backend)
+        elif args.command == "replay":
+            run_replay(args.capture, realtime=args.realtime, backend=backend)
+        elif args.command == "fake-server":
+            profile = LoadProfile(
+                rooms=args.rooms,
+                users=args.users,
+                rate=args.rate,
+                command_ratio=args.command_ratio,
+                pm_ratio=args.pm_ratio,
+                churn_ratio=args.churn_ratio,
+                tour_ratio=args.tour_ratio,
+                command=args.load_command,
+                reply_pattern=args.reply_pattern,
+            )
+            run_fake_server(
+                profile,
+                host=args.host,
+                port=args.port,
+                duration=args.duration,
+                backend=backend,
+            )
+        elif args.command == "build-veekun":
+            build_artifact(args.output, get_data_file("veekun"))
+        else:
+            run_bot(backend=backend)
+    finally:
+        log_listener.stop()
 
 
 if __name__ == "__main__":
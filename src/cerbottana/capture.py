@@ -0,0 +1,90 @@
+import gzip
+import json
+import queue
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from time import monotonic, time
+
+
+class CaptureRecorder:
+    """Appends raw inbound frames to a gzip-compressed capture file.
+
+    Every line of the capture is a JSON array containing the reception timestamp and the
+    frame itself. Each session is appended as a new gzip member, so the file can be
+    read as a single stream.
+
+    Frames are compressed and written by a dedicated thread, which flushes the file
+    every `flush_interval` seconds: if the process is killed before `close`, only the
+    frames received since the last flush are lost.
+
+    Attributes:
+        path (Path): Capture file.
+        flush_interval (float): Seconds between flushes.
+    """
+
+    def __init__(self, path: Path, *, flush_interval: float = 5) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+        self._queue: queue.SimpleQueue[tuple[float, str] | None] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+
+    def record(self, frame: str) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._write, name="cerbottana-capture", daemon=True
+            )
+            self._thread.start()
+        self._queue.put((time(), frame))
+
+    def close(self) -> None:
+        """Writes the remaining frames and closes the file, blocking until done."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _write(self) -> None:
+        with gzip.open(self.path, "at", encoding="utf-8") as f:
+            dirty = False
+            next_flush = monotonic() + self.flush_interval
+            while True:
+                try:
+                    item = self._queue.get(timeout=max(next_flush - monotonic(), 0))
+                except queue.Empty:
+                    pass
+                else:
+                    if item is None:
+                        return
+                    f.write(json.dumps(item) + "\n")
+                    dirty = True
+                if monotonic() >= next_flush:
+                    if dirty:
+                        f.flush()
+                        dirty = False
+                    next_flush = monotonic() + self.flush_interval
+
+
+def read_capture(path: Path) -> Iterator[tuple[float, str]]:
+    """Reads the frames recorded by `CaptureRecorder`.
+
+    Captures whose recorder was killed before being closed end with a truncated gzip
+    member: frames are read up to the last complete one.
+
+    Args:
+        path (Path): Capture file.
+
+    Yields:
+        tuple[float, str]: Reception timestamp and raw frame.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        lines = iter(f)
+        while True:
+            try:
+                line = next(lines)
+            except StopIteration, EOFError:  # EOFError: truncated gzip member
+                return
+            if not line.endswith("\n"):
+                return  # truncated line
+            timestamp, frame = json.loads(line)
+            yield timestamp, frame
@@ -1,23 +1,38 @@
 import asyncio
-import re
 import signal
 from collections import defaultdict
-from collections.abc import Coroutine
+from collections.abc import Coroutine, Iterable
 from contextlib import suppress
 from contextvars import Context
+from pathlib import Path
 from time import time
 from typing import Any
 
 import aiohttp
 
-from cerbottana import utils
-from cerbottana.handlers import handlers
+from cerbottana import metrics, utils
+from cerbottana.capture import CaptureRecorder
+from cerbottana.database import Database, current_database
+from cerbottana.frame_parser import parse_frame
+from cerbottana.handlers import compile_dispatch_table, handlers
+from cerbottana.log import get_logger
 from cerbottana.models.protocol_message import ProtocolMessage
 from cerbottana.models.room import Room
 from cerbottana.models.user import User
+from cerbottana.outbound import MULTILINE_LIMIT, OutboundScheduler, Priority
 from cerbottana.plugins import Command, commands
 from cerbottana.tasks import background_tasks, init_tasks
-from cerbottana.typedefs import RoomId, Tier
+from cerbottana.typedefs import RoomId, Tier, UserId
+from cerbottana.userdetails import UserdetailsScheduler
+from cerbottana.watchdog import Watchdog
+
+logger = get_logger("connection")
+logger_in = get_logger("protocol.in")
+logger_out = get_logger("protocol.out")
+
+frames_received = metrics.frames_received.labels()
+lines_received = metrics.lines_received.labels()
+reconnects = metrics.reconnects.labels()
 
 
 class Connection:
@@ -34,6 +49,15 @@ class Connection:
         command_character: str,
         base_url: str,
         webhooks: dict[str, str],
+        outbound_rate: float = 10,
+        outbound_burst: int = 5,
+        capture_path: Path | None = None,
+        login_url: str = "https://play.pokemonshowdown.com/api/login",
+        metrics_host: str = "localhost",
+        metrics_port: int | None = None,
+        watchdog_threshold: float | None = None,
+        database: str = "database",
+        client_session: aiohttp.ClientSession | None = None,
     ) -> None:
         self.url = url
         self.username = username
@@ -42,25 +66,39 @@ class Connection:
         self.statustext = statustext
         self.autojoin_rooms = {utils.to_room_id(x) for x in rooms}
         self.rooms: dict[RoomId, Room] = {}
+        # Joined rooms of each user, and joined rooms where the bot is roombot, kept up
+        # to date by `Room`
+        self.user_rooms: dict[UserId, set[Room]] = {}
+        self.roombot_rooms: set[Room] = set()
         self.main_room = Room.get(self, main_room)
         self.command_character = command_character
         self.base_url = base_url
+        self.login_url = login_url
         self.webhooks = {utils.to_room_id(room): url for room, url in webhooks.items()}
         self.public_roomids: set[str] = set()
         self.init_tasks = init_tasks
         self.background_tasks = background_tasks
-        self.handlers = handlers
+        self.dispatch_table = compile_dispatch_table(handlers)
         self.commands = commands
         self.active_commands: dict[Room | User, dict[asyncio.Task[None], Command]] = (
             defaultdict(dict)
         )
-        self._client_session: aiohttp.ClientSession | None = None
+        self.database = database
+        self._client_session = client_session
+        self._owns_client_session = client_session is None
         self.timestamp: float = 0
-        self.lastmessage: float = 0
+        self.outbound = OutboundScheduler(
+            self._write, rate=outbound_rate, burst=outbound_burst
+        )
+        self.userdetails = UserdetailsScheduler(self)
         self.websocket: aiohttp.ClientWebSocketResponse | None = None
         self.connection_start: float | None = None
         self.tiers: dict[str, Tier] = {}
         self.running_tasks: set[asyncio.Task[Any]] = set()  # type: ignore[explicit-any]
+        self.recorder = CaptureRecorder(capture_path) if capture_path else None
+        self.metrics_host = metrics_host
+        self.metrics_port = metrics_port
+        self.watchdog = Watchdog(watchdog_threshold) if watchdog_threshold else None
 
     @property
     def client_session(self) -> aiohttp.ClientSession:
@@ -70,11 +108,42 @@ class Connection:
             )
         return self._client_session
 
+    @client_session.setter
+    def client_session(self, session: aiohttp.ClientSession) -> None:
+        # Shared sessions are closed by their owner
+        self._client_session = session
+        self._owns_client_session = False
+
     async def open_connection(self) -> None:
         signal.signal(signal.SIGTERM, signal.getsignal(signal.SIGINT))
-        with suppress(asyncio.CancelledError):
-            await self._start_websocket()
-        if self._client_session is not None:
+        # Every task started by this connection inherits the context
+        current_database.set(self.database)
+
+        # Diagnostics outlive reconnections, unlike self.running_tasks
+        diagnostics_tasks: list[asyncio.Task[None]] = []
+        if self.metrics_port is not None:
+            diagnostics_tasks.append(
+                asyncio.create_task(
+                    metrics.serve_metrics(
+                        [self], host=self.metrics_host, port=self.metrics_port
+                    )
+                )
+            )
+        if self.watchdog is not None:
+            diagnostics_tasks.append(asyncio.create_task(self.watchdog.run()))
+        try:
+            with suppress(asyncio.CancelledError):
+                await self._start_websocket()
+        finally:
+            await self.outbound.close()
+            await Database.open(self.database).writes.flush()
+            for task in diagnostics_tasks:
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+            if self.recorder is not None:
+                await asyncio.to_thread(self.recorder.close)
+        if self._client_session is not None and self._owns_client_session:
             await self._client_session.close()
 
     async def _start_websocket(self) -> None:
@@ -90,10 +159,12 @@ class Connection:
                     self.connection_start = time()
                     async for message in websocket:
                         if message.type == aiohttp.WSMsgType.TEXT:
-                            print(f"<< {message.data}")
+                            logger_in.debug("<< %s", message.data)
+                            if self.recorder is not None:
+                                self.recorder.record(message.data)
                             await self._parse_text_message(message.data)
                         elif message.type == aiohttp.WSMsgType.BINARY:
-                            print(f"<b {message.data.decode()}")
+                            logger_in.debug("<b %s", message.data.decode())
                             await self._parse_binary_message(message.data)
                         elif message.type == aiohttp.WSMsgType.ERROR:
                             break
@@ -111,12 +182,15 @@ class Connection:
 
             self.websocket = None
             self.connection_start = None
+            await self.outbound.close()
+            self.userdetails.clear()
+            reconnects.inc()
 
             if connection_retries < 12:
                 # Cap the backoff to 2**12 seconds, which is a little over one hour
                 connection_retries += 1
             backoff = 2**connection_retries
-            print(f"Connection closed, retrying in {backoff} seconds")
+            logger.warning("Connection closed, retrying in %d seconds", backoff)
             await asyncio.sleep(backoff)
 
     async def _run_init_background_tasks(self) -> None:
@@ -139,51 +213,64 @@ class Connection:
         if not message:
             return
 
-        init = False
-
-        roomname = ""
-        if message[0] == ">":
-            roomname = message.split("\n")[0]
-        roomid = utils.to_room_id(roomname)
-        room = Room.get(self, roomid)
-
-        for raw_msg in message.split("\n"):
-            if language := re.match(r"This room's primary language is (.*)", raw_msg):
-                room.language_name = language.group(1)
-                continue
+        frames_received.inc()
+        lines_received.inc(message.count("\n") + 1)
 
-            if not raw_msg or raw_msg[0] != "|":
-                continue
+        frame = parse_frame(message)
+        room = Room.get(self, frame.roomid)
 
-            msg = ProtocolMessage(room, raw_msg[1:])
+        if frame.language_name is not None:
+            room.language_name = frame.language_name
 
-            if msg.type == "init":
-                init = True
-
-            if init and msg.type == "tournament":
-                return
-
-            room.add_message_to_queue(msg)
+        for line in frame.lines:
+            room.add_message_to_queue(ProtocolMessage.from_line(room, line))
 
     async def _parse_binary_message(self, message: bytes) -> None:
         err = f"Received unexpected binary message {message!r}"
         raise TypeError(err)
 
-    async def _send_message_delay(self) -> None:
-        now = time()
-        if now - self.lastmessage < 0.1:
-            await asyncio.sleep(0.1)
-        self.lastmessage = now
-
-    async def send(self, message: str) -> None:
+    async def send(
+        self, message: str, *, priority: Priority = Priority.COMMAND
+    ) -> None:
         """Sends a raw unescaped message to the websocket.
 
+        Messages are throttled by `self.outbound`, which sends higher priority messages
+        first.
+
         Args:
             message (str): String to send.
+            priority (Priority): Outbound lane. Defaults to Priority.COMMAND.
+        """
+        if self.websocket is not None:
+            await self.outbound.send(message, priority)
+
+    async def send_batch(
+        self,
+        roomid: str,
+        messages: Iterable[str],
+        *,
+        max_lines: int = MULTILINE_LIMIT,
+        priority: Priority = Priority.COMMAND,
+    ) -> None:
+        """Sends several raw unescaped messages to the same room as a single frame.
+
+        Messages are split in multiple frames if there are more than `max_lines`.
+
+        Args:
+            roomid (str): Target room, an empty string for global commands.
+            messages (Iterable[str]): Strings to send, one per line.
+            max_lines (int): Maximum number of lines in a frame. Defaults to
+                MULTILINE_LIMIT.
+            priority (Priority): Outbound lane. Defaults to Priority.COMMAND.
         """
+        lines = list(messages)
+        for i in range(0, len(lines), max_lines):
+            frame = "\n".join(lines[i : i + max_lines])
+            await self.send(f"{roomid}|{frame}", priority=priority)
+
+    async def _write(self, message: str) -> None:
         if self.websocket is not None:
-            await self._send_message_delay()
-            print(f">> {message}")
+            logger_out.debug(">> %s", message)
             await self.websocket.send_str(message)
 
     def create_task[T](  # type: ignore[explicit-any]
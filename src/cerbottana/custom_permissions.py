@@ -0,0 +1,110 @@
+from typing import TYPE_CHECKING, ClassVar, cast
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import delete, select
+
+import cerbottana.databases.database as d
+from cerbottana.database import Database
+from cerbottana.typedefs import Role, RoomId
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
+
+class CustomPermissionCache:
+    """Required ranks customized through `setpermission`, for each room and command.
+
+    The whole table is loaded by `load`, in an init task, and `set` writes through to
+    the database, so permission checks never query it.
+
+    Attributes:
+        db (Database): Database storing the custom permissions.
+    """
+
+    _instances: ClassVar[WeakKeyDictionary[Database, CustomPermissionCache]] = (
+        WeakKeyDictionary()
+    )
+
+    def __init__(self, db: Database) -> None:
+        self.db = db
+        self._ranks: dict[RoomId, dict[str, Role]] | None = None
+
+    @classmethod
+    def open(cls, dbname: str | None = None) -> CustomPermissionCache:
+        """Retrieves the cache of a database.
+
+        Args:
+            dbname (str | None): Database name. Defaults to None, i.e. the main
+                database of the current connection.
+
+        Returns:
+            CustomPermissionCache: Cache of the database.
+        """
+        db = Database.open(dbname)
+        if (cache := cls._instances.get(db)) is None:
+            cache = cls._instances[db] = cls(db)
+        return cache
+
+    def get(self, roomid: RoomId, command: str) -> Role | None:
+        """Retrieves the custom required rank of a command.
+
+        Args:
+            roomid (RoomId): Room to check.
+            command (str): Command, as in `Command.get_rank_editable_commands`.
+
+        Returns:
+            Role | None: Required rank, None if it was not customized.
+        """
+        if self._ranks is None:
+            # Not loaded by the init task yet, e.g. by scripts: block once
+            with self.db.get_session() as session:
+                self._ranks = self._load(session)
+        room_ranks = self._ranks.get(roomid)
+        return room_ranks.get(command) if room_ranks else None
+
+    async def load(self) -> None:
+        """Loads the whole table in the database thread."""
+        self._ranks = await self.db.run(self._load)
+
+    async def set(self, roomid: RoomId, command: str, rank: Role | None) -> None:
+        """Customizes the required rank of a command.
+
+        Args:
+            roomid (RoomId): Room to update.
+            command (str): Command, as in `Command.get_rank_editable_commands`.
+            rank (Role | None): Required rank, None to restore the default one.
+        """
+
+        def store_rank(session: Session) -> None:
+            if rank is None:
+                stmt = delete(d.CustomPermissions).filter_by(
+                    roomid=roomid, command=command
+                )
+                session.execute(stmt)
+            else:
+                session.add(
+                    d.CustomPermissions(
+                        roomid=roomid, command=command, required_rank=rank
+                    )
+                )
+
+        await self.db.run(store_rank)
+
+        if self._ranks is None:
+            return  # the table will be loaded on first access
+        if rank is None:
+            self._ranks.get(roomid, {}).pop(command, None)
+        else:
+            self._ranks.setdefault(roomid, {})[command] = rank
+
+    @staticmethod
+    def _load(session: Session) -> dict[RoomId, dict[str, Role]]:
+        ranks: dict[RoomId, dict[str, Role]] = {}
+        stmt = select(
+            d.CustomPermissions.roomid,
+            d.CustomPermissions.command,
+            d.CustomPermissions.required_rank,
+        )
+        for roomid, command, required_rank in session.execute(stmt):
+            ranks.setdefault(RoomId(roomid), {})[command] = cast("Role", required_rank)
+        return ranks
@@ -1,31 +1,141 @@
-from collections.abc import Iterator
-from contextlib import contextmanager
-from typing import ClassVar
+import asyncio
+from collections.abc import Callable, Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass, field
+from functools import partial
+from time import perf_counter
+from typing import TYPE_CHECKING, ClassVar
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import and_, bindparam, create_engine, event, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
-from cerbottana import utils
+from cerbottana import metrics, utils
+from cerbottana.log import get_logger
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine.interfaces import DBAPIConnection
+    from sqlalchemy.pool import ConnectionPoolEntry
+
+logger = get_logger("db")
+
+ColumnValues = Mapping[str, str | int | None]
+# (model, insert if missing, key columns and values) -> column values, see WriteBuffer
+_PendingRows = dict[
+    tuple[type[DeclarativeBase], bool, tuple[tuple[str, str | int | None], ...]],
+    dict[str, str | int | None],
+]
+
+# Name of the main database of the connection running in the current context, see
+# `Connection.open_connection`
+current_database: ContextVar[str] = ContextVar("current_database", default="database")
+
+
+@dataclass(frozen=True, slots=True)
+class EngineProfile:
+    """SQLite settings of the connections of a database.
+
+    Attributes:
+        read_only (bool): True if the database file is opened read-only and assumed
+            not to change while it is open (`mode=ro&immutable=1`).
+        pragmas (Mapping[str, str | int]): PRAGMA statements run on every new
+            connection.
+        pool_size (int): Number of connections kept open.
+    """
+
+    read_only: bool = False
+    pragmas: Mapping[str, str | int] = field(default_factory=dict)
+    pool_size: int = 5
+
+
+# The main database is written on nearly every protocol message: the WAL journal lets
+# readers run alongside the writer, and with synchronous=NORMAL commits don't wait for
+# an fsync, at the cost of the latest transactions if the OS crashes
+READ_WRITE_PROFILE = EngineProfile(
+    pragmas={
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -16 * 1024,  # KiB
+        "temp_store": "MEMORY",
+    }
+)
+# Databases generated from the data folder, only rewritten by their init tasks
+READ_ONLY_PROFILE = EngineProfile(
+    read_only=True,
+    pragmas={
+        "query_only": "ON",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -32 * 1024,  # KiB
+        "temp_store": "MEMORY",
+    },
+    pool_size=8,
+)
+
+PROFILES: dict[str, EngineProfile] = {"veekun": READ_ONLY_PROFILE}
 
 
 class Database:
+    """SQLite database, stored in the config folder.
+
+    `get_session` runs queries synchronously, blocking the event loop while SQLite
+    waits for the disk: coroutines should use `run` instead, which runs them in a
+    dedicated thread.
+    """
+
     _instances: ClassVar[dict[str, Database]] = {}
+    _executor: ThreadPoolExecutor | None = None  # started on first use of `run`
+    _writes: WriteBuffer | None = None  # created on first use
+
+    def __init__(self, dbname: str, profile: EngineProfile | None = None) -> None:
+        """Use `Database.open`, unless a different profile is needed, e.g. to rebuild
+        a read-only database.
 
-    def __init__(self, dbname: str) -> None:
-        dbpath = str(utils.get_config_file(f"{dbname}.sqlite"))
-        engine = f"sqlite:///{dbpath}"
-        self.engine = create_engine(engine)
+        Args:
+            dbname (str): Name of the database file, without extension.
+            profile (EngineProfile | None): Connection settings. Defaults to None, i.e.
+                the profile in PROFILES or READ_WRITE_PROFILE.
+        """
+        if profile is None:
+            profile = PROFILES.get(dbname, READ_WRITE_PROFILE)
+        dbpath = utils.get_config_file(f"{dbname}.sqlite")
+        if profile.read_only:
+            engine = f"sqlite:///file:{dbpath}?mode=ro&immutable=1&uri=true"
+        else:
+            engine = f"sqlite:///{dbpath}"
+        self.dbname = dbname
+        self.profile = profile
+        self.engine = create_engine(engine, pool_size=profile.pool_size)
+        event.listen(self.engine, "connect", self._set_pragmas)
         self.Session = sessionmaker(self.engine)
-        self._instances[dbname] = self
 
     @classmethod
-    def open(cls, dbname: str = "database") -> Database:
+    def open(cls, dbname: str | None = None) -> Database:
+        if dbname is None:
+            dbname = current_database.get()
         if dbname not in cls._instances:
-            cls(dbname)
+            cls._instances[dbname] = cls(dbname)
         return cls._instances[dbname]
 
+    @property
+    def writes(self) -> WriteBuffer:
+        if self._writes is None:
+            self._writes = WriteBuffer(self)
+        return self._writes
+
+    def _set_pragmas(
+        self, dbapi_connection: DBAPIConnection, _: ConnectionPoolEntry
+    ) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in self.profile.pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
     @contextmanager
     def get_session(self, language_id: int | None = None) -> Iterator[Session]:
+        start = perf_counter()
         session = self.Session()
         if language_id:
             session.info["language_id"] = language_id
@@ -37,3 +147,198 @@ class Database:
             raise
         finally:
             session.close()
+            metrics.db_session_time.labels(self.dbname).observe(perf_counter() - start)
+
+    async def run[T](
+        self, func: Callable[[Session], T], language_id: int | None = None
+    ) -> T:
+        """Runs a function with a session in the database thread.
+
+        Functions are run one at a time, in the order they are submitted. The session
+        is committed after `func` returns and closed before its result is returned, so
+        it should not return ORM instances.
+
+        Args:
+            func (Callable[[Session], T]): Function to run, see `get_session`.
+            language_id (int | None): Language id of the session. Defaults to None.
+
+        Returns:
+            T: Result of func.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f"database-{self.dbname}"
+            )
+        ctx = copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, ctx.run, self._run_in_session, func, language_id
+        )
+
+    async def close(self) -> None:
+        """Stops the database thread and closes the pooled connections.
+
+        Databases can be shared by several connections: they should only be closed by
+        their owner, e.g. the supervisor, once every connection using them is done,
+        and after flushing the pending writes. The database can still be used
+        afterwards, the thread and the connections are opened again on demand.
+        """
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            # Wait for the queued functions without blocking the event loop
+            await asyncio.to_thread(executor.shutdown)
+        self.engine.dispose()
+
+    def _run_in_session[T](
+        self, func: Callable[[Session], T], language_id: int | None
+    ) -> T:
+        with self.get_session(language_id) as session:
+            return func(session)
+
+
+class WriteBuffer:
+    """Buffers small keyed writes, merging them and flushing them in one transaction.
+
+    Handlers write the same rows several times a second, e.g. the username of a user
+    who joins a few rooms at once: writes to the same row are merged in memory, and
+    flushed in the database thread every `flush_interval` seconds or as soon as
+    `max_items` rows are pending. Writes that fail to be flushed are logged and
+    dropped.
+
+    Reads that need to see the buffered values, e.g. the profile of a user, should
+    await `flush` first.
+
+    Attributes:
+        db (Database): Database the writes are flushed to.
+        flush_interval (float): Seconds writes are buffered for.
+        max_items (int): Pending rows that trigger a flush.
+    """
+
+    def __init__(
+        self, db: Database, *, flush_interval: float = 0.2, max_items: int = 500
+    ) -> None:
+        self.db = db
+        self.flush_interval = flush_interval
+        self.max_items = max_items
+        self._pending: _PendingRows = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = asyncio.Lock()
+        self._full = asyncio.Event()
+        self._flusher: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def upsert(
+        self, model: type[DeclarativeBase], key: ColumnValues, values: ColumnValues
+    ) -> None:
+        """Buffers an upsert, i.e. `INSERT ... ON CONFLICT (key) DO UPDATE`.
+
+        Args:
+            model (type[DeclarativeBase]): Table to write.
+            key (ColumnValues): Columns of a unique constraint, and their values.
+            values (ColumnValues): Columns to update, and their values.
+        """
+        self._add(model, key, values, insert_missing=True)
+
+    def update(
+        self, model: type[DeclarativeBase], key: ColumnValues, values: ColumnValues
+    ) -> None:
+        """Buffers an update of the rows matching key, if any.
+
+        Args:
+            model (type[DeclarativeBase]): Table to write.
+            key (ColumnValues): Columns to filter by, and their values.
+            values (ColumnValues): Columns to update, and their values.
+        """
+        self._add(model, key, values, insert_missing=False)
+
+    async def flush(self) -> None:
+        """Writes every pending row, in one transaction."""
+        self._bind_loop()
+        async with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            self._full.clear()
+            await self.db.run(partial(self._write, pending))
+
+    def _add(
+        self,
+        model: type[DeclarativeBase],
+        key: ColumnValues,
+        values: ColumnValues,
+        *,
+        insert_missing: bool,
+    ) -> None:
+        self._bind_loop()
+        row = (model, insert_missing, tuple(sorted(key.items())))
+        self._pending.setdefault(row, {}).update(values)
+
+        if len(self._pending) >= self.max_items:
+            self._full.set()
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._run())
+
+    def _bind_loop(self) -> None:
+        # Databases outlive event loops, e.g. across several asyncio.run calls, but the
+        # lock, the event and the flusher only work on the loop they were used on
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        self._loop = loop
+        self._lock = asyncio.Lock()
+        self._full = asyncio.Event()
+        if len(self._pending) >= self.max_items:
+            self._full.set()
+        self._flusher = None
+
+    async def _run(self) -> None:
+        while self._pending:
+            try:
+                with suppress(TimeoutError):
+                    await asyncio.wait_for(self._full.wait(), self.flush_interval)
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to flush writes to %s", self.db.dbname)
+                await asyncio.sleep(self.flush_interval)
+
+    @staticmethod
+    def _write(
+        pending: _PendingRows,
+        session: Session,
+    ) -> None:
+        # Rows with the same columns are written with a single executemany
+        groups: dict[
+            tuple[type[DeclarativeBase], bool, tuple[str, ...], tuple[str, ...]],
+            list[dict[str, str | int | None]],
+        ] = {}
+        for (model, insert_missing, key), values in pending.items():
+            key_columns = tuple(column for column, _ in key)
+            group = (model, insert_missing, key_columns, tuple(sorted(values)))
+            if insert_missing:
+                params = dict(key) | values
+            else:  # keys are bound separately, see below
+                params = {f"key_{column}": value for column, value in key} | values
+            groups.setdefault(group, []).append(params)
+
+        for (model, insert_missing, key_columns, value_columns), rows in groups.items():
+            if insert_missing:
+                upsert_stmt = insert(model)
+                upsert_stmt = upsert_stmt.on_conflict_do_update(
+                    index_elements=key_columns,
+                    set_={
+                        column: upsert_stmt.excluded[column] for column in value_columns
+                    },
+                )
+                session.execute(upsert_stmt, rows)
+            else:
+                update_stmt = update(model).where(
+                    and_(
+                        *(
+                            model.__table__.c[column] == bindparam(f"key_{column}")
+                            for column in key_columns
+                        )
+                    )
+                )
+                # ORM updates with a list of parameters match rows by primary key
+                session.connection().execute(update_stmt, rows)
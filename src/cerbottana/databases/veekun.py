@@ -114,7 +114,16 @@ class TranslatableMixin:
 class LatestVersion(Base):
     __tablename__ = "latest_version"
 
-    crc: Mapped[intpk]
+    crc: Mapped[intpk]  # of the schema, see tasks/veekun.py
+
+
+class TableVersions(Base):
+    __tablename__ = "table_versions"
+
+    tablename: Mapped[str] = mapped_column(primary_key=True)
+    size: Mapped[int]
+    mtime_ns: Mapped[int]
+    crc: Mapped[int]
 
 
 class Abilities(HashableMixin, TranslatableMixin, Base):
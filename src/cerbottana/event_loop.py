@@ -0,0 +1,51 @@
+import asyncio
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+from cerbottana.log import get_logger
+
+logger = get_logger("connection")
+
+BACKENDS = ("asyncio", "uvloop")
+
+LoopFactory = Callable[[], asyncio.AbstractEventLoop]
+
+
+def get_loop_factory(backend: str) -> LoopFactory | None:
+    """Retrieves the event loop factory of a backend.
+
+    Unknown or unavailable backends fall back to asyncio, with a warning.
+
+    Args:
+        backend (str): One of BACKENDS.
+
+    Returns:
+        LoopFactory | None: Event loop factory, None for the default asyncio loop.
+    """
+    if backend == "uvloop":
+        try:
+            import uvloop
+        except ImportError:
+            logger.warning("uvloop is not installed, falling back to asyncio")
+            return None
+        factory: LoopFactory = uvloop.new_event_loop
+        return factory
+
+    if backend != "asyncio":
+        logger.warning("Unknown event loop %r, falling back to asyncio", backend)
+    return None
+
+
+def run[T](  # type: ignore[explicit-any]
+    coro: Coroutine[Any, Any, T], *, backend: str = "asyncio"
+) -> T:
+    """Runs a coroutine on a new event loop of the given backend.
+
+    Args:
+        coro (Coroutine[Any, Any, T]): Coroutine to run.
+        backend (str): One of BACKENDS. Defaults to "asyncio".
+
+    Returns:
+        T: Result of the coroutine.
+    """
+    return asyncio.run(coro, loop_factory=get_loop_factory(backend))
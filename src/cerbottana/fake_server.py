@@ -0,0 +1,293 @@
+import asyncio
+import json
+import random
+import re
+import statistics
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from secrets import token_hex
+from time import perf_counter, time
+
+from aiohttp import WSMsgType, web
+
+from cerbottana import utils
+from cerbottana.log import get_logger
+from cerbottana.typedefs import JsonDict
+
+logger = get_logger("connection")
+
+
+@dataclass
+class LoadProfile:
+    """Shape of the traffic generated by `FakeShowdownServer`.
+
+    Attributes:
+        rooms (int): Number of simulated rooms.
+        users (int): Number of users in each room.
+        rate (float): Events per second in each room.
+        command_ratio (float): Fraction of events that are commands sent to a room.
+        pm_ratio (float): Fraction of events that are commands sent in PM.
+        churn_ratio (float): Fraction of events that are joins or leaves.
+        tour_ratio (float): Fraction of events that are tournament creations.
+        command (str): Command used to measure latency, it should reply in the same
+            room or in PM.
+        reply_pattern (str): Regular expression matching the replies to `command`,
+            other messages of the bot are not counted as replies.
+    """
+
+    rooms: int = 10
+    users: int = 100
+    rate: float = 5
+    command_ratio: float = 0.05
+    pm_ratio: float = 0.01
+    churn_ratio: float = 0.2
+    tour_ratio: float = 0.001
+    command: str = ".uptime"
+    reply_pattern: str = r"\d+ seconds?$"
+
+
+@dataclass
+class LoadStats:
+    frames_sent: int = 0
+    messages_received: int = 0
+    commands_sent: int = 0
+    latencies: list[float] = field(default_factory=list)
+
+    def summary(self) -> str:
+        lines = [
+            f"Frames sent: {self.frames_sent}",
+            f"Messages received: {self.messages_received}",
+            f"Commands sent: {self.commands_sent}",
+            f"Replies received: {len(self.latencies)}",
+        ]
+        if len(self.latencies) >= 2:
+            quantiles = statistics.quantiles(self.latencies, n=100)
+            lines.append(
+                "Command latency: "
+                f"p50 {quantiles[49] * 1000:.1f}ms, "
+                f"p95 {quantiles[94] * 1000:.1f}ms, "
+                f"max {max(self.latencies) * 1000:.1f}ms"
+            )
+        return "\n".join(lines)
+
+
+class FakeShowdownServer:
+    """Minimal Pokemon Showdown stand-in, used to load test the bot end to end.
+
+    It serves the websocket on `/showdown/websocket` and a fake login endpoint on
+    `/api/login`, answers the commands sent by the bot while logging in and joining
+    rooms, and then generates chat, membership, PM and tournament traffic according
+    to a `LoadProfile`. The time between each command and the bot reply is recorded in
+    `stats.latencies`.
+    """
+
+    def __init__(self, profile: LoadProfile, *, seed: int | None = None) -> None:
+        self.profile = profile
+        self.stats = LoadStats()
+
+        self._random = random.Random(seed)
+        self._reply = re.compile(profile.reply_pattern)
+        self._botname = ""
+        self._websocket: web.WebSocketResponse | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+        self._rooms = [f"room{i}" for i in range(profile.rooms)]
+        self._users: dict[str, dict[str, str]] = {}  # roomid -> username -> rank
+        self._online: dict[str, set[str]] = {}  # roomid -> usernames
+        # userid -> name and rooms, as sent in |queryresponse|userdetails|
+        self._userdetails: dict[str, tuple[str, dict[str, JsonDict]]] = {}
+        for roomid in self._rooms:
+            users = {}
+            for i in range(profile.users):
+                rank = "%" if i % 100 == 0 else "+" if i % 20 == 0 else " "
+                username = f"{roomid} user {i}"
+                users[username] = rank
+                self._userdetails[utils.to_user_id(username)] = (
+                    username,
+                    {rank.strip() + roomid: {}},
+                )
+            self._users[roomid] = users
+            self._online[roomid] = set(users)
+
+        # roomid (or userid for PMs) -> send time of the commands awaiting a reply
+        self._pending: defaultdict[str, deque[float]] = defaultdict(deque)
+
+    @property
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/showdown/websocket", self._websocket_handler)
+        app.router.add_post("/api/login", self._login_handler)
+        return app
+
+    async def _login_handler(self, request: web.Request) -> web.Response:  # noqa: ARG002
+        return web.Response(text="]" + json.dumps({"assertion": token_hex(32)}))
+
+    async def _websocket_handler(self, request: web.Request) -> web.WebSocketResponse:
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        self._websocket = websocket
+
+        await self._send(f"|challstr|4|{token_hex(64)}")
+        try:
+            async for message in websocket:
+                if message.type == WSMsgType.TEXT:
+                    await self._handle_message(message.data)
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            self._websocket = None
+
+        return websocket
+
+    async def _send(self, frame: str) -> None:
+        if self._websocket is not None and not self._websocket.closed:
+            self.stats.frames_sent += 1
+            await self._websocket.send_str(frame)
+
+    async def _handle_message(self, message: str) -> None:
+        roomid, _, body = message.partition("|")
+        for line in body.split("\n"):
+            self.stats.messages_received += 1
+            await self._handle_line(roomid, line)
+
+    async def _handle_line(self, roomid: str, line: str) -> None:
+        command, _, arg = line.partition(" ")
+
+        if command == "/trn":
+            self._botname = arg.split(",")[0]
+            settings = json.dumps({"blockChallenges": True})
+            await self._send(f"|updateuser| {self._botname}|1|1|{settings}")
+            await self._send("|formats|,1|S/V Singles|[Gen 9] OU,e")
+        elif command == "/cmd" and arg == "rooms":
+            rooms = {"chat": [{"title": roomid} for roomid in self._rooms]}
+            await self._send(f"|queryresponse|rooms|{json.dumps(rooms)}")
+        elif command == "/cmd" and arg.startswith("userdetails "):
+            await self._send_userdetails(arg.removeprefix("userdetails "))
+        elif command in ("/autojoin", "/join"):
+            for target in arg.split(","):
+                await self._join_room(utils.to_room_id(target))
+        elif command == "/w":
+            userid, _, message = arg.partition(",")
+            if self._reply.search(message):
+                self._record_reply(userid)
+        elif (
+            roomid
+            and (not line.startswith(("/", "!")) or line.startswith("//"))
+            and self._reply.search(line)
+        ):
+            self._record_reply(roomid)
+
+    async def _join_room(self, roomid: str) -> None:
+        if roomid not in self._users:
+            await self._send(f"|noinit|nonexistent|The room '{roomid}' does not exist.")
+            return
+
+        userlist = [f"*{self._botname}"]
+        userlist.extend(
+            f"{self._users[roomid][username]}{username}"
+            for username in self._online[roomid]
+        )
+        await self._send(
+            "\n".join(
+                [
+                    f">{roomid}",
+                    "|init|chat",
+                    f"|title|{roomid.title()}",
+                    f"|users|{len(userlist)},{','.join(userlist)}",
+                    f"|:|{int(time())}",
+                ]
+            )
+        )
+
+        task = asyncio.create_task(self._generate_traffic(roomid))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send_userdetails(self, userid: str) -> None:
+        if userid == utils.to_user_id(self._botname):
+            name = self._botname
+            rooms: dict[str, JsonDict] = {f"*{roomid}": {} for roomid in self._rooms}
+        else:
+            name, rooms = self._userdetails.get(userid, (userid, {}))
+        data = {
+            "id": userid,
+            "userid": userid,
+            "name": name,
+            "avatar": "1",
+            "group": " ",
+            "autoconfirmed": True,
+            "status": "",
+            "rooms": rooms,
+        }
+        await self._send(f"|queryresponse|userdetails|{json.dumps(data)}")
+
+    def _record_reply(self, key: str) -> None:
+        if self._pending[key]:
+            self.stats.latencies.append(perf_counter() - self._pending[key].popleft())
+
+    async def _generate_traffic(self, roomid: str) -> None:
+        profile = self.profile
+        users = self._users[roomid]
+        voiced = [username for username, rank in users.items() if rank != " "]
+        online = self._online[roomid]
+
+        while True:
+            await asyncio.sleep(self._random.expovariate(profile.rate))
+
+            event = self._random.random()
+            if (event := event - profile.command_ratio) < 0:
+                username = self._random.choice(voiced)
+                userstring = users[username] + username
+                line = f"|c:|{int(time())}|{userstring}|{profile.command}"
+                self._pending[roomid].append(perf_counter())
+                self.stats.commands_sent += 1
+            elif (event := event - profile.pm_ratio) < 0:
+                username = self._random.choice(voiced)
+                botname = self._botname
+                await self._send(f"|pm| {username}| {botname}|{profile.command}")
+                self._pending[utils.to_user_id(username)].append(perf_counter())
+                self.stats.commands_sent += 1
+                continue
+            elif (event := event - profile.churn_ratio) < 0:
+                username = self._random.choice(list(users))
+                if username in online:
+                    online.discard(username)
+                    line = f"|l| {username}"
+                else:
+                    online.add(username)
+                    line = f"|j|{users[username]}{username}"
+            elif event - profile.tour_ratio < 0:
+                line = "|tournament|create|gen9ou|Elimination|0"
+            else:
+                username = self._random.choice(list(online) or list(users))
+                line = f"|c:|{int(time())}|{users[username]}{username}|hello"
+
+            await self._send(f">{roomid}\n{line}")
+
+
+async def serve(
+    server: FakeShowdownServer,
+    *,
+    host: str = "localhost",
+    port: int = 8000,
+    duration: float | None = None,
+) -> None:
+    """Runs a `FakeShowdownServer` until `duration` seconds have passed, or forever.
+
+    Args:
+        server (FakeShowdownServer): Server to run.
+        host (str): Listening host. Defaults to "localhost".
+        port (int): Listening port. Defaults to 8000.
+        duration (float | None): Seconds to run for. Defaults to None.
+    """
+    runner = web.AppRunner(server.app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+        logger.info("Fake Showdown server listening on %s:%d", host, port)
+        if duration is None:
+            await asyncio.Event().wait()
+        else:
+            await asyncio.sleep(duration)
+    finally:
+        await runner.cleanup()
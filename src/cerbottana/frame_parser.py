@@ -0,0 +1,77 @@
+from dataclasses import dataclass
+from typing import NamedTuple
+
+from cerbottana import utils
+from cerbottana.typedefs import RoomId
+
+LANGUAGE_PREFIX = "This room's primary language is "
+
+
+class ProtocolLine(NamedTuple):
+    """Protocol line already split into its components.
+
+    Attributes:
+        msg (str): Raw line, without the leading `|`.
+        type (str): Type of the line.
+        params (list[str]): Parameters of the line.
+    """
+
+    msg: str
+    type: str
+    params: list[str]
+
+
+@dataclass(slots=True)
+class Frame:
+    """Websocket frame parsed in a single pass.
+
+    Attributes:
+        roomid (RoomId): Room the frame refers to, `lobby` if unspecified.
+        lines (list[ProtocolLine]): Protocol lines that should reach the handlers.
+        language_name (str | None): Room language, if the frame announces it.
+    """
+
+    roomid: RoomId
+    lines: list[ProtocolLine]
+    language_name: str | None
+
+
+def parse_frame(frame: str) -> Frame:
+    """Splits a raw websocket frame into its protocol lines.
+
+    Every line is scanned only once. Parsing stops at the first `|tournament|` line
+    following an `|init|` line. The chat backlog sent when joining a room is returned
+    as well, in order: old `|c:|` lines are buffered by their handler, but not parsed
+    as commands.
+
+    Args:
+        frame (str): Raw frame received from the websocket.
+
+    Returns:
+        Frame: Parsed frame.
+    """
+    raw_lines = frame.split("\n")
+
+    roomname = raw_lines[0] if frame[:1] == ">" else ""
+
+    lines: list[ProtocolLine] = []
+    language_name: str | None = None
+    init = False
+    for raw_line in raw_lines:
+        if raw_line[:1] != "|":
+            if raw_line.startswith(LANGUAGE_PREFIX):
+                language_name = raw_line[len(LANGUAGE_PREFIX) :]
+            continue
+
+        msg = raw_line[1:]
+        args = msg.split("|")
+        msgtype = args[0]
+
+        if msgtype == "init":
+            init = True
+        elif msgtype == "tournament" and init:
+            break
+
+        lines.append(ProtocolLine(msg, msgtype, args[1:]))
+
+    return Frame(utils.to_room_id(roomname), lines, language_name)
@@ -1,33 +1,62 @@
+import asyncio
 import importlib
 from collections.abc import Callable, Coroutine
 from dataclasses import dataclass
+from enum import IntEnum
 from functools import wraps
 from pathlib import Path
 
+from cerbottana import metrics
 from cerbottana.models.protocol_message import ProtocolMessage
 
 HandlerFunc = Callable[[ProtocolMessage], Coroutine[None, None, None]]
 
 
+class Lane(IntEnum):
+    """Per-room queues handlers run in.
+
+    Messages are processed in order within each lane, while lanes don't wait for each
+    other: slow membership updates, e.g. writing every user of a large `|users|` list
+    to the database and querying their userdetails, don't delay chat commands. Room
+    state that later messages rely on, such as the userlist, should be updated in the
+    main lane.
+    """
+
+    MAIN = 0
+    MEMBERSHIP = 1
+
+
 @dataclass
 class Handler:
     callback: HandlerFunc
     required_parameters: int | None
+    lane: Lane = Lane.MAIN
 
 
+# Handlers are keyed by message type, or by "type|subtype" to only receive messages
+# whose first parameter is `subtype`, e.g. "tournament|create"
 handlers: dict[str, list[Handler]] = {}
 
 
 def handler_wrapper(
-    message_types: list[str], *, required_parameters: int | None = None
+    message_types: list[str],
+    *,
+    required_parameters: int | None = None,
+    lane: Lane = Lane.MAIN,
 ) -> Callable[[HandlerFunc], HandlerFunc]:
     def cls_wrapper(func: HandlerFunc) -> HandlerFunc:
         if required_parameters:
             func = check_required_parameters(func, required_parameters)
+        name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+        callback = metrics.timed(
+            metrics.handler_latency.labels(name),
+            func,
+            activity=f"handler {name} ({', '.join(message_types)})",
+        )
         for message_type in message_types:
             if message_type not in handlers:
                 handlers[message_type] = []
-            handlers[message_type].append(Handler(func, required_parameters))
+            handlers[message_type].append(Handler(callback, required_parameters, lane))
         return func
 
     return cls_wrapper
@@ -45,6 +74,83 @@ def check_required_parameters(
     return wrapper
 
 
+def compile_dispatch_table(
+    registry: dict[str, list[Handler]],
+) -> dict[str, dict[Lane, HandlerFunc]]:
+    """Compiles a handlers registry into dispatch functions per message type and lane.
+
+    Message types with a single handler in a lane are dispatched to it directly, while
+    handlers of the same message type and lane still run concurrently. Subtype
+    handlers are only invoked for their subtype, together with the handlers of the
+    whole message type.
+
+    Args:
+        registry (dict[str, list[Handler]]): Handlers, usually `handlers`.
+
+    Returns:
+        dict[str, dict[Lane, HandlerFunc]]: Dispatch functions, keyed by message type
+            and lane.
+    """
+    generic: dict[str, list[Handler]] = {}
+    subtypes: dict[str, dict[str, list[Handler]]] = {}
+    for key, key_handlers in registry.items():
+        message_type, sep, subtype = key.partition("|")
+        if sep:
+            subtypes.setdefault(message_type, {})[subtype] = key_handlers
+        else:
+            generic[message_type] = key_handlers
+
+    dispatch_table: dict[str, dict[Lane, HandlerFunc]] = {}
+    for message_type in generic.keys() | subtypes.keys():
+        lanes = dispatch_table[message_type] = {}
+        for lane in Lane:
+            type_handlers = [
+                handler
+                for handler in generic.get(message_type, [])
+                if handler.lane is lane
+            ]
+            routes = {
+                subtype: _compile_handlers([*type_handlers, *lane_handlers])
+                for subtype, subtype_handlers in subtypes.get(message_type, {}).items()
+                if (
+                    lane_handlers := [
+                        handler for handler in subtype_handlers if handler.lane is lane
+                    ]
+                )
+            }
+            default = _compile_handlers(type_handlers) if type_handlers else None
+            if routes:
+                lanes[lane] = _route_subtypes(routes, default)
+            elif default is not None:
+                lanes[lane] = default
+    return dispatch_table
+
+
+def _compile_handlers(type_handlers: list[Handler]) -> HandlerFunc:
+    if len(type_handlers) == 1:
+        return type_handlers[0].callback
+
+    callbacks = [handler.callback for handler in type_handlers]
+
+    async def dispatch(msg: ProtocolMessage) -> None:
+        async with asyncio.TaskGroup() as tg:
+            for callback in callbacks:
+                tg.create_task(callback(msg))
+
+    return dispatch
+
+
+def _route_subtypes(
+    routes: dict[str, HandlerFunc], default: HandlerFunc | None
+) -> HandlerFunc:
+    async def dispatch(msg: ProtocolMessage) -> None:
+        callback = routes.get(msg.params[0], default) if msg.params else default
+        if callback is not None:
+            await callback(msg)
+
+    return dispatch
+
+
 modules = Path(__file__).parent.glob("*.py")
 
 for f in modules:
@@ -3,12 +3,14 @@ import json
 
 from cerbottana import utils
 from cerbottana.handlers import handler_wrapper
+from cerbottana.log import get_logger
 from cerbottana.models.protocol_message import ProtocolMessage
 
+logger = get_logger("handlers")
+
 
 @handler_wrapper(["challstr"], required_parameters=1)
 async def challstr(msg: ProtocolMessage) -> None:
-    url = "https://play.pokemonshowdown.com/api/login"
     payload = {
         "name": msg.conn.username,
         "pass": msg.conn.password,
@@ -18,12 +20,14 @@ async def challstr(msg: ProtocolMessage) -> None:
     assertion: str | None = None
     assertion_retries = 0
     while assertion is None:
-        async with msg.conn.client_session.post(url, data=payload) as resp:
+        async with msg.conn.client_session.post(
+            msg.conn.login_url, data=payload
+        ) as resp:
             try:
                 assertion = json.loads((await resp.text("utf-8"))[1:])["assertion"]
             except json.JSONDecodeError, KeyError:
                 if assertion_retries == 5:
-                    print("Unable to login, closing connection")
+                    logger.exception("Unable to login, closing connection")
                     if msg.conn.websocket is not None:
                         await msg.conn.websocket.close()
                     return
@@ -38,9 +42,11 @@ async def challstr(msg: ProtocolMessage) -> None:
     if msg.conn.statustext:
         await msg.conn.send(f"|/status {msg.conn.statustext}")
 
-    for roomid in msg.conn.autojoin_rooms:
-        await asyncio.sleep(0.15)
-        await msg.conn.send(f"|/join {roomid}")
+    # /autojoin accepts up to 16 rooms, and only before joining any other room
+    autojoin_rooms = sorted(msg.conn.autojoin_rooms)
+    if autojoin_rooms:
+        await msg.conn.send(f"|/autojoin {','.join(autojoin_rooms[:16])}")
+    await msg.conn.send_batch("", [f"/join {roomid}" for roomid in autojoin_rooms[16:]])
 
 
 @handler_wrapper(["updateuser"], required_parameters=4)
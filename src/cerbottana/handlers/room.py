@@ -2,22 +2,22 @@ import json
 import string
 from typing import TYPE_CHECKING
 
-from sqlalchemy import update
-
 import cerbottana.databases.database as d
 from cerbottana import utils
 from cerbottana.database import Database
-from cerbottana.handlers import handler_wrapper
+from cerbottana.handlers import Lane, handler_wrapper
 from cerbottana.models.protocol_message import ProtocolMessage
 from cerbottana.models.room import Room
 from cerbottana.models.user import User
+from cerbottana.outbound import Priority
 from cerbottana.typedefs import JsonDict
+from cerbottana.userdetails import Userdetails
 
 if TYPE_CHECKING:
     from cerbottana.connection import Connection
 
 
-async def add_user(
+def add_user(
     conn: Connection,
     room: Room,
     userstring: str,
@@ -34,16 +34,29 @@ async def add_user(
     if user.userid == utils.to_user_id(conn.username):
         room.roombot = rank == "*"
 
-    db = Database.open()
-    with db.get_session() as session:
-        session.add(d.Users(userid=user.userid))
-        stmt = (
-            update(d.Users).filter_by(userid=user.userid).values(username=user.username)
-        )
-        session.execute(stmt)
 
-    if not from_userlist or rank != " ":
-        await user.load_details()
+def store_users(
+    conn: Connection,
+    room: Room,
+    userstrings: list[str],
+    from_userlist: bool = False,
+) -> None:
+    """Saves usernames, through the write buffer, and queues userdetails queries.
+
+    Args:
+        conn (Connection): Used to access the websocket.
+        room (Room): Room the users were seen in.
+        userstrings (list[str]): User strings with leading character rank.
+        from_userlist (bool): True if the users come from a `|users|` list, whose
+            unranked users are not queried. Defaults to False.
+    """
+    writes = Database.open().writes
+    for userstring in userstrings:
+        rank = userstring[0]
+        user = User.get(conn, userstring[1:])
+        writes.upsert(d.Users, {"userid": user.userid}, {"username": user.username})
+        if not from_userlist or rank != " ":
+            user.load_details(room, rank)
 
 
 async def remove_user(conn: Connection, room: Room, userstring: str) -> None:
@@ -53,16 +66,18 @@ async def remove_user(conn: Connection, room: Room, userstring: str) -> None:
 
 @handler_wrapper(["init"], required_parameters=1)
 async def init(msg: ProtocolMessage) -> None:
-    msg.conn.rooms[msg.room.roomid] = msg.room
+    msg.room.join()
 
     if msg.params[0] == "chat":
-        await msg.conn.send(f"|/cmd roominfo {msg.room.roomid}")
-        await msg.room.send("/roomlanguage", False)
+        await msg.conn.send(
+            f"|/cmd roominfo {msg.room.roomid}", priority=Priority.BACKGROUND
+        )
+        await msg.room.send("/roomlanguage", False, priority=Priority.BACKGROUND)
 
 
 @handler_wrapper(["deinit"])
 async def deinit(msg: ProtocolMessage) -> None:
-    del msg.conn.rooms[msg.room.roomid]
+    msg.room.leave()
 
 
 @handler_wrapper(["title"], required_parameters=1)
@@ -75,14 +90,28 @@ async def users(msg: ProtocolMessage) -> None:
     userlist = msg.params[0]
 
     for user in userlist.split(",")[1:]:
-        await add_user(msg.conn, msg.room, user, True)
+        add_user(msg.conn, msg.room, user, True)
+
+
+@handler_wrapper(["users"], required_parameters=1, lane=Lane.MEMBERSHIP)
+async def store_userlist(msg: ProtocolMessage) -> None:
+    userlist = msg.params[0]
+
+    store_users(msg.conn, msg.room, userlist.split(",")[1:], True)
 
 
 @handler_wrapper(["join", "j", "J"], required_parameters=1)
 async def join(msg: ProtocolMessage) -> None:
     user = msg.params[0]
 
-    await add_user(msg.conn, msg.room, user)
+    add_user(msg.conn, msg.room, user)
+
+
+@handler_wrapper(["join", "j", "J"], required_parameters=1, lane=Lane.MEMBERSHIP)
+async def store_joined_user(msg: ProtocolMessage) -> None:
+    user = msg.params[0]
+
+    store_users(msg.conn, msg.room, [user])
 
 
 @handler_wrapper(["leave", "l", "L"], required_parameters=1)
@@ -101,7 +130,14 @@ async def name(msg: ProtocolMessage) -> None:
     if utils.to_user_id(userstring) != utils.to_user_id(oldid):
         await remove_user(msg.conn, msg.room, oldid)
 
-    await add_user(msg.conn, msg.room, userstring)
+    add_user(msg.conn, msg.room, userstring)
+
+
+@handler_wrapper(["name", "n", "N"], required_parameters=2, lane=Lane.MEMBERSHIP)
+async def store_renamed_user(msg: ProtocolMessage) -> None:
+    userstring = msg.params[0]
+
+    store_users(msg.conn, msg.room, [userstring])
 
 
 @handler_wrapper(["queryresponse"], required_parameters=2)
@@ -145,17 +181,17 @@ async def _parse_userdetails(msg: ProtocolMessage, jsondata: JsonDict) -> None:
     if avatar in utils.AVATAR_IDS:
         avatar = utils.AVATAR_IDS[avatar]
 
-    db = Database.open()
-    with db.get_session() as session:
-        session.add(d.Users(userid=user.userid))
-        stmt = update(d.Users).filter_by(userid=user.userid).values(avatar=avatar)
-        session.execute(stmt)
-
     if jsondata["rooms"] is not False:
-        user.global_rank = jsondata["group"]
+        details = Userdetails(jsondata["group"], {})
         for r in jsondata["rooms"]:
-            room = Room.get(msg.conn, utils.to_room_id(r))
             room_rank = (
                 r[0] if r[0] not in string.ascii_letters + string.digits else " "
             )
-            room.add_user(user, room_rank)
+            details.room_ranks[utils.to_room_id(r)] = room_rank
+        msg.conn.userdetails.store(user.userid, details)
+
+        user.global_rank = details.global_rank
+        for roomid, room_rank in details.room_ranks.items():
+            Room.get(msg.conn, roomid).add_user(user, room_rank)
+
+    Database.open().writes.upsert(d.Users, {"userid": user.userid}, {"avatar": avatar})
@@ -0,0 +1,111 @@
+import logging
+import queue
+from itertools import count
+from logging.handlers import QueueHandler, QueueListener
+
+# Logger categories, each one is a child of the `cerbottana` logger:
+#   protocol.in   frames received from the websocket (DEBUG only)
+#   protocol.out  messages sent to the websocket (DEBUG only)
+#   connection    websocket lifecycle
+#   handlers      protocol message handlers
+#   commands      chat commands and their background jobs
+#   tasks         init and background tasks
+#   db            database maintenance
+#   watchdog      event loop stalls
+CATEGORIES = (
+    "protocol.in",
+    "protocol.out",
+    "connection",
+    "handlers",
+    "commands",
+    "tasks",
+    "db",
+    "watchdog",
+)
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+class SamplingFilter(logging.Filter):
+    """Lets through one record every `rate`, useful for high-volume categories.
+
+    Rates apply to the child categories as well, e.g. "protocol" samples both
+    "protocol.in" and "protocol.out" with a shared counter; the most specific category
+    wins. Warnings and errors are never dropped.
+    """
+
+    def __init__(self, rates: dict[str, int]) -> None:
+        super().__init__()
+        self.rates = {f"cerbottana.{name}": rate for name, rate in rates.items()}
+        self._counters = {name: count() for name in self.rates}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        name = record.name
+        while name not in self.rates:
+            name, sep, _ = name.rpartition(".")
+            if not sep:
+                return True
+        return next(self._counters[name]) % self.rates[name] == 0
+
+
+def get_logger(category: str) -> logging.Logger:
+    """Retrieves the logger of a category.
+
+    Args:
+        category (str): One of CATEGORIES.
+
+    Returns:
+        logging.Logger: Logger named `cerbottana.{category}`.
+    """
+    return logging.getLogger(f"cerbottana.{category}")
+
+
+def setup_logging(
+    level: str = "INFO",
+    *,
+    levels: dict[str, str] | None = None,
+    sampling: dict[str, int] | None = None,
+) -> QueueListener:
+    """Configures the `cerbottana` loggers.
+
+    Records are pushed to a queue and written to stderr by a separate thread, so a slow
+    log driver never blocks the event loop.
+
+    Args:
+        level (str): Default level for every category. Defaults to "INFO".
+        levels (dict[str, str] | None): Per-category levels, e.g.
+            `{"protocol": "DEBUG"}` to dump the traffic in both directions. Defaults to
+            None.
+        sampling (dict[str, int] | None): Per-category sampling rates, e.g.
+            `{"protocol.in": 10}` to only log one received frame every ten. Defaults to
+            None.
+
+    Returns:
+        QueueListener: Already started listener, it should be stopped on shutdown to
+            flush the remaining records.
+    """
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+
+    root = logging.getLogger("cerbottana")
+    root.setLevel(level.upper())
+    root.propagate = False
+    queue_handler = QueueHandler(log_queue)
+    # Logger filters are skipped by records propagated from child loggers, unlike
+    # handler filters
+    if sampling:
+        queue_handler.addFilter(SamplingFilter(sampling))
+    root.handlers = [queue_handler]
+
+    # Wire-level dumps are only enabled on demand
+    get_logger("protocol").setLevel(max(root.level, logging.INFO))
+
+    for category, category_level in (levels or {}).items():
+        get_logger(category).setLevel(category_level.upper())
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
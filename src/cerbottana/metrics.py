@@ -0,0 +1,371 @@
+import asyncio
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Callable, Coroutine
+from functools import wraps
+from time import perf_counter
+from typing import TYPE_CHECKING, ClassVar, Protocol
+
+from aiohttp import web
+
+from cerbottana.log import get_logger
+
+if TYPE_CHECKING:
+    from cerbottana.connection import Connection
+
+logger = get_logger("connection")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from a fast handler to a slow command or database session
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (k, v.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for k, v in labels.items()
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(value)
+
+
+class Value:
+    """Value of a counter or a gauge."""
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value: float = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class HistogramValue:
+    """Value of a histogram, observations are counted in non-cumulative buckets."""
+
+    __slots__ = ("_buckets", "_upper_bounds", "sum")
+
+    def __init__(self, upper_bounds: tuple[float, ...]) -> None:
+        self._upper_bounds = upper_bounds
+        self._buckets = [0] * (len(upper_bounds) + 1)  # the last bucket is +Inf
+        self.sum: float = 0
+
+    @property
+    def count(self) -> int:
+        return sum(self._buckets)
+
+    def observe(self, value: float) -> None:
+        self._buckets[bisect_left(self._upper_bounds, value)] += 1
+        self.sum += value
+
+    def cumulative_buckets(self) -> list[tuple[float, int]]:
+        buckets = []
+        total = 0
+        for upper_bound, count in zip(
+            (*self._upper_bounds, float("inf")), self._buckets, strict=True
+        ):
+            total += count
+            buckets.append((upper_bound, total))
+        return buckets
+
+
+class Renderable(Protocol):
+    def render(self) -> list[str]: ...
+
+
+registry: list[Renderable] = []
+
+
+class Metric[V](ABC):
+    """Base class for metrics, a set of values identified by their labels.
+
+    Hot paths should call `labels` once and keep the returned value around, so that
+    updating it doesn't need any lookup. Metrics are added to `registry`, rendered by
+    `render_all`, unless a different list is passed, e.g. by tests.
+
+    Attributes:
+        name (str): Metric name.
+        documentation (str): Help text.
+        labelnames (tuple[str, ...]): Label names, in the order `labels` expects them.
+    """
+
+    type: ClassVar[str]
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        *,
+        registry: list[Renderable] = registry,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], V] = {}
+        registry.append(self)
+
+    @abstractmethod
+    def _new_value(self) -> V: ...
+
+    @abstractmethod
+    def _samples(self, value: V) -> list[tuple[str, dict[str, str], float]]: ...
+
+    def labels(self, *labelvalues: str) -> V:
+        """Retrieves the value associated with a set of labels, creating it if needed.
+
+        Args:
+            *labelvalues (str): One value for each label name.
+
+        Raises:
+            ValueError: If the number of values doesn't match the label names.
+
+        Returns:
+            V: Value to update.
+        """
+        try:
+            return self._values[labelvalues]
+        except KeyError:
+            if len(labelvalues) != len(self.labelnames):
+                err = f"{self.name} expects labels {self.labelnames}"
+                raise ValueError(err) from None
+            value = self._values[labelvalues] = self._new_value()
+            return value
+
+    def clear(self) -> None:
+        """Drops every value, e.g. to remove labels that no longer exist."""
+        self._values.clear()
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for labelvalues, value in self._values.items():
+            labels = dict(zip(self.labelnames, labelvalues, strict=True))
+            for suffix, extra_labels, sample in self._samples(value):
+                lines.append(
+                    f"{self.name}{suffix}{_format_labels(labels | extra_labels)} "
+                    f"{_format_value(sample)}"
+                )
+        return lines
+
+
+class Counter(Metric[Value]):
+    type = "counter"
+
+    def _new_value(self) -> Value:
+        return Value()
+
+    def _samples(self, value: Value) -> list[tuple[str, dict[str, str], float]]:
+        return [("", {}, value.value)]
+
+
+class Gauge(Metric[Value]):
+    type = "gauge"
+
+    def _new_value(self) -> Value:
+        return Value()
+
+    def _samples(self, value: Value) -> list[tuple[str, dict[str, str], float]]:
+        return [("", {}, value.value)]
+
+
+class Histogram(Metric[HistogramValue]):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        *,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        registry: list[Renderable] = registry,
+    ) -> None:
+        super().__init__(name, documentation, labelnames, registry=registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_value(self) -> HistogramValue:
+        return HistogramValue(self.buckets)
+
+    def _samples(
+        self, value: HistogramValue
+    ) -> list[tuple[str, dict[str, str], float]]:
+        samples: list[tuple[str, dict[str, str], float]] = [
+            ("_bucket", {"le": _format_value(upper_bound)}, count)
+            for upper_bound, count in value.cumulative_buckets()
+        ]
+        samples.append(("_sum", {}, value.sum))
+        samples.append(("_count", {}, value.count))
+        return samples
+
+
+def render_all(registry: list[Renderable] = registry) -> str:
+    """Renders every metric in the Prometheus text exposition format.
+
+    Args:
+        registry (list[Renderable]): Metrics to render. Defaults to the metrics of
+            the bot.
+
+    Returns:
+        str: Exposition text.
+    """
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Wrapped function -> description, used by the watchdog to attribute blocking calls
+activities: dict[object, str] = {}
+
+
+def timed[**P](
+    histogram_value: HistogramValue,
+    func: Callable[P, Coroutine[None, None, None]],
+    *,
+    activity: str,
+) -> Callable[P, Coroutine[None, None, None]]:
+    """Wraps a coroutine function, observing how long each call takes.
+
+    Args:
+        histogram_value (HistogramValue): Where to record the durations.
+        func (Callable[P, Coroutine[None, None, None]]): Function to wrap.
+        activity (str): Description of the function, e.g. "command help".
+
+    Returns:
+        Callable[P, Coroutine[None, None, None]]: Wrapped function.
+    """
+    activities[func] = activity
+
+    @wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> None:
+        start = perf_counter()
+        try:
+            await func(*args, **kwargs)
+        finally:
+            histogram_value.observe(perf_counter() - start)
+
+    return wrapper
+
+
+frames_received = Counter(
+    "cerbottana_frames_received_total", "Frames received from the websocket."
+)
+lines_received = Counter(
+    "cerbottana_lines_received_total", "Protocol lines received from the websocket."
+)
+reconnects = Counter(
+    "cerbottana_reconnects_total", "Times the websocket connection was closed."
+)
+handler_latency = Histogram(
+    "cerbottana_handler_seconds", "Time spent in protocol handlers.", ("handler",)
+)
+command_latency = Histogram(
+    "cerbottana_command_seconds", "Time spent in chat commands.", ("command",)
+)
+outbound_wait = Histogram(
+    "cerbottana_outbound_wait_seconds",
+    "Time outbound messages spend in the queue.",
+    ("priority",),
+)
+db_session_time = Histogram(
+    "cerbottana_db_session_seconds", "Lifetime of database sessions.", ("database",)
+)
+room_queue_depth = Gauge(
+    "cerbottana_room_queue_depth",
+    "Protocol messages waiting in a room.",
+    ("account", "room"),
+)
+outbound_queue_depth = Gauge(
+    "cerbottana_outbound_queue_depth",
+    "Outbound messages waiting to be sent.",
+    ("account", "priority"),
+)
+running_tasks = Gauge(
+    "cerbottana_running_tasks", "Tasks tracked by the connection.", ("account",)
+)
+loop_lag = Histogram("cerbottana_loop_lag_seconds", "Event loop scheduling delay.")
+loop_blocked = Histogram(
+    "cerbottana_loop_blocked_seconds",
+    "Event loop steps blocking longer than the watchdog threshold.",
+    ("activity",),
+)
+
+
+def collect(conns: list[Connection]) -> None:
+    """Updates the gauges that are only sampled when metrics are scraped.
+
+    Args:
+        conns (list[Connection]): Connections to inspect, labelled by username.
+    """
+    room_queue_depth.clear()
+    for conn in conns:
+        account = conn.username
+        for room in conn.rooms.values():
+            room_queue_depth.labels(account, room.roomid).set(room.queue_depth)
+
+        for priority in conn.outbound.stats:
+            outbound_queue_depth.labels(account, priority.name.lower()).set(
+                conn.outbound.queue_depth(priority)
+            )
+
+        running_tasks.labels(account).set(len(conn.running_tasks))
+
+
+async def serve_metrics(conns: list[Connection], *, host: str, port: int) -> None:
+    """Serves `/metrics` in the Prometheus text format until cancelled.
+
+    Args:
+        conns (list[Connection]): Connections to report on.
+        host (str): Listening host.
+        port (int): Listening port.
+    """
+
+    async def metrics_handler(request: web.Request) -> web.Response:  # noqa: ARG001
+        collect(conns)
+        return web.Response(
+            body=render_all().encode(), headers={"Content-Type": CONTENT_TYPE}
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_handler)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+        logger.info("Serving metrics on %s:%d", host, port)
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -7,6 +7,7 @@ from domify.base_element import BaseElement
 from pokedex import Language
 
 from cerbottana import utils
+from cerbottana.outbound import MULTILINE_LIMIT
 
 if TYPE_CHECKING:
     from cerbottana.models.room import Room
@@ -27,6 +28,8 @@ class RawMessage:
         language (Language): Pokedex enum for language.
     """
 
+    __slots__ = ("conn", "message", "room", "user")
+
     def __init__(self, room: Room | None, user: User, message: str) -> None:
         # Core attributes
         # Note: `self.conn` should become a property if it's not treated a singleton
@@ -62,6 +65,28 @@ class RawMessage:
         else:
             await self.room.send(message, escape)
 
+    async def reply_batch(
+        self,
+        messages: list[str],
+        escape: bool = True,
+        *,
+        max_lines: int = MULTILINE_LIMIT,
+    ) -> None:
+        """Sends several text messages to a room or in PM to a user, depending on the
+        context. Messages sent to a room are batched in as few frames as possible.
+
+        Args:
+            messages (list[str]): Texts to be sent.
+            escape (bool): True if PS commands should be escaped. Defaults to True.
+            max_lines (int): Maximum number of lines in a frame, see Room.send_batch.
+                Defaults to MULTILINE_LIMIT.
+        """
+        if self.room is None:
+            for message in messages:
+                await self.user.send(message, escape)
+        else:
+            await self.room.send_batch(messages, escape, max_lines=max_lines)
+
     async def reply_htmlbox(
         self,
         message: BaseElement,
@@ -120,6 +145,8 @@ class Message(RawMessage):
         language (Language): Pokedex enum for language.
     """
 
+    __slots__ = ("_arg", "_args", "_parametrized_room")
+
     def __init__(self, room: Room | None, user: User, message: str) -> None:
         super().__init__(room, user, message)
 
@@ -129,13 +156,24 @@ class Message(RawMessage):
         self._parametrized_room: Room | None = None
 
     @property
-    def args(self) -> list[str]:
-        # Special case to preserve msg.arg's truth.
-        # An empty string (False) would be translated to [""] (True).
-        if not self.arg:
-            return []
+    def arg(self) -> str:
+        return self._arg
+
+    @arg.setter
+    def arg(self, new: str) -> None:
+        self._arg = new
+        self._args: list[str] | None = None  # split lazily by self.args
 
-        return [word.strip() for word in self.arg.split(",")]
+    @property
+    def args(self) -> list[str]:
+        if self._args is None:
+            # Special case to preserve msg.arg's truth.
+            # An empty string (False) would be translated to [""] (True).
+            if not self._arg:
+                self._args = []
+            else:
+                self._args = [word.strip() for word in self._arg.split(",")]
+        return self._args
 
     @args.setter
     def args(self, new: list[str]) -> None:
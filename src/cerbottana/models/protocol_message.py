@@ -1,12 +1,16 @@
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from cerbottana.frame_parser import ProtocolLine
     from cerbottana.models.room import Room
 
 
 class ProtocolMessage:
     """Message sent from the Pokemon Showdown server.
 
+    The message is split only once, `params` should not be modified by handlers since
+    it is shared between them.
+
     Attributes:
         conn (Connection): Used to access the websocket.
         room: (Room): Room in which the message was sent to.
@@ -15,19 +19,34 @@ class ProtocolMessage:
         params (list[str]): Parameters of the received message.
     """
 
-    def __init__(self, room: Room, msg: str) -> None:
+    __slots__ = ("conn", "msg", "params", "room", "type")
+
+    def __init__(
+        self,
+        room: Room,
+        msg: str,
+        *,
+        type_: str | None = None,
+        params: list[str] | None = None,
+    ) -> None:
         self.conn = room.conn
         self.room = room
         self.msg = msg
-
-    @property
-    def _args(self) -> list[str]:
-        return self.msg.split("|")
-
-    @property
-    def type(self) -> str:
-        return self._args[0]
-
-    @property
-    def params(self) -> list[str]:
-        return self._args[1:]
+        if type_ is None or params is None:
+            type_, sep, rest = msg.partition("|")
+            params = rest.split("|") if sep else []
+        self.type = type_
+        self.params = params
+
+    @classmethod
+    def from_line(cls, room: Room, line: ProtocolLine) -> ProtocolMessage:
+        """Builds a message from a line already parsed by `frame_parser.parse_frame`.
+
+        Args:
+            room (Room): Room in which the message was sent to.
+            line (ProtocolLine): Parsed protocol line.
+
+        Returns:
+            ProtocolMessage: New instance, sharing the already split parameters.
+        """
+        return cls(room, line.msg, type_=line.type, params=line.params)
@@ -3,6 +3,7 @@
 
 import asyncio
 from collections import deque
+from collections.abc import Iterable
 from textwrap import shorten
 from typing import TYPE_CHECKING
 from weakref import WeakKeyDictionary, WeakValueDictionary
@@ -14,10 +15,12 @@ from pokedex import Language, set_context
 from cerbottana import utils
 from cerbottana.models.attributes import AttributeMapping
 from cerbottana.models.protocol_message import ProtocolMessage
+from cerbottana.outbound import MULTILINE_LIMIT, Priority
 from cerbottana.typedefs import RoomId
 
 if TYPE_CHECKING:
     from cerbottana.connection import Connection
+    from cerbottana.handlers import HandlerFunc, Lane
     from cerbottana.models.user import User
 
 
@@ -29,6 +32,7 @@ class Room:
     Attributes:
         conn (Connection): Used to access the websocket.
         roomid (RoomId): Uniquely identifies a room, see utils.to_room_id.
+        is_joined (bool): True if the bot is in the room, i.e. it is in conn.rooms.
         is_private (bool): True if room is unlisted/private.
         buffer (deque[str]): Fixed list of the last room messages.
         language_name (str): Room language.
@@ -57,19 +61,32 @@ class Room:
         # Attributes initialized through handlers
         self.dynamic_buffer: deque[str] = deque(maxlen=20)
         self.language_name = "English"
-        self.roombot = False
         self.title = ""
+        self._roombot = False
 
         # Attributes updated within this instance
         self._users: dict[User, str] = {}  # user, rank
-        self._message_queue: asyncio.Queue[ProtocolMessage]
+        # One queue per lane, only while messages are being processed
+        self._message_queues: dict[
+            Lane, asyncio.Queue[tuple[HandlerFunc, ProtocolMessage]]
+        ] = {}
+
+        self._attributes: AttributeMapping | None = None  # created on first use
 
-        self.attributes = AttributeMapping()
+    @property
+    def attributes(self) -> AttributeMapping:
+        if self._attributes is None:
+            self._attributes = AttributeMapping()
+        return self._attributes
 
     @property
     def buffer(self) -> deque[str]:
         return self.dynamic_buffer.copy()
 
+    @property
+    def is_joined(self) -> bool:
+        return self.conn.rooms.get(self.roomid) is self
+
     @property
     def is_private(self) -> bool:
         return self.roomid not in self.conn.public_roomids
@@ -82,10 +99,26 @@ class Room:
     def language(self) -> Language:
         return utils.get_language(self.language_name) or Language.get_default()
 
+    @property
+    def roombot(self) -> bool:
+        return self._roombot
+
+    @roombot.setter
+    def roombot(self, roombot: bool) -> None:
+        self._roombot = roombot
+        if roombot and self.is_joined:
+            self.conn.roombot_rooms.add(self)
+        else:
+            self.conn.roombot_rooms.discard(self)
+
     @property
     def users(self) -> dict[User, str]:
         return self._users
 
+    @property
+    def queue_depth(self) -> int:
+        return sum(queue.qsize() for queue in self._message_queues.values())
+
     @property
     def webhook(self) -> str | None:
         return self.conn.webhooks.get(self.roomid)
@@ -100,6 +133,8 @@ class Room:
         if not rank:
             rank = self._users.get(user, " ")
         self._users[user] = rank
+        if self.is_joined:
+            self.conn.user_rooms.setdefault(user.userid, set()).add(self)
 
     def remove_user(self, user: User) -> None:
         """Removes a user from a room.
@@ -111,6 +146,30 @@ class Room:
         """
         if user in self._users:
             self._users.pop(user)
+            self._unindex_user(user)
+
+    def join(self) -> None:
+        """Adds the room to conn.rooms, when the bot joins it.
+
+        The userlist is reset, since it is always followed by a full `|users|` list.
+        """
+        self.leave()
+        self.conn.rooms[self.roomid] = self
+
+    def leave(self) -> None:
+        """Removes the room from conn.rooms and drops its userlist."""
+        for user in self._users:
+            self._unindex_user(user)
+        self._users.clear()
+        self.roombot = False
+        if self.is_joined:
+            del self.conn.rooms[self.roomid]
+
+    def _unindex_user(self, user: User) -> None:
+        if (rooms := self.conn.user_rooms.get(user.userid)) is not None:
+            rooms.discard(self)
+            if not rooms:
+                del self.conn.user_rooms[user.userid]
 
     def __str__(self) -> str:
         return self.roomid
@@ -119,43 +178,85 @@ class Room:
         return user in self.users
 
     def add_message_to_queue(self, msg: ProtocolMessage) -> None:
-        if not hasattr(self, "_message_queue"):
-            self._message_queue = asyncio.Queue()
-            self.conn.create_task(self._process_message_queue())
-        self._message_queue.put_nowait(msg)
+        """Queues a message in the lanes of its handlers, see `handlers.Lane`.
+
+        Args:
+            msg (ProtocolMessage): Message to process.
+        """
+        for lane, dispatch in self.conn.dispatch_table.get(msg.type, {}).items():
+            if (queue := self._message_queues.get(lane)) is None:
+                queue = self._message_queues[lane] = asyncio.Queue()
+                self.conn.create_task(self._process_message_queue(lane))
+            queue.put_nowait((dispatch, msg))
 
     async def process_all_messages(self) -> None:
-        if hasattr(self, "_message_queue"):
-            await self._message_queue.join()
+        for queue in list(self._message_queues.values()):
+            await queue.join()
 
-    async def _process_message_queue(self) -> None:
+    async def _process_message_queue(self, lane: Lane) -> None:
         set_context(self.language)
+        queue = self._message_queues[lane]
         try:
-            while msg := self._message_queue.get_nowait():
-                if msg.type in self.conn.handlers:
-                    async with asyncio.TaskGroup() as tg:
-                        for handler in self.conn.handlers[msg.type]:
-                            tg.create_task(handler.callback(msg))
-                self._message_queue.task_done()
+            while item := queue.get_nowait():
+                dispatch, msg = item
+                await dispatch(msg)
+                queue.task_done()
         except asyncio.QueueEmpty:
-            del self._message_queue
+            del self._message_queues[lane]
         except asyncio.CancelledError:
-            del self._message_queue
+            del self._message_queues[lane]
             raise
 
-    async def send(self, message: str, escape: bool = True) -> None:
+    async def send(
+        self,
+        message: str,
+        escape: bool = True,
+        *,
+        priority: Priority = Priority.COMMAND,
+    ) -> None:
         """Sends a message to the room.
 
         Args:
             message (str): Text to be sent.
             escape (bool): True if PS commands should be escaped. Defaults to True.
+            priority (Priority): Outbound lane. Defaults to Priority.COMMAND.
         """
         if escape:
-            if message[0] == "/":
-                message = "/" + message
-            elif message[0] == "!":
-                message = " " + message
-        await self.conn.send(f"{self.roomid}|{message}")
+            message = self._escape(message)
+        await self.conn.send(f"{self.roomid}|{message}", priority=priority)
+
+    async def send_batch(
+        self,
+        messages: Iterable[str],
+        escape: bool = True,
+        *,
+        max_lines: int = MULTILINE_LIMIT,
+        priority: Priority = Priority.COMMAND,
+    ) -> None:
+        """Sends several messages to the room, batching them in as few frames as
+        possible.
+
+        Args:
+            messages (Iterable[str]): Texts to be sent, one per line.
+            escape (bool): True if PS commands should be escaped. Defaults to True.
+            max_lines (int): Maximum number of lines in a frame. Pokemon Showdown
+                accepts more lines from room staff, see MULTILINE_LIMIT_STAFF. Defaults
+                to MULTILINE_LIMIT.
+            priority (Priority): Outbound lane. Defaults to Priority.COMMAND.
+        """
+        if escape:
+            messages = [self._escape(message) for message in messages]
+        await self.conn.send_batch(
+            self.roomid, messages, max_lines=max_lines, priority=priority
+        )
+
+    @staticmethod
+    def _escape(message: str) -> str:
+        if message[0] == "/":
+            return "/" + message
+        if message[0] == "!":
+            return " " + message
+        return message
 
     async def send_rankhtmlbox(
         self,
@@ -235,7 +336,22 @@ class Room:
         arg = f"[{action}] {user.userid}"
         if note:
             arg += f": {note}"
-        await self.send(f"/modnote {shorten(arg, 300)}", False)
+        await self.send(
+            f"/modnote {shorten(arg, 300)}", False, priority=Priority.MODERATION
+        )
+
+    @classmethod
+    def get_all(cls, conn: Connection) -> list[Room]:
+        """Retrieves every Room instance that is still alive, including rooms the bot
+        has not joined.
+
+        Args:
+            conn (Connection): Used to access the websocket.
+
+        Returns:
+            list[Room]: Room instances.
+        """
+        return list(cls._instances.get(conn, {}).values())
 
     @classmethod
     def get(cls, conn: Connection, room: str) -> Room:
@@ -9,6 +9,7 @@ from domify.base_element import BaseElement
 from cerbottana import utils
 from cerbottana.models.attributes import AttributeMapping
 from cerbottana.plugins import htmlpages
+from cerbottana.ranks import rank_order
 from cerbottana.typedefs import Role, UserId
 
 if TYPE_CHECKING:
@@ -49,7 +50,25 @@ class User:
         self.userstring = userstring
         self.global_rank: str = " "
 
-        self.attributes = AttributeMapping()
+        self._attributes: AttributeMapping | None = None  # created on first use
+
+    @property
+    def attributes(self) -> AttributeMapping:
+        if self._attributes is None:
+            self._attributes = AttributeMapping()
+        return self._attributes
+
+    @property
+    def userstring(self) -> str:
+        return self._userstring
+
+    @userstring.setter
+    def userstring(self, userstring: str) -> None:
+        self._userstring = userstring
+        # The userid is used by every hash and equality check, e.g. `user in room`, so
+        # it is only computed when the userstring changes
+        self._userid = utils.to_user_id(userstring)
+        self._hash = hash(self._userid)
 
     @property
     def username(self) -> str:
@@ -57,7 +76,7 @@ class User:
 
     @property
     def userid(self) -> UserId:
-        return utils.to_user_id(self.userstring)
+        return self._userid
 
     @property
     def idle(self) -> bool:
@@ -65,21 +84,30 @@ class User:
 
     @property
     def rooms(self) -> set[Room]:
-        return {room for room in self.conn.rooms.values() if self in room}
+        return set(self.conn.user_rooms.get(self.userid, ()))
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, User):
             raise NotImplementedError
-        return self.userid == other.userid
+        return self._userid == other._userid
 
     def __hash__(self) -> int:
-        return hash(self.userid)
+        return self._hash
 
     def __str__(self) -> str:
         return self.username
 
-    async def load_details(self) -> None:
-        await self.conn.send(f"|/cmd userdetails {self.userid}")
+    def load_details(
+        self, room: Room | None = None, rank_symbol: str | None = None
+    ) -> None:
+        """Loads the user ranks, see `UserdetailsScheduler.request`.
+
+        Args:
+            room (Room | None): Room the user was seen in. Defaults to None.
+            rank_symbol (str | None): Symbol shown next to the user in `room`.
+                Defaults to None.
+        """
+        self.conn.userdetails.request(self, room, rank_symbol)
 
     def rank(self, room: Room, consider_global: bool = False) -> str | None:
         """Retrieves user's rank.
@@ -93,31 +121,10 @@ class User:
             str | None: Returns rank string, None if consider_global is False and user
                 is not in room.
         """
-        rank_orders = {
-            "~": 101,
-            "#": 102,
-            "&": 103,
-            "★": 104,
-            "@": 105,
-            "%": 106,
-            "§": 107,
-            # unrecognized symbols
-            "*": 109,
-            "☆": 110,
-            "+": 200,
-            " ": 201,
-            "!": 301,
-            "✖": 302,
-            "‽": 303,
-            None: 401,
-        }
-        default_rank = 108
-
         rank_: str | None = self.global_rank if consider_global else None
-        if self in room:
-            rank_ = min(
-                rank_, room.users[self], key=lambda x: rank_orders.get(x, default_rank)
-            )
+        room_rank = room.users.get(self)
+        if room_rank is not None and rank_order(room_rank) < rank_order(rank_):
+            rank_ = room_rank
 
         return rank_
 
@@ -162,7 +169,8 @@ class User:
         Returns:
             Room | None: Valid room, None if no room satisfies the conditions.
         """
-        return next((room for room in self.rooms if room.roombot), None)
+        rooms = self.conn.user_rooms.get(self.userid, set())
+        return next((room for room in self.conn.roombot_rooms if room in rooms), None)
 
     async def send(self, message: str, escape: bool = True) -> None:
         """Sends a PM to user.
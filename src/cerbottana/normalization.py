@@ -0,0 +1,119 @@
+import re
+import unicodedata
+from functools import lru_cache
+from string import ascii_lowercase, digits
+
+from pokedex import Language
+
+from cerbottana.typedefs import RoomId, UserId
+
+# Identifiers are normalized on nearly every message and command, and the same few
+# usernames and roomids come up over and over again: results are cached, and ASCII
+# strings, i.e. most of them, are filtered with `bytes.translate` instead of a regex.
+
+
+def _deleted_bytes(allowed: str) -> bytes:
+    return bytes(c for c in range(128) if chr(c) not in allowed)
+
+
+_NON_ID_BYTES = _deleted_bytes(ascii_lowercase + digits)
+_NON_ID_RE = re.compile(r"[^a-z0-9]")
+_NON_ROOM_ID_BYTES = _deleted_bytes(ascii_lowercase + digits + "-")
+_NON_ROOM_ID_RE = re.compile(r"[^a-z0-9-]")
+_NON_LETTER_BYTES = _deleted_bytes(ascii_lowercase)
+_NON_LETTER_RE = re.compile(r"[^a-z]")
+
+CACHE_SIZE = 4096
+
+LANGUAGES = {
+    "jp": Language.JAPANESE_KANA,
+    "japanese": Language.JAPANESE_KANA,
+    "kana": Language.JAPANESE_KANA,
+    "jpkana": Language.JAPANESE_KANA,
+    "japanesekana": Language.JAPANESE_KANA,
+    "kanji": Language.JAPANESE_KANJI,
+    "jpkanji": Language.JAPANESE_KANJI,
+    "japanesekanji": Language.JAPANESE_KANJI,
+    "fr": Language.FRENCH,
+    "french": Language.FRENCH,
+    "de": Language.GERMAN,
+    "german": Language.GERMAN,
+    "es": Language.SPANISH,
+    "spanish": Language.SPANISH,
+    "it": Language.ITALIAN,
+    "italian": Language.ITALIAN,
+    "en": Language.ENGLISH,
+    "english": Language.ENGLISH,
+    "ko": Language.KOREAN,
+    "korean": Language.KOREAN,
+    "zh": Language.CHINESE_SIMPLIFIED,
+    "chinese": Language.CHINESE_SIMPLIFIED,
+    "zhsimp": Language.CHINESE_SIMPLIFIED,
+    "chinesesimplified": Language.CHINESE_SIMPLIFIED,
+    "zhtrad": Language.CHINESE_TRADITIONAL,
+    "chinesetraditional": Language.CHINESE_TRADITIONAL,
+    "eslatam": Language.SPANISH_LATAM,
+    "spanishlatam": Language.SPANISH_LATAM,
+    "eslatinamerica": Language.SPANISH_LATAM,
+    "spanishlatinamerica": Language.SPANISH_LATAM,
+}
+
+LANGUAGE_IDS = {
+    # "japanese": 1,
+    # "traditionalchinese": 4,
+    "fr": 5,
+    "french": 5,
+    "de": 6,
+    "german": 6,
+    "es": 7,
+    "spanish": 7,
+    "it": 8,
+    "italian": 8,
+    "en": 9,
+    "english": 9,
+    # "simplifiedchinese": 12,
+}
+
+
+def _filter(text: str, deleted_bytes: bytes, deleted_re: re.Pattern[str]) -> str:
+    # `text` is already lowercased: some non-ASCII characters become ASCII, e.g. the
+    # Kelvin sign
+    if text.isascii():
+        return text.encode("ascii").translate(None, deleted_bytes).decode("ascii")
+    return deleted_re.sub("", text)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def to_id(text: str) -> str:
+    return _filter(text.lower(), _NON_ID_BYTES, _NON_ID_RE)
+
+
+def to_user_id(user: str) -> UserId:
+    return UserId(to_id(user))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _to_room_id(room: str) -> str:
+    return _filter(room.lower(), _NON_ROOM_ID_BYTES, _NON_ROOM_ID_RE)
+
+
+def to_room_id(room: str, fallback: RoomId = RoomId("lobby")) -> RoomId:
+    return RoomId(_to_room_id(room) or fallback)
+
+
+def remove_diacritics(text: str) -> str:
+    # NFKD leaves ASCII strings unchanged
+    if text.isascii():
+        return text
+    return "".join(
+        [c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c)]
+    )
+
+
+def get_language(language_name: str) -> Language | None:
+    language_name = _filter(language_name.lower(), _NON_LETTER_BYTES, _NON_LETTER_RE)
+    return LANGUAGES.get(language_name)
+
+
+def get_language_id(language_name: str, *, fallback: int = 9) -> int:
+    return LANGUAGE_IDS.get(to_id(language_name), fallback)
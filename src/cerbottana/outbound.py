@@ -0,0 +1,172 @@
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from dataclasses import dataclass
+from enum import IntEnum
+from time import monotonic
+
+from cerbottana import metrics
+
+# Maximum number of lines Pokemon Showdown accepts in a single message, for regular
+# users and for room staff
+MULTILINE_LIMIT = 3
+MULTILINE_LIMIT_STAFF = 6
+
+
+class Priority(IntEnum):
+    """Outbound lanes, in the order they are drained."""
+
+    MODERATION = 0
+    COMMAND = 1
+    BACKGROUND = 2
+
+
+@dataclass(slots=True)
+class LaneStats:
+    sent: int = 0
+    total_wait: float = 0
+    max_wait: float = 0
+
+    @property
+    def average_wait(self) -> float:
+        return self.total_wait / self.sent if self.sent else 0
+
+
+class OutboundScheduler:
+    """Sends messages through a token bucket, draining higher priority lanes first.
+
+    Pokemon Showdown processes at most one message every `1 / rate` seconds and
+    buffers a few more before dropping them: `burst` is the number of messages that
+    can be sent back to back before the bucket starts throttling.
+
+    Attributes:
+        rate (float): Tokens added to the bucket every second.
+        burst (int): Size of the bucket.
+        stats (dict[Priority, LaneStats]): Number of messages sent and time spent in
+            the queue, for each lane.
+    """
+
+    def __init__(
+        self, write: Callable[[str], Awaitable[None]], *, rate: float, burst: int
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.stats = {priority: LaneStats() for priority in Priority}
+        self._wait_metrics = {
+            priority: metrics.outbound_wait.labels(priority.name.lower())
+            for priority in Priority
+        }
+
+        self._write = write
+        self._tokens = float(burst)
+        self._last_refill = monotonic()
+        self._lanes: dict[Priority, deque[tuple[float, str, asyncio.Future[None]]]] = {
+            priority: deque() for priority in Priority
+        }
+        self._wakeup = asyncio.Event()
+        self._worker: asyncio.Task[None] | None = None
+
+    def queue_depth(self, priority: Priority | None = None) -> int:
+        """Counts the messages waiting to be sent.
+
+        Args:
+            priority (Priority | None): Lane to check. Defaults to None, i.e. every
+                lane.
+
+        Returns:
+            int: Number of queued messages.
+        """
+        if priority is not None:
+            return len(self._lanes[priority])
+        return sum(len(lane) for lane in self._lanes.values())
+
+    async def send(self, message: str, priority: Priority = Priority.COMMAND) -> None:
+        """Queues a message and waits until it is sent.
+
+        Cancelling the caller removes the message from the queue.
+
+        Args:
+            message (str): Raw message.
+            priority (Priority): Lane to use. Defaults to Priority.COMMAND.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._lanes[priority].append((monotonic(), message, future))
+        self._wakeup.set()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        await future
+
+    def clear(self) -> None:
+        """Drops every queued message."""
+        for lane in self._lanes.values():
+            while lane:
+                _, _, future = lane.popleft()
+                if not future.done():
+                    future.set_result(None)
+
+    async def close(self) -> None:
+        """Drops every queued message and stops the worker, e.g. when the connection is
+        closed. It is started again by the next `send`.
+        """
+        self.clear()
+        if self._worker is not None:
+            self._worker.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._worker
+            self._worker = None
+
+    async def _run(self) -> None:
+        while True:
+            if not self.queue_depth():
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            await self._acquire_token()
+
+            # Pick the message only once a token is available, so that messages queued
+            # while waiting can still jump ahead
+            if (queued := self._pop_next()) is None:
+                # Every queued message was cancelled, give the token back
+                self._tokens = min(self.burst, self._tokens + 1)
+                continue
+            priority, enqueued, message, future = queued
+
+            wait = monotonic() - enqueued
+            stats = self.stats[priority]
+            stats.sent += 1
+            stats.total_wait += wait
+            stats.max_wait = max(stats.max_wait, wait)
+            self._wait_metrics[priority].observe(wait)
+
+            try:
+                await self._write(message)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(None)
+
+    def _pop_next(
+        self,
+    ) -> tuple[Priority, float, str, asyncio.Future[None]] | None:
+        for priority, lane in self._lanes.items():
+            while lane:
+                enqueued, message, future = lane.popleft()
+                if not future.done():
+                    return priority, enqueued, message, future
+        return None
+
+    async def _acquire_token(self) -> None:
+        while True:
+            now = monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._last_refill) * self.rate
+            )
+            self._last_refill = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
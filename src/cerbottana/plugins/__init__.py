@@ -8,11 +8,9 @@ from pathlib import Path
 from typing import TYPE_CHECKING, ClassVar, Protocol, runtime_checkable
 
 from domify.base_element import BaseElement
-from sqlalchemy import select
 
-import cerbottana.databases.database as d
-from cerbottana import utils
-from cerbottana.database import Database
+from cerbottana import metrics, utils
+from cerbottana.custom_permissions import CustomPermissionCache
 from cerbottana.models.message import Message, RawMessage
 from cerbottana.models.room import Room
 from cerbottana.typedefs import Role, RoomId
@@ -81,14 +79,8 @@ class Command:
             if isinstance(self.required_rank_editable, str):
                 command = self.required_rank_editable
 
-            db = Database.open()
-            with db.get_session() as session:
-                stmt = select(d.CustomPermissions.required_rank).filter_by(
-                    roomid=roomid, command=command
-                )
-                custom_rank: Role | None = session.scalar(stmt)
-                if custom_rank:
-                    req_rank = custom_rank
+            if custom_rank := CustomPermissionCache.open().get(roomid, command):
+                req_rank = custom_rank
 
         if is_pm and isinstance(self.allow_pm, str):
             req_rank = self.allow_pm
@@ -213,6 +205,11 @@ def command_wrapper(
         )
         if parametrize_room:
             func = parametrize_room_wrapper(func)
+        func = metrics.timed(
+            metrics.command_latency.labels(func_name),
+            func,
+            activity=f"command {func_name}",
+        )
         return Command(
             func_name,
             func,
@@ -1,4 +1,4 @@
-from sqlalchemy import select, update
+from sqlalchemy import select
 
 import cerbottana.databases.database as d
 from cerbottana import utils
@@ -25,28 +25,22 @@ async def icon(msg: Message) -> None:
         return
 
     db = Database.open()
-    with db.get_session() as session:
-        userid = msg.user.userid
-        session.add(d.Users(userid=userid))
-        stmt = (
-            update(d.Users)
-            .filter_by(userid=userid)
-            .values(icon=utils.to_id(dex_entry["dex_name"]))
-        )
-        session.execute(stmt)
+    db.writes.upsert(
+        d.Users,
+        {"userid": msg.user.userid},
+        {"icon": utils.to_id(dex_entry["dex_name"])},
+    )
+    await db.writes.flush()
 
-        # Update the CSV file
-        stmt_csv = (
-            select(d.Users.userid, d.Users.icon)
-            .where(d.Users.icon.is_not(None))
-            .order_by(d.Users.userid)
-        )
-        with utils.get_config_file("userlist_icons.csv").open(
-            "w", encoding="utf-8"
-        ) as f:
-            f.writelines(
-                [f"{userid},{icon}\n" for userid, icon in session.execute(stmt_csv)]
-            )
+    # Update the CSV file
+    stmt_csv = (
+        select(d.Users.userid, d.Users.icon)
+        .where(d.Users.icon.is_not(None))
+        .order_by(d.Users.userid)
+    )
+    icons = await db.run(lambda session: session.execute(stmt_csv).all())
+    with utils.get_config_file("userlist_icons.csv").open("w", encoding="utf-8") as f:
+        f.writelines([f"{userid},{icon}\n" for userid, icon in icons])
 
     await msg.reply(
         "Done. Your Pokémon might take up to 24 hours to appear on the userstyle."
@@ -2,18 +2,20 @@ from collections.abc import Callable
 from typing import TYPE_CHECKING, Literal, cast
 
 from domify.base_element import BaseElement
-from sqlalchemy import String, and_, delete, literal, select, type_coerce, union
+from sqlalchemy import String, and_, literal, select, type_coerce, union
 from sqlalchemy.engine import Row
 
 import cerbottana.databases.database as d
-from cerbottana.database import Database
+from cerbottana.custom_permissions import CustomPermissionCache
 from cerbottana.html_utils import HTMLPageCommand
 from cerbottana.models.message import Message
 from cerbottana.models.room import Room
 from cerbottana.plugins import Command, command_wrapper, htmlpage_wrapper
+from cerbottana.tasks import init_task_wrapper
 from cerbottana.typedefs import Role
 
 if TYPE_CHECKING:
+    from cerbottana.connection import Connection
     from cerbottana.models.user import User
 
 
@@ -29,6 +31,11 @@ PERMISSION_ROLES = {
 }
 
 
+@init_task_wrapper(priority=4)
+async def load_custom_permissions(conn: Connection) -> None:  # noqa: ARG001
+    await CustomPermissionCache.open().load()
+
+
 @command_wrapper(required_rank="owner", parametrize_room=True)
 async def setpermission(msg: Message) -> None:
     room = msg.parametrized_room
@@ -45,19 +52,9 @@ async def setpermission(msg: Message) -> None:
         return
     rank = cast("Role | Literal['default']", rank)
 
-    db = Database.open()
-    with db.get_session() as session:
-        if rank == "default":
-            stmt = delete(d.CustomPermissions).filter_by(
-                roomid=room.roomid, command=command
-            )
-            session.execute(stmt)
-        else:
-            session.add(
-                d.CustomPermissions(
-                    roomid=room.roomid, command=command, required_rank=rank
-                )
-            )
+    await CustomPermissionCache.open().set(
+        room.roomid, command, None if rank == "default" else rank
+    )
 
     await room.send_modnote(
         "PERMISSIONS", msg.user, f"set the required rank for {command} to {rank}"
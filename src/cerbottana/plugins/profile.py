@@ -98,6 +98,7 @@ async def profile(msg: Message) -> None:
         userid = msg.user.userid
 
     db = Database.open()
+    await db.writes.flush()  # e.g. the avatar of a user who just joined
     with db.get_session() as session:
         stmt_user = select(d.Users).filter_by(userid=userid)
         userdata = session.scalar(stmt_user)
@@ -20,6 +20,8 @@ from cerbottana.models.room import Room
 from cerbottana.plugins import command_wrapper, htmlpage_wrapper
 
 if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
     from cerbottana.models.user import User
 
 
@@ -123,8 +125,7 @@ async def addquote(msg: Message) -> None:
         await msg.reply("Cosa devo salvare?")
         return
 
-    db = Database.open()
-    with db.get_session() as session:
+    def add_quote(session: Session) -> bool:
         result = d.Quotes(
             message=msg.arg,
             roomid=msg.parametrized_room.roomid,
@@ -136,14 +137,16 @@ async def addquote(msg: Message) -> None:
         try:
             session.flush()
         except IntegrityError:
-            await msg.reply("Quote già esistente.")
             session.rollback()
-        else:
-            await msg.reply("Quote salvata.")
-            if msg.room is None:
-                await msg.parametrized_room.send_modnote(
-                    "QUOTE ADDED", msg.user, msg.arg
-                )
+            return False
+        return True
+
+    if await Database.open().run(add_quote):
+        await msg.reply("Quote salvata.")
+        if msg.room is None:
+            await msg.parametrized_room.send_modnote("QUOTE ADDED", msg.user, msg.arg)
+    else:
+        await msg.reply("Quote già esistente.")
 
 
 @command_wrapper(
@@ -153,25 +156,23 @@ async def addquote(msg: Message) -> None:
     parametrize_room=True,
 )
 async def randquote(msg: Message) -> None:
-    db = Database.open()
-    with db.get_session() as session:
-        stmt = (
-            select(d.Quotes)
-            .filter_by(roomid=msg.parametrized_room.roomid)
-            .order_by(func.random())
-        )
-        if msg.arg:
-            # LIKE wildcards are supported and "*" is considered an alias for "%".
-            keyword = msg.arg.replace("*", "%")
-            stmt = stmt.where(d.Quotes.message.ilike(f"%{keyword}%"))
+    stmt = (
+        select(d.Quotes.message)
+        .filter_by(roomid=msg.parametrized_room.roomid)
+        .order_by(func.random())
+    )
+    if msg.arg:
+        # LIKE wildcards are supported and "*" is considered an alias for "%".
+        keyword = msg.arg.replace("*", "%")
+        stmt = stmt.where(d.Quotes.message.ilike(f"%{keyword}%"))
 
-        quote = session.scalar(stmt)
-        if not quote:
-            await msg.reply("Nessuna quote trovata.")
-            return
+    quote = await Database.open().run(lambda session: session.scalar(stmt))
+    if not quote:
+        await msg.reply("Nessuna quote trovata.")
+        return
 
-        html = e.RawTextNode(to_html_quotebox(quote.message))
-        await msg.reply_htmlbox(html)
+    html = e.RawTextNode(to_html_quotebox(quote))
+    await msg.reply_htmlbox(html)
 
 
 @command_wrapper(
@@ -185,19 +186,18 @@ async def removequote(msg: Message) -> None:
         await msg.reply("Che quote devo cancellare?")
         return
 
-    db = Database.open()
-    with db.get_session() as session:
-        stmt = delete(d.Quotes).filter_by(
-            message=msg.arg, roomid=msg.parametrized_room.roomid
-        )
-        if session.execute(stmt).rowcount:  # type: ignore[attr-defined]
-            await msg.reply("Quote cancellata.")
-            if msg.room is None:
-                await msg.parametrized_room.send_modnote(
-                    "QUOTE REMOVED", msg.user, msg.arg
-                )
-        else:
-            await msg.reply("Quote inesistente.")
+    stmt = delete(d.Quotes).filter_by(
+        message=msg.arg, roomid=msg.parametrized_room.roomid
+    )
+    rowcount: int = await Database.open().run(
+        lambda session: session.execute(stmt).rowcount  # type: ignore[attr-defined]
+    )
+    if rowcount:
+        await msg.reply("Quote cancellata.")
+        if msg.room is None:
+            await msg.parametrized_room.send_modnote("QUOTE REMOVED", msg.user, msg.arg)
+    else:
+        await msg.reply("Quote inesistente.")
 
 
 @command_wrapper(
@@ -211,14 +211,15 @@ async def removequoteid(msg: Message) -> None:
     if len(msg.args) != 2:
         return
 
-    db = Database.open()
-    with db.get_session() as session:
+    def remove_quote(session: Session) -> str | None:
         stmt = select(d.Quotes).filter_by(id=msg.args[0], roomid=room.roomid)
         if quote := session.scalar(stmt):
-            await msg.parametrized_room.send_modnote(
-                "QUOTE REMOVED", msg.user, quote.message
-            )
             session.delete(quote)
+            return quote.message
+        return None
+
+    if message := await Database.open().run(remove_quote):
+        await msg.parametrized_room.send_modnote("QUOTE REMOVED", msg.user, message)
 
     try:
         page = int(msg.args[1])
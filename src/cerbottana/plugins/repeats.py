@@ -14,8 +14,10 @@ from sqlalchemy import delete, select
 import cerbottana.databases.database as d
 from cerbottana.database import Database
 from cerbottana.html_utils import HTMLPageCommand
+from cerbottana.log import get_logger
 from cerbottana.models.message import Message
 from cerbottana.models.room import Room
+from cerbottana.outbound import Priority
 from cerbottana.plugins import command_wrapper, htmlpage_wrapper
 from cerbottana.tasks import init_task_wrapper
 
@@ -24,6 +26,9 @@ if TYPE_CHECKING:
     from cerbottana.models.user import User
 
 
+logger = get_logger("commands")
+
+
 # WHITELISTED_CMD: List of commands that are broadcastable in a repeat. We don't have a
 # validity check for the command syntax.
 WHITELISTED_CMD = (
@@ -86,7 +91,7 @@ class Repeat:
 
         self.task: asyncio.Task[None] | None = None
 
-        print(self)
+        logger.debug("%s", self)
 
     @property
     def expired(self) -> bool:
@@ -118,9 +123,9 @@ class Repeat:
         while not self.expired:
             start = datetime.now(UTC)
             if self.message not in self.room.buffer:  # Throttling
-                await self.room.send(self.message, False)
+                await self.room.send(self.message, False, priority=Priority.BACKGROUND)
             else:
-                print(f"Not sending {self.message}")
+                logger.debug("Not sending %s", self.message)
             sleep_interval = self.delta - (datetime.now(UTC) - start)
             await asyncio.sleep(sleep_interval.total_seconds())
 
@@ -143,7 +148,7 @@ class Repeat:
 
         if self.is_new:
             # If the task has just been created, register it into the SQL db.
-            print(f"Registering {self.message} into db.")
+            logger.debug("Registering %s into db.", self.message)
             db = Database.open()
             with db.get_session() as session:
                 session.add(
@@ -203,7 +208,7 @@ class Repeat:
                     expire_dt=parse(row.expire_dt) if row.expire_dt else None,
                 )
                 if not instance.start():
-                    print(f"Failed to start {instance.message}")
+                    logger.warning("Failed to start %s", instance.message)
 
 
 @init_task_wrapper(priority=4)
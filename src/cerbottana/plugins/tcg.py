@@ -8,10 +8,13 @@ import aiohttp
 from domify import html_elements as e
 from domify.base_element import BaseElement
 
+from cerbottana.log import get_logger
 from cerbottana.models.message import Message
 from cerbottana.plugins import command_wrapper
 from cerbottana.typedefs import JsonDict
 
+logger = get_logger("commands")
+
 
 async def query_scryfall(
     url: str, resp_type: str, *, session: aiohttp.ClientSession
@@ -34,7 +37,9 @@ async def query_scryfall(
     # API error handling
     # Check response type and trust the API that it has the required parameters.
     if json_body["object"] != resp_type:
-        print(f'Scryfall API error: Response object is "{resp_type}", expected "list"')
+        logger.error(
+            'Scryfall API error: Response object is "%s", expected "list"', resp_type
+        )
         return None
 
     return json_body
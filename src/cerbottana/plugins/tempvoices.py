@@ -2,19 +2,22 @@ import asyncio
 from datetime import UTC, datetime, timedelta
 from typing import TYPE_CHECKING
 
-from sqlalchemy import select, update
+from sqlalchemy import select
 
 import cerbottana.databases.database as d
 from cerbottana import utils
 from cerbottana.database import Database
-from cerbottana.handlers import handler_wrapper
+from cerbottana.handlers import Lane, handler_wrapper
 from cerbottana.models.message import Message
 from cerbottana.models.protocol_message import ProtocolMessage
 from cerbottana.models.room import Room
+from cerbottana.outbound import Priority
 from cerbottana.plugins import command_wrapper
 from cerbottana.tasks import background_task_wrapper
 
 if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
     from cerbottana.connection import Connection
 
 
@@ -23,9 +26,11 @@ if TYPE_CHECKING:
 )
 async def tempvoice(msg: Message) -> None:
     if msg.parametrized_room.roombot and msg.user.rank(msg.parametrized_room) == " ":
-        await msg.parametrized_room.send(f"/roomvoice {msg.user.userid}", False)
-        db = Database.open()
-        with db.get_session() as session:
+        await msg.parametrized_room.send(
+            f"/roomvoice {msg.user.userid}", False, priority=Priority.MODERATION
+        )
+
+        def add_tempvoice(session: Session) -> None:
             session.add(
                 d.TemporaryVoices(
                     roomid=msg.parametrized_room.roomid,
@@ -34,6 +39,19 @@ async def tempvoice(msg: Message) -> None:
                 )
             )
 
+        await Database.open().run(add_tempvoice)
+
+
+def _pop_old_temporary_voice(session: Session) -> tuple[str, str] | None:
+    stmt = select(d.TemporaryVoices).filter(
+        d.TemporaryVoices.date < datetime.now(UTC) - timedelta(days=30)
+    )
+    user: d.TemporaryVoices | None = session.scalar(stmt)
+    if user is None:
+        return None
+    session.delete(user)
+    return user.roomid, user.userid
+
 
 @background_task_wrapper()
 async def demote_old_temporary_voices(conn: Connection) -> None:
@@ -41,34 +59,30 @@ async def demote_old_temporary_voices(conn: Connection) -> None:
 
     db = Database.open()
     while True:
-        with db.get_session() as session:
-            stmt = select(d.TemporaryVoices).filter(
-                d.TemporaryVoices.date < datetime.now(UTC) - timedelta(days=30)
-            )
-            user: d.TemporaryVoices | None = session.scalar(stmt)
-
-            if user:
-                room = Room.get(conn, user.roomid)
-                if room.roombot:
-                    await room.send(f"/roomdeauth {user.userid}", False)
-                session.delete(user)
-                # sleep for a minute, then try to deauth another user
-                wait_time = 60
-            else:
-                # sleep for a day if there are no more users to deauth
-                wait_time = 24 * 60 * 60
+        if user := await db.run(_pop_old_temporary_voice):
+            roomid, userid = user
+            room = Room.get(conn, roomid)
+            if room.roombot:
+                await room.send(
+                    f"/roomdeauth {userid}", False, priority=Priority.MODERATION
+                )
+            # sleep for a minute, then try to deauth another user
+            wait_time = 60
+        else:
+            # sleep for a day if there are no more users to deauth
+            wait_time = 24 * 60 * 60
 
         await asyncio.sleep(wait_time)
 
 
-@handler_wrapper(["join", "j", "J", "leave", "l", "L", "name", "n", "N"])
+@handler_wrapper(
+    ["join", "j", "J", "leave", "l", "L", "name", "n", "N"], lane=Lane.MEMBERSHIP
+)
 async def join_leave_name(msg: ProtocolMessage) -> None:
-    db = Database.open()
-    with db.get_session() as session:
-        for user in msg.params:
-            stmt = (
-                update(d.TemporaryVoices)
-                .filter_by(roomid=msg.room.roomid, userid=utils.to_user_id(user))
-                .values(date=str(datetime.now(UTC)))
-            )
-            session.execute(stmt)
+    writes = Database.open().writes
+    for user in msg.params:
+        writes.update(
+            d.TemporaryVoices,
+            {"roomid": msg.room.roomid, "userid": utils.to_user_id(user)},
+            {"date": str(datetime.now(UTC))},
+        )
@@ -3,13 +3,17 @@ from datetime import UTC, datetime
 from typing import ClassVar, Literal
 
 from cerbottana.handlers import handler_wrapper
+from cerbottana.log import get_logger
 from cerbottana.models.attributes import AttributeKey
 from cerbottana.models.message import Message
 from cerbottana.models.protocol_message import ProtocolMessage
+from cerbottana.outbound import MULTILINE_LIMIT_STAFF
 from cerbottana.plugins import command_wrapper
 
 creating_custom_tour = AttributeKey(datetime)
 
+logger = get_logger("handlers")
+
 
 class Tour:
     formatid = "customgame"
@@ -69,27 +73,29 @@ class Tour:
         tournew = (
             "/tour new {formatid}, {generator}, {playercap}, {generatormod}, {name}"
         )
-        await msg.reply(
+        commands = [
             tournew.format(
                 formatid=formatid,
                 generator=generator,
                 playercap=str(playercap) if playercap else "",
                 generatormod=str(generatormod) if generatormod else "",
                 name=name,
-            ),
-            False,
-        )
+            )
+        ]
         if autostart:
-            await msg.reply(f"/tour autostart {autostart}", False)
+            commands.append(f"/tour autostart {autostart}")
         if autodq:
-            await msg.reply(f"/tour autodq {autodq}", False)
+            commands.append(f"/tour autodq {autodq}")
         if not allow_scouting:
-            await msg.reply("/tour scouting off", False)
+            commands.append("/tour scouting off")
         if forcetimer:
-            await msg.reply("/tour forcetimer on", False)
+            commands.append("/tour forcetimer on")
         if rules:
             rules_str = ",".join(rules)
-            await msg.reply(f"/tour rules {rules_str}", False)
+            commands.append(f"/tour rules {rules_str}")
+
+        # Creating tours requires the bot to be room staff
+        await msg.reply_batch(commands, False, max_lines=MULTILINE_LIMIT_STAFF)
 
 
 # --- Commands for generic tours ---
@@ -231,11 +237,8 @@ class Sibb(Tour):
 # --- Tour generation enhancements ---
 
 
-@handler_wrapper(["tournament"], required_parameters=2)  # hooked on |tournament|create|
+@handler_wrapper(["tournament|create"], required_parameters=2)
 async def tournament_create(msg: ProtocolMessage) -> None:
-    if msg.params[0] != "create":
-        return
-
     creating_dt = msg.room.attributes.get(creating_custom_tour)
     if creating_dt and (datetime.now(UTC) - creating_dt).total_seconds() < 5:
         return
@@ -243,7 +246,7 @@ async def tournament_create(msg: ProtocolMessage) -> None:
     tierid = msg.params[1].removesuffix("blitz")
     tier = msg.conn.tiers.get(tierid)
     if tier is None:
-        print(f"Unrecognized tier: '{tierid}'")
+        logger.warning("Unrecognized tier: '%s'", tierid)
         return
 
     # Show !tier info for non-random non-custom formats
@@ -258,6 +261,6 @@ async def tournament_create(msg: ProtocolMessage) -> None:
             msg.room.webhook, data={"content": alert}
         ) as resp:
             if err := await resp.text("utf-8"):
-                print(f"Error with webhook of {msg.room}:\n{err}")
+                logger.error("Error with webhook of %s:\n%s", msg.room, err)
             else:
-                print(f"Sent tour alert to webhook of {msg.room}")
+                logger.info("Sent tour alert to webhook of %s", msg.room)
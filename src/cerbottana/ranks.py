@@ -0,0 +1,89 @@
+from functools import lru_cache
+from string import ascii_letters, digits
+
+from cerbottana.typedefs import Role
+
+# Rank symbols sorted from the highest to the lowest, `rank_order` is used to compare
+# them: unrecognized symbols are ranked just below §
+RANK_ORDERS: dict[str | None, int] = {
+    "~": 101,
+    "#": 102,
+    "&": 103,
+    "★": 104,
+    "@": 105,
+    "%": 106,
+    "§": 107,
+    # unrecognized symbols
+    "*": 109,
+    "☆": 110,
+    "+": 200,
+    " ": 201,
+    "!": 301,
+    "✖": 302,
+    "‽": 303,
+    None: 401,
+}
+DEFAULT_RANK_ORDER = 108
+
+# Symbols that have a role, or a higher one
+ROLE_SYMBOLS: dict[Role, str] = {
+    "admin": "~&",
+    "sectionleader": "~&§",
+    "owner": "~&#",
+    "bot": "*",
+    "host": "★",
+    "mod": "~&§#@",
+    "driver": "~&§#@%",
+    "player": "☆",
+    "voice": "~&§#@%+",
+    "prizewinner": "^",
+}
+
+# Custom symbols are considered voice, unless they belong to one of these
+_NOT_VOICE = "*★☆^ " + ascii_letters + digits
+
+# Each role is a bit: `has_role` checks the bit of the role against the precomputed
+# mask of the roles of a symbol
+_ROLE_BITS: dict[Role, int] = {
+    role: 1 << i for i, role in enumerate([*ROLE_SYMBOLS, "regularuser", "disabled"])
+}
+
+
+def rank_order(rank: str | None) -> int:
+    """Sorts rank symbols, see RANK_ORDERS.
+
+    Args:
+        rank (str | None): Rank symbol, None if missing.
+
+    Returns:
+        int: Lower for higher ranks.
+    """
+    return RANK_ORDERS.get(rank, DEFAULT_RANK_ORDER)
+
+
+@lru_cache(maxsize=256)
+def _role_mask(symbol: str, strict_voice_check: bool) -> int:
+    mask = _ROLE_BITS["regularuser"]
+    for role, symbols in ROLE_SYMBOLS.items():
+        if symbol in symbols:
+            mask |= _ROLE_BITS[role]
+    if not strict_voice_check and symbol not in _NOT_VOICE:
+        mask |= _ROLE_BITS["voice"]
+    return mask
+
+
+def has_role(role: Role, user: str, strict_voice_check: bool = False) -> bool:
+    """Checks if a user has a PS role or higher.
+
+    Args:
+        role (Role): PS role (i.e. "voice", "driver").
+        user (str): User to check.
+        strict_voice_check (bool): True if custom rank symbols should not be
+            considered voice. Defaults to False.
+
+    Returns:
+        bool: True if user meets the required criteria.
+    """
+    if not user:
+        return False
+    return bool(_role_mask(user[0], strict_voice_check) & _ROLE_BITS[role])
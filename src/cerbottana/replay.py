@@ -0,0 +1,113 @@
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import perf_counter
+
+from cerbottana.capture import read_capture
+from cerbottana.connection import Connection
+from cerbottana.models.room import Room
+from cerbottana.outbound import Priority
+
+
+@dataclass
+class ReplayStats:
+    frames: int = 0
+    lines: int = 0
+    elapsed: float = 0
+    sent: Counter[str] = field(default_factory=Counter)
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.frames / self.elapsed if self.elapsed else 0
+
+    @property
+    def lines_per_second(self) -> float:
+        return self.lines / self.elapsed if self.elapsed else 0
+
+
+class ReplayConnection(Connection):
+    """Connection that reads its frames from a capture instead of a websocket.
+
+    Frames go through the usual `_parse_text_message` -> `Room.add_message_to_queue` ->
+    handlers path, while outbound messages are collected in `self.stats.sent` instead
+    of being sent.
+    """
+
+    def __init__(
+        self,
+        capture: Path,
+        *,
+        realtime: bool = False,
+        username: str,
+        main_room: str = "lobby",
+        command_character: str = ".",
+    ) -> None:
+        super().__init__(
+            url="",
+            username=username,
+            password="",
+            avatar="",
+            statustext="",
+            rooms=[],
+            main_room=main_room,
+            command_character=command_character,
+            base_url="",
+            webhooks={},
+        )
+        self.capture = capture
+        self.realtime = realtime
+        self.stats = ReplayStats()
+
+    async def send(
+        self,
+        message: str,
+        *,
+        priority: Priority = Priority.COMMAND,  # noqa: ARG002
+    ) -> None:
+        # Outbound messages are never throttled, they are just collected
+        self.stats.sent.update([message])
+
+    async def _start_websocket(self) -> None:
+        await self._run_init_background_tasks()
+
+        start = perf_counter()
+        first_timestamp: float | None = None
+        for timestamp, frame in read_capture(self.capture):
+            if self.realtime:
+                if first_timestamp is None:
+                    first_timestamp = timestamp
+                delay = timestamp - first_timestamp - (perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            # Never log in again with the recorded challenge
+            if frame.startswith("|challstr|"):
+                continue
+
+            self.stats.frames += 1
+            self.stats.lines += frame.count("\n") + 1
+            await self._parse_text_message(frame)
+            # Let the room queues run, as they would while waiting for the websocket
+            await asyncio.sleep(0)
+
+        for room in Room.get_all(self):
+            await room.process_all_messages()
+        self.stats.elapsed = perf_counter() - start
+
+        for task in self.running_tasks:
+            task.cancel()
+
+
+async def replay(conn: ReplayConnection) -> ReplayStats:
+    """Feeds a capture through a replay connection.
+
+    Args:
+        conn (ReplayConnection): Connection to use.
+
+    Returns:
+        ReplayStats: Number of frames and lines processed, elapsed time and messages
+            that would have been sent.
+    """
+    await conn.open_connection()
+    return conn.stats
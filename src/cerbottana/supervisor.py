@@ -0,0 +1,113 @@
+import asyncio
+from collections.abc import Iterable
+from contextlib import suppress
+
+import aiohttp
+
+from cerbottana import metrics, utils
+from cerbottana.connection import Connection
+from cerbottana.database import Database
+from cerbottana.log import get_logger
+from cerbottana.watchdog import Watchdog
+
+logger = get_logger("connection")
+
+
+class Supervisor:
+    """Runs several connections, e.g. different accounts or servers, on one event loop.
+
+    Connections share the process-wide data: the parsed data files, the pokedex cache
+    and the veekun database, which are only set up by the first connection (see
+    `init_task_wrapper`). They also share a single HTTP session. Each connection
+    writes to the database named by `Connection.database`, so several accounts can
+    either share one or keep their own.
+
+    The metrics endpoint and the watchdog are process-wide as well, and should be
+    configured here rather than on the connections. A connection raising an exception
+    is logged and dropped, without affecting the others; the metrics endpoint and the
+    watchdog are stopped once every connection is done.
+
+    Attributes:
+        connections (list[Connection]): Connections to run.
+        metrics_host (str): Interface the metrics endpoint listens on.
+        metrics_port (int | None): Port of the metrics endpoint, None to disable it.
+        watchdog (Watchdog | None): Event loop watchdog, if enabled.
+    """
+
+    def __init__(
+        self,
+        connections: Iterable[Connection],
+        *,
+        metrics_host: str = "localhost",
+        metrics_port: int | None = None,
+        watchdog_threshold: float | None = None,
+    ) -> None:
+        self.connections = list(connections)
+
+        accounts = {
+            (conn.url, utils.to_user_id(conn.username)) for conn in self.connections
+        }
+        if len(accounts) != len(self.connections):
+            err = "Every connection should use a different account or server"
+            raise ValueError(err)
+
+        self.metrics_host = metrics_host
+        self.metrics_port = metrics_port
+        self.watchdog = Watchdog(watchdog_threshold) if watchdog_threshold else None
+
+    async def run(self) -> bool:
+        """Runs every connection, until all of them are done or cancelled.
+
+        Returns:
+            bool: False if every connection crashed.
+        """
+        diagnostics_tasks: list[asyncio.Task[None]] = []
+        try:
+            async with aiohttp.ClientSession(
+                cookie_jar=aiohttp.DummyCookieJar()
+            ) as session:
+                if self.metrics_port is not None:
+                    diagnostics_tasks.append(
+                        asyncio.create_task(
+                            metrics.serve_metrics(
+                                self.connections,
+                                host=self.metrics_host,
+                                port=self.metrics_port,
+                            )
+                        )
+                    )
+                if self.watchdog is not None:
+                    diagnostics_tasks.append(asyncio.create_task(self.watchdog.run()))
+
+                async with asyncio.TaskGroup() as tg:
+                    tasks = []
+                    for conn in self.connections:
+                        conn.client_session = session
+                        logger.info("Starting %s", conn.username)
+                        tasks.append(
+                            tg.create_task(
+                                self._run_connection(conn), name=conn.username
+                            )
+                        )
+        finally:
+            # The diagnostics are only useful while some connection is running
+            for task in diagnostics_tasks:
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+            # Databases can be shared, so they are closed once every connection is done
+            for dbname in dict.fromkeys(conn.database for conn in self.connections):
+                await Database.open(dbname).close()
+
+        crashed = [task.result() for task in tasks]
+        if all(crashed):
+            logger.error("Every connection crashed")
+        return not all(crashed)
+
+    async def _run_connection(self, conn: Connection) -> bool:
+        try:
+            await conn.open_connection()
+        except Exception:
+            logger.exception("%s crashed, dropping it", conn.username)
+            return True
+        return False
@@ -1,5 +1,7 @@
+import asyncio
 import importlib
 from collections.abc import Callable, Coroutine
+from functools import wraps
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -13,14 +15,47 @@ if TYPE_CHECKING:
 init_tasks: list[tuple[int, InitTaskFunc]] = []
 
 
-def init_task_wrapper(*, priority: int = 3) -> Callable[[InitTaskFunc], InitTaskFunc]:
+def init_task_wrapper(
+    *, priority: int = 3, once: bool = False
+) -> Callable[[InitTaskFunc], InitTaskFunc]:
+    """Registers a task to run before connecting.
+
+    Args:
+        priority (int): Tasks run in ascending priority order, from 1 to 5. Defaults to
+            3.
+        once (bool): Whether the task sets up process-wide data, which is shared by
+            every connection and only needs to be done for the first one. Defaults to
+            False.
+
+    Returns:
+        Callable[[InitTaskFunc], InitTaskFunc]: Wrapper.
+    """
+
     def wrapper(func: InitTaskFunc) -> InitTaskFunc:
+        if once:
+            func = run_once(func)
         init_tasks.append((priority, func))
         return func
 
     return wrapper
 
 
+def run_once(func: InitTaskFunc) -> InitTaskFunc:
+    lock = asyncio.Lock()
+    done = False
+
+    @wraps(func)
+    async def wrapper(conn: Connection) -> None:
+        nonlocal done
+        # Connections starting together wait for the first one to finish
+        async with lock:
+            if not done:
+                await func(conn)
+                done = True
+
+    return wrapper
+
+
 background_tasks: list[BackgroundTaskFunc] = []
 
 
@@ -9,7 +9,7 @@ if TYPE_CHECKING:
     from cerbottana.connection import Connection
 
 
-@init_task_wrapper()
+@init_task_wrapper(once=True)
 async def setup_database(conn: Connection) -> None:  # noqa: ARG001
     path = utils.get_config_file("pokedex_cache")
     path.mkdir(exist_ok=True)
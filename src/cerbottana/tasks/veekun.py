@@ -1,102 +1,261 @@
 import csv
-import inspect
 import re
-from itertools import chain
+import shutil
+from collections.abc import Iterator
+from itertools import batched
 from pathlib import Path
 from typing import TYPE_CHECKING
 from zlib import crc32
 
-from sqlalchemy import func, insert, select, update
+from sqlalchemy import create_engine, delete, insert, select
 from sqlalchemy.exc import OperationalError
 
 import cerbottana.databases.veekun as v
 from cerbottana import utils
 from cerbottana.database import Database
+from cerbottana.log import get_logger
 from cerbottana.tasks import init_task_wrapper
 
 if TYPE_CHECKING:
+    from sqlalchemy import Connection as DBConnection
+
     from cerbottana.connection import Connection
 
+logger = get_logger("db")
+
+# Every table is reloaded when these files change
+SCHEMA_FILES = [
+    Path(__file__).parent.parent / x for x in ["databases/veekun.py", "tasks/veekun.py"]
+]
+CHUNK_SIZE = 5000  # rows per executemany
+# Built by `cerbottana build-veekun`, loaded when the config database is outdated
+ARTIFACT_PATH = utils.get_data_file("veekun.sqlite")
+
 
-@init_task_wrapper()
+@init_task_wrapper(once=True)
 async def csv_to_sqlite(conn: Connection) -> None:  # noqa: ARG001
-    csv_dir = Path(__file__).parent.parent / "data/veekun"
-    files = chain(
-        csv_dir.iterdir(),
-        (
-            Path(__file__).parent.parent / x
-            for x in ["databases/veekun.py", "tasks/veekun.py"]
-        ),
-    )
-    new_crc = crc32(b"")
-    for file in sorted(files):
-        new_crc = crc32(file.read_bytes(), new_crc)
+    if (
+        update_database(
+            utils.get_config_file("veekun.sqlite"),
+            utils.get_data_file("veekun"),
+            ARTIFACT_PATH,
+        )
+        is not None
+    ):
+        # Connections of the read-only profile assume the file never changes, even if
+        # no table was reloaded
+        Database.open("veekun").engine.dispose()
+
+
+def update_database(
+    db_path: Path, csv_dir: Path, artifact: Path | None = None
+) -> list[str] | None:
+    """Reloads the tables of the veekun database whose CSV file changed.
+
+    CSV files are only hashed if their size or mtime changed, and every table is
+    reloaded if the schema changed; tables whose CSV file was removed are cleared. If
+    the database is outdated but `artifact`, built by `build_artifact`, matches every
+    CSV file, it is copied instead of reloading any table. The changes are made to a
+    copy of the database, which is swapped in once it is complete.
+
+    Args:
+        db_path (Path): Path of the database.
+        csv_dir (Path): Directory with a CSV file for each table.
+        artifact (Path | None): Path of a prebuilt database. Defaults to None.
+
+    Returns:
+        list[str] | None: Names of the reloaded or cleared tables, None if the
+            database was already up-to-date. The database is replaced even if the list
+            is empty, e.g. when it is copied from `artifact`.
+    """
+    schema_crc = _schema_crc()
+    manifest = _read_manifest(db_path, schema_crc)
+    versions = _csv_versions(csv_dir, manifest)
+    if manifest == versions:
+        return None  # database is already up-to-date, skip rebuild
+
+    tmp_path = db_path.with_name(f"{db_path.name}.tmp")
+    if (
+        artifact is not None
+        and (artifact_manifest := _read_manifest(artifact, schema_crc)) is not None
+        and _crcs(artifact_manifest) == _crcs(versions)
+    ):
+        logger.info("Loading prebuilt veekun database...")
+        shutil.copyfile(artifact, tmp_path)
+        tablenames = []
+        removed: list[str] = []
+    elif manifest is None:
+        logger.info("Rebuilding veekun database...")
+        tmp_path.unlink(missing_ok=True)
+        tablenames = list(versions)
+        removed = []
+    else:
+        tablenames = [
+            name
+            for name, version in versions.items()
+            if name not in manifest or manifest[name][2] != version[2]
+        ]
+        removed = [name for name in manifest if name not in versions]
+        logger.info("Updating veekun database: %s", ", ".join([*tablenames, *removed]))
+        shutil.copyfile(db_path, tmp_path)
+
+    engine = create_engine(f"sqlite:///{tmp_path}")
+    try:
+        with engine.begin() as connection:
+            # The copy is only swapped in once it is complete, so there's nothing to
+            # recover after a crash
+            connection.exec_driver_sql("PRAGMA journal_mode = OFF")
+            connection.exec_driver_sql("PRAGMA synchronous = OFF")
+
+            if manifest is None:
+                v.Base.metadata.create_all(connection)
+            for tablename in tablenames:
+                _load_table(connection, tablename, csv_dir / f"{tablename}.csv")
+            for tablename in removed:
+                connection.execute(delete(v.Base.metadata.tables[tablename]))
+
+            connection.execute(delete(v.TableVersions))
+            if versions:
+                connection.execute(
+                    insert(v.TableVersions),
+                    [
+                        {"tablename": name, "size": size, "mtime_ns": mtime, "crc": crc}
+                        for name, (size, mtime, crc) in versions.items()
+                    ],
+                )
+            connection.execute(delete(v.LatestVersion))
+            connection.execute(insert(v.LatestVersion).values(crc=schema_crc))
+    finally:
+        engine.dispose()
+    tmp_path.replace(db_path)
+
+    logger.info("Done.")
+    return [*tablenames, *removed]
+
+
+def build_artifact(output: Path, csv_dir: Path) -> None:
+    """Builds a compacted veekun database, to be loaded by `update_database`.
+
+    The database records the CRC of the schema and of each CSV file, so it can be
+    checked against the CSV files without reloading them.
 
+    Args:
+        output (Path): Path of the database, overwritten if it exists.
+        csv_dir (Path): Directory with a CSV file for each table.
+    """
+    build_path = output.with_name(f"{output.name}.build")
+    build_path.unlink(missing_ok=True)
+    update_database(build_path, csv_dir)
+
+    engine = create_engine(f"sqlite:///{build_path}")
     try:
-        db = Database.open("veekun")
-        with db.get_session() as session:
-            stmt = select(v.LatestVersion.crc)
-            if session.scalar(stmt) == new_crc:
-                return  # database is already up-to-date, skip rebuild
+        with engine.connect() as connection:
+            connection.exec_driver_sql("VACUUM")
+    finally:
+        engine.dispose()
+    build_path.replace(output)
+
+
+def _schema_crc() -> int:
+    schema_crc = 0
+    for file in SCHEMA_FILES:
+        schema_crc = crc32(file.read_bytes(), schema_crc)
+    return schema_crc
+
+
+def _csv_versions(
+    csv_dir: Path, manifest: dict[str, tuple[int, int, int]] | None
+) -> dict[str, tuple[int, int, int]]:
+    versions = {}  # tablename -> size, mtime, crc
+    for table in v.Base.metadata.sorted_tables:
+        csv_file = csv_dir / f"{table.name}.csv"
+        if not csv_file.is_file():
+            continue
+        stat = csv_file.stat()
+        version = manifest.get(table.name) if manifest is not None else None
+        if version is not None and version[:2] == (stat.st_size, stat.st_mtime_ns):
+            versions[table.name] = version
+        else:
+            crc = crc32(csv_file.read_bytes())
+            versions[table.name] = (stat.st_size, stat.st_mtime_ns, crc)
+    return versions
 
+
+def _crcs(versions: dict[str, tuple[int, int, int]]) -> dict[str, int]:
+    return {name: crc for name, (_, _, crc) in versions.items()}
+
+
+def _read_manifest(
+    db_path: Path, schema_crc: int
+) -> dict[str, tuple[int, int, int]] | None:
+    if not db_path.is_file():
+        return None
+    engine = create_engine(f"sqlite:///file:{db_path}?mode=ro&uri=true")
+    try:
+        with engine.connect() as connection:
+            if connection.scalar(select(v.LatestVersion.crc)) != schema_crc:
+                return None
+            stmt = select(
+                v.TableVersions.tablename,
+                v.TableVersions.size,
+                v.TableVersions.mtime_ns,
+                v.TableVersions.crc,
+            )
+            return {
+                tablename: (size, mtime_ns, crc)
+                for tablename, size, mtime_ns, crc in connection.execute(stmt)
+            }
     except OperationalError:  # table does not exist
-        pass  # always rebuild on error
-
-    print("Rebuilding veekun database...")
-
-    with utils.get_config_file("veekun.sqlite").open("wb"):  # truncate database
-        pass
-
-    db = Database.open("veekun")
-
-    v.Base.metadata.create_all(db.engine)
-
-    tables_classes = {
-        obj.__tablename__: obj
-        for name, obj in inspect.getmembers(v)
-        if inspect.isclass(obj)
-        and obj.__module__ == v.__name__
-        and hasattr(obj, "__tablename__")
-    }
-
-    with db.get_session() as session:
-        session.add(v.LatestVersion(crc=new_crc))
-
-        for table in v.Base.metadata.sorted_tables:
-            tname = table.key
-            csv_file = utils.get_data_file(f"veekun/{tname}.csv")
-            if csv_file.is_file():
-                with csv_file.open(encoding="utf-8") as f:
-                    csv_data = csv.DictReader(f)
-                    csv_keys = csv_data.fieldnames
-
-                    if csv_keys is not None:
-                        data = [dict(i) for i in csv_data]
-
-                        if hasattr(table.columns, "name_normalized"):
-                            for row in data:
-                                row["name_normalized"] = utils.to_user_id(
-                                    utils.remove_diacritics(row["name"])
-                                )
-
-                        if tname == "locations":
-                            for row in data:
-                                if num := re.search(r"route-(\d+)", row["identifier"]):
-                                    row["route_number"] = num[1]
-
-                        bulk_insert_stmt = insert(tables_classes[tname])
-                        session.execute(bulk_insert_stmt, data)
-
-                        if "identifier" in csv_keys:
-                            bulk_update_stmt = (
-                                update(tables_classes[tname])
-                                .values(
-                                    identifier=func.replace(
-                                        tables_classes[tname].identifier, "-", ""
-                                    )
-                                )
-                                .execution_options(synchronize_session=False)
-                            )
-                            session.execute(bulk_update_stmt)
-
-    print("Done.")
+        return None  # always rebuild on error
+    finally:
+        engine.dispose()
+
+
+def _load_table(connection: DBConnection, tablename: str, csv_file: Path) -> None:
+    table = v.Base.metadata.tables[tablename]
+    connection.execute(delete(table))
+
+    with csv_file.open(encoding="utf-8", newline="") as f:
+        csv_data = csv.reader(f)
+        if (header := next(csv_data, None)) is None:
+            return
+
+        columns = [column for column in header if column in table.columns]
+        if table.name == "locations":
+            columns.append("route_number")
+        if "name_normalized" in table.columns:
+            columns.append("name_normalized")
+
+        # Rows are passed straight to the DBAPI executemany, in the order of the
+        # parameters of the compiled statement
+        compiled = insert(table).compile(
+            dialect=connection.dialect, column_keys=columns
+        )
+        positions = [columns.index(key) for key in compiled.positiontup or []]
+        rows = (
+            tuple([row[i] for i in positions])
+            for row in _read_rows(table.name, header, csv_data, columns)
+        )
+        for chunk in batched(rows, CHUNK_SIZE, strict=False):
+            connection.exec_driver_sql(compiled.string, list(chunk))
+
+
+def _read_rows(
+    tablename: str, header: list[str], csv_data: Iterator[list[str]], columns: list[str]
+) -> Iterator[list[str | None]]:
+    indexes = [header.index(column) for column in columns if column in header]
+    identifier = columns.index("identifier") if "identifier" in columns else None
+    route = header.index("identifier") if tablename == "locations" else None
+    name = header.index("name") if "name_normalized" in columns else None
+
+    row: list[str | None]
+    for values in csv_data:
+        row = [values[i] for i in indexes]
+        if route is not None:
+            num = re.search(r"route-(\d+)", values[route])
+            row.append(num[1] if num else None)
+        if name is not None:
+            row.append(utils.to_user_id(utils.remove_diacritics(values[name])))
+        if identifier is not None:
+            row[identifier] = values[indexes[identifier]].replace("-", "")
+        yield row
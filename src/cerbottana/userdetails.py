@@ -0,0 +1,135 @@
+import asyncio
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from cerbottana.outbound import Priority
+from cerbottana.typedefs import RoomId, UserId
+
+if TYPE_CHECKING:
+    from cerbottana.connection import Connection
+    from cerbottana.models.room import Room
+    from cerbottana.models.user import User
+
+
+@dataclass(slots=True)
+class Userdetails:
+    """Ranks received in a `|queryresponse|userdetails|` message.
+
+    Attributes:
+        global_rank (str): PS global rank.
+        room_ranks (dict[RoomId, str]): Rank of the user in each of its rooms, " " if
+            unranked.
+        received (float): `time.monotonic()` timestamp of the response.
+    """
+
+    global_rank: str
+    room_ranks: dict[RoomId, str]
+    received: float = field(default_factory=monotonic)
+
+    def rank_symbol(self, roomid: RoomId) -> str:
+        """Predicts the symbol PS shows next to the user in a room.
+
+        Args:
+            roomid (RoomId): Room to check.
+
+        Returns:
+            str: Room rank if the user has one, global rank otherwise.
+        """
+        room_rank = self.room_ranks.get(roomid, " ")
+        return room_rank if room_rank != " " else self.global_rank
+
+
+class UserdetailsScheduler:
+    """Schedules `/cmd userdetails` queries, caching their responses.
+
+    Queries are sent one at a time in the background outbound lane, and each userid is
+    queued only once. Responses are cached for `ttl` seconds, across reconnects: a
+    cached response is reused as long as the rank symbol shown in the room, e.g. in
+    `|j|` and `|n|` messages, matches it, otherwise the user is queried again.
+
+    Attributes:
+        conn (Connection): Used to send the queries.
+        ttl (float): Seconds a response is reused for.
+    """
+
+    def __init__(self, conn: Connection, *, ttl: float = 600) -> None:
+        self.conn = conn
+        self.ttl = ttl
+        self._cache: dict[UserId, Userdetails] = {}
+        self._pending: dict[UserId, None] = {}  # ordered set
+        self._worker: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def request(
+        self, user: User, room: Room | None = None, rank_symbol: str | None = None
+    ) -> None:
+        """Applies the cached ranks of a user, or queues a query if they are stale.
+
+        Args:
+            user (User): User to query.
+            room (Room | None): Room the user was seen in. Defaults to None, i.e. the
+                cached ranks are not used.
+            rank_symbol (str | None): Symbol shown next to the user in `room`.
+                Defaults to None.
+        """
+        details = self.get(user.userid)
+        if (
+            details is not None
+            and room is not None
+            and details.rank_symbol(room.roomid) == rank_symbol
+        ):
+            user.global_rank = details.global_rank
+            if room.roomid in details.room_ranks:
+                room.add_user(user, details.room_ranks[room.roomid])
+            return
+
+        self._pending[user.userid] = None
+        if self._worker is None or self._worker.done():
+            self._worker = self.conn.create_task(self._run())
+
+    def get(self, userid: UserId) -> Userdetails | None:
+        """Retrieves the cached ranks of a user, if they are not stale.
+
+        Args:
+            userid (UserId): User to check.
+
+        Returns:
+            Userdetails | None: Cached ranks, None if missing or stale.
+        """
+        details = self._cache.get(userid)
+        if details is not None and monotonic() - details.received >= self.ttl:
+            del self._cache[userid]
+            return None
+        return details
+
+    def store(self, userid: UserId, details: Userdetails) -> None:
+        """Caches a userdetails response.
+
+        Args:
+            userid (UserId): User the response refers to.
+            details (Userdetails): Parsed response.
+        """
+        self._cache[userid] = details
+
+    def clear(self) -> None:
+        """Drops every pending query, e.g. when the connection is closed."""
+        self._pending.clear()
+
+    async def _run(self) -> None:
+        while self._pending:
+            userid = next(iter(self._pending))
+            try:
+                await self.conn.send(
+                    f"|/cmd userdetails {userid}", priority=Priority.BACKGROUND
+                )
+            finally:
+                self._pending.pop(userid, None)
+
+        # Drop stale responses once the queue is drained
+        now = monotonic()
+        for userid, details in list(self._cache.items()):
+            if now - details.received >= self.ttl:
+                del self._cache[userid]
@@ -1,76 +1,19 @@
 import json
 import re
-import string
-import unicodedata
 from html import escape
 from pathlib import Path
 
-from pokedex import Language
 from typenv import Env
 
-from cerbottana.typedefs import JsonDict, Role, RoomId, UserId
-
-
-def to_id(text: str) -> str:
-    return re.sub(r"[^a-z0-9]", "", text.lower())
-
-
-def to_user_id(user: str) -> UserId:
-    return UserId(to_id(user))
-
-
-def to_room_id(room: str, fallback: RoomId = RoomId("lobby")) -> RoomId:
-    roomid = RoomId(re.sub(r"[^a-z0-9-]", "", room.lower()))
-    if not roomid:
-        roomid = fallback
-    return roomid
-
-
-def remove_diacritics(text: str) -> str:
-    return "".join(
-        [c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c)]
-    )
-
-
-def has_role(role: Role, user: str, strict_voice_check: bool = False) -> bool:
-    """Checks if a user has a PS role or higher.
-
-    Args:
-        role (Role): PS role (i.e. "voice", "driver").
-        user (str): User to check.
-        strict_voice_check (bool): True if custom rank symbols should not be
-            considered voice. Defaults to False.
-
-    Returns:
-        bool: True if user meets the required criteria.
-    """
-    roles: dict[Role, str] = {
-        "admin": "~&",
-        "sectionleader": "~&§",
-        "owner": "~&#",
-        "bot": "*",
-        "host": "★",
-        "mod": "~&§#@",
-        "driver": "~&§#@%",
-        "player": "☆",
-        "voice": "~&§#@%+",
-        "prizewinner": "^",
-    }
-    if user:
-        if role == "disabled":
-            return False
-        if role == "regularuser":
-            return True
-        if user[0] in roles[role]:
-            return True
-        if (
-            role == "voice"
-            and not strict_voice_check
-            and user[0] not in "*★☆^ "
-            and user[0] not in string.ascii_letters + string.digits
-        ):
-            return True
-    return False
+# Re-exported, most of the code base uses them through utils
+from cerbottana.normalization import get_language as get_language
+from cerbottana.normalization import get_language_id as get_language_id
+from cerbottana.normalization import remove_diacritics as remove_diacritics
+from cerbottana.normalization import to_id as to_id
+from cerbottana.normalization import to_room_id as to_room_id
+from cerbottana.normalization import to_user_id as to_user_id
+from cerbottana.ranks import has_role as has_role
+from cerbottana.typedefs import JsonDict
 
 
 def html_escape(text: str | None) -> str:
@@ -86,65 +29,6 @@ def is_youtube_link(url: str) -> bool:
     return re.match(youtube_regex, url, re.IGNORECASE) is not None
 
 
-def get_language(language_name: str) -> Language | None:
-    language_name = re.sub(r"[^a-z]", "", language_name.lower())
-    table = {
-        "jp": Language.JAPANESE_KANA,
-        "japanese": Language.JAPANESE_KANA,
-        "kana": Language.JAPANESE_KANA,
-        "jpkana": Language.JAPANESE_KANA,
-        "japanesekana": Language.JAPANESE_KANA,
-        "kanji": Language.JAPANESE_KANJI,
-        "jpkanji": Language.JAPANESE_KANJI,
-        "japanesekanji": Language.JAPANESE_KANJI,
-        "fr": Language.FRENCH,
-        "french": Language.FRENCH,
-        "de": Language.GERMAN,
-        "german": Language.GERMAN,
-        "es": Language.SPANISH,
-        "spanish": Language.SPANISH,
-        "it": Language.ITALIAN,
-        "italian": Language.ITALIAN,
-        "en": Language.ENGLISH,
-        "english": Language.ENGLISH,
-        "ko": Language.KOREAN,
-        "korean": Language.KOREAN,
-        "zh": Language.CHINESE_SIMPLIFIED,
-        "chinese": Language.CHINESE_SIMPLIFIED,
-        "zhsimp": Language.CHINESE_SIMPLIFIED,
-        "chinesesimplified": Language.CHINESE_SIMPLIFIED,
-        "zhtrad": Language.CHINESE_TRADITIONAL,
-        "chinesetraditional": Language.CHINESE_TRADITIONAL,
-        "eslatam": Language.SPANISH_LATAM,
-        "spanishlatam": Language.SPANISH_LATAM,
-        "eslatinamerica": Language.SPANISH_LATAM,
-        "spanishlatinamerica": Language.SPANISH_LATAM,
-    }
-    return table.get(language_name)
-
-
-def get_language_id(language_name: str, *, fallback: int = 9) -> int:
-    language_name = to_user_id(language_name)
-    table = {
-        # "japanese": 1,
-        # "traditionalchinese": 4,
-        "fr": 5,
-        "french": 5,
-        "de": 6,
-        "german": 6,
-        "es": 7,
-        "spanish": 7,
-        "it": 8,
-        "italian": 8,
-        "en": 9,
-        "english": 9,
-        # "simplifiedchinese": 12,
-    }
-    if language_name in table:
-        return table[language_name]
-    return fallback
-
-
 def get_alias(text: str) -> str:
     return ALIASES.get(_escape(text), text)
 
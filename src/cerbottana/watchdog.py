@@ -0,0 +1,119 @@
+import asyncio
+import sys
+import threading
+from contextlib import suppress
+from pathlib import Path
+from time import perf_counter
+from types import FrameType
+
+from cerbottana import metrics
+from cerbottana.log import get_logger
+
+logger = get_logger("watchdog")
+
+PACKAGE_PATH = Path(__file__).parent
+TIMED_WRAPPER = (metrics.__file__, "timed.<locals>.wrapper")
+
+
+def attribute(frame: FrameType | None) -> tuple[str, str]:
+    """Finds out what a stack is running, walking it from the innermost frame.
+
+    Args:
+        frame (FrameType | None): Innermost frame.
+
+    Returns:
+        tuple[str, str]: The activity of the innermost function wrapped by
+            `metrics.timed`, or the outermost cerbottana function if there is none,
+            and the location of the innermost cerbottana frame.
+    """
+    activity = None
+    outermost = "event loop"
+    location = "unknown location"
+    found_location = False
+
+    while frame is not None:
+        code = frame.f_code
+        if (code.co_filename, code.co_qualname) == TIMED_WRAPPER:
+            if activity is None:
+                activity = metrics.activities.get(frame.f_locals.get("func"))
+        elif code.co_filename.startswith(str(PACKAGE_PATH)):
+            path = Path(code.co_filename).relative_to(PACKAGE_PATH)
+            if not found_location:
+                location = f"{path}:{frame.f_lineno} in {code.co_qualname}"
+                found_location = True
+            outermost = f"{path.with_suffix('')} {code.co_qualname}"
+        frame = frame.f_back
+
+    return activity or outermost, location
+
+
+class Watchdog:
+    """Measures event loop lag and attributes the steps blocking the loop.
+
+    A coroutine updates a heartbeat every `threshold / 4` seconds, recording how late
+    it is woken up, while a separate thread checks that the heartbeat keeps up. When
+    the loop stalls for longer than `threshold` the thread samples the stack of the
+    loop thread to find the handler, command or task responsible, which is logged and
+    recorded in the metrics as soon as the loop is responsive again.
+
+    Attributes:
+        threshold (float): Seconds a single step can block the loop before being
+            reported.
+        interval (float): Seconds between heartbeats.
+    """
+
+    def __init__(self, threshold: float) -> None:
+        self.threshold = threshold
+        self.interval = threshold / 4
+
+        self._beat = perf_counter()
+        self._stop = threading.Event()
+        self._loop_lag = metrics.loop_lag.labels()
+
+    async def run(self) -> None:
+        """Runs the watchdog until cancelled."""
+        loop = asyncio.get_running_loop()
+        thread = threading.Thread(
+            target=self._watch,
+            args=(loop, threading.get_ident()),
+            name="cerbottana-watchdog",
+            daemon=True,
+        )
+        self._stop.clear()
+        self._beat = perf_counter()
+        thread.start()
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                now = perf_counter()
+                self._loop_lag.observe(max(now - self._beat - self.interval, 0))
+                self._beat = now
+        finally:
+            self._stop.set()
+            # The thread has to exit before _stop is cleared by a new run, but
+            # joining it on the loop would block it
+            await asyncio.to_thread(thread.join)
+
+    def _watch(self, loop: asyncio.AbstractEventLoop, thread_id: int) -> None:
+        reported = None
+        while not self._stop.wait(self.interval):
+            beat = self._beat
+            if (
+                beat == reported
+                or perf_counter() - beat < self.interval + self.threshold
+            ):
+                continue
+            reported = beat
+
+            frame = sys._current_frames().get(thread_id)  # noqa: SLF001
+            activity, location = attribute(frame)
+            del frame
+            with suppress(RuntimeError):  # the loop is already closed
+                loop.call_soon_threadsafe(self._report, beat, activity, location)
+
+    def _report(self, beat: float, activity: str, location: str) -> None:
+        duration = perf_counter() - beat - self.interval
+        metrics.loop_blocked.labels(activity).observe(duration)
+        logger.warning(
+            "Event loop blocked for %.3fs by %s, at %s", duration, activity, location
+        )
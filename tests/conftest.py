@@ -2,23 +2,24 @@ import asyncio
 import json
 import subprocess
 from collections import Counter
-from collections.abc import AsyncGenerator, Callable
+from collections.abc import AsyncGenerator, Callable, Iterator
 from contextlib import AbstractAsyncContextManager, asynccontextmanager
 from enum import Enum
 from pathlib import Path
 from shutil import rmtree
-from time import time
 from typing import Any
 
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import StaticPool
 
 import cerbottana.databases.database as d
 from cerbottana import utils
 from cerbottana.connection import Connection
-from cerbottana.database import Database
+from cerbottana.database import Database, EngineProfile, current_database
 from cerbottana.models.room import Room
+from cerbottana.outbound import Priority
 from cerbottana.tasks import pokedex, veekun
 from cerbottana.utils import env
 
@@ -96,11 +97,13 @@ class MockedConnection(Connection):
             if message == ControlMessage.PROCESS_AND_REPLY:
                 await self.send_bytes(ControlMessage.PROCESSING_DONE)
 
-    async def _send_message_delay(self) -> None:
+    async def send(
+        self,
+        message: str,
+        *,
+        priority: Priority = Priority.COMMAND,  # noqa: ARG002
+    ) -> None:
         # No need to throttle messages
-        self.lastmessage = time()
-
-    async def send(self, message: str) -> None:
         print(f">> {message}")
         await self.send_queue.put(message)
 
@@ -283,22 +286,32 @@ def pokemon_showdown() -> PokemonShowdown:
 
 
 @pytest.fixture(autouse=True)
-def mock_database(mocker) -> None:
+def mock_database(mocker) -> Iterator[None]:
     database_instances: dict[str, Database] = {}
 
-    def mock_database_init(self, dbname: str) -> None:
+    def mock_database_init(
+        self, dbname: str, profile: EngineProfile | None = None
+    ) -> None:
         if dbname == "veekun":
             dbpath = str(utils.get_config_file(f"{dbname}.sqlite"))
             engine = f"sqlite:///{dbpath}"
         else:
             engine = "sqlite://"  # :memory: database
-        self.engine = create_engine(engine)
+        self.dbname = dbname
+        # Share the :memory: database with the thread used by `Database.run`
+        self.engine = create_engine(
+            engine,
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False},
+        )
         self.session_factory = sessionmaker(self.engine)
         self.Session = scoped_session(self.session_factory)
         database_instances[dbname] = self
 
     @classmethod  # type: ignore[misc]
-    def mock_database_open(cls, dbname: str = "database") -> Database:
+    def mock_database_open(cls, dbname: str | None = None) -> Database:
+        if dbname is None:
+            dbname = current_database.get()
         if dbname not in database_instances:
             cls(dbname)
             if dbname in database_metadata:
@@ -309,6 +322,11 @@ def mock_database(mocker) -> None:
     mocker.patch.object(Database, "__init__", mock_database_init)
     mocker.patch.object(Database, "open", mock_database_open)
 
+    yield
+
+    for db in database_instances.values():
+        asyncio.run(db.close())
+
 
 @pytest.fixture(scope="session", autouse=True)
 def veekun_database() -> None:
@@ -1,7 +1,12 @@
 import ast
 import inspect
+import shutil
 
+from sqlalchemy import create_engine, select
+
+from cerbottana import utils
 from cerbottana.databases import veekun
+from cerbottana.tasks.veekun import build_artifact, update_database
 
 
 def test_table_order() -> None:
@@ -20,10 +25,85 @@ def test_table_order() -> None:
             ),
             None,
         ):
-            if tblname == "latest_version":
+            if tblname in ("latest_version", "table_versions"):
                 continue
             classes.append(tblname)
 
     assert classes == sorted(classes), (
         "Classes are not sorted alphabetically in databases/veekun.py"
     )
+
+
+def test_update_database(tmp_path) -> None:
+    db_path = tmp_path / "veekun.sqlite"
+    csv_dir = tmp_path / "veekun"
+    csv_dir.mkdir()
+    for tablename in ("generations", "locations"):
+        shutil.copy(utils.get_data_file(f"veekun/{tablename}.csv"), csv_dir)
+
+    assert update_database(db_path, csv_dir) == ["generations", "locations"]
+    assert update_database(db_path, csv_dir) is None
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.connect() as connection:
+        stmt = select(
+            veekun.Locations.identifier, veekun.Locations.route_number
+        ).filter_by(id=31)
+        assert connection.execute(stmt).one() == ("sinnohroute201", 201)
+    engine.dispose()
+
+    # Files are hashed again only if their size or mtime changed, the database is
+    # replaced to store the new mtime without reloading the table
+    generations = csv_dir / "generations.csv"
+    generations.touch()
+    assert update_database(db_path, csv_dir) == []
+    assert update_database(db_path, csv_dir) is None
+    generations.write_text("id,main_region_id,identifier\n1,1,generation-i\n")
+    assert update_database(db_path, csv_dir) == ["generations"]
+
+    with engine.connect() as connection:
+        assert connection.execute(select(veekun.Generations.identifier)).all() == [
+            ("generationi",)
+        ]
+    engine.dispose()
+
+    # Tables whose CSV file was removed are cleared
+    generations.unlink()
+    assert update_database(db_path, csv_dir) == ["generations"]
+    assert update_database(db_path, csv_dir) is None
+
+    with engine.connect() as connection:
+        assert connection.execute(select(veekun.Generations.identifier)).all() == []
+    engine.dispose()
+
+
+def test_build_artifact(tmp_path) -> None:
+    artifact = tmp_path / "artifact.sqlite"
+    db_path = tmp_path / "veekun.sqlite"
+    csv_dir = tmp_path / "veekun"
+    csv_dir.mkdir()
+    shutil.copy(utils.get_data_file("veekun/generations.csv"), csv_dir)
+
+    build_artifact(artifact, csv_dir)
+
+    # The artifact is loaded if it matches the CSV files, regardless of their mtime
+    (csv_dir / "generations.csv").touch()
+    assert update_database(db_path, csv_dir, artifact) == []
+    assert update_database(db_path, csv_dir, artifact) is None
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.connect() as connection:
+        stmt = select(veekun.Generations.identifier).filter_by(id=1)
+        assert connection.scalar(stmt) == "generationi"
+    engine.dispose()
+
+    # Otherwise the database is rebuilt
+    db_path.unlink()
+    (csv_dir / "generations.csv").write_text(
+        "id,main_region_id,identifier\n1,1,generation-1\n"
+    )
+    assert update_database(db_path, csv_dir, artifact) == ["generations"]
+
+    with engine.connect() as connection:
+        assert connection.scalar(stmt) == "generation1"
+    engine.dispose()
@@ -0,0 +1,130 @@
+import asyncio
+from collections.abc import Coroutine
+from types import SimpleNamespace
+
+from cerbottana.handlers import Handler, Lane, compile_dispatch_table, handlers
+from cerbottana.models.protocol_message import ProtocolMessage
+from cerbottana.models.room import Room
+
+
+def message(msg: str) -> ProtocolMessage:
+    room = SimpleNamespace(conn=None)
+    return ProtocolMessage(room, msg)  # type: ignore[arg-type]
+
+
+async def test_compile_dispatch_table() -> None:
+    calls: list[tuple[str, str]] = []
+
+    def recorder(name: str, lane: Lane = Lane.MAIN) -> Handler:
+        async def callback(msg: ProtocolMessage) -> None:
+            await asyncio.sleep(0)
+            calls.append((name, msg.msg))
+
+        return Handler(callback, None, lane)
+
+    single = recorder("single")
+    registry = {
+        "single": [single],
+        "multiple": [recorder("first"), recorder("second")],
+        "tournament": [recorder("tournament")],
+        "tournament|create": [recorder("create")],
+        "battle|start": [recorder("start")],
+        "j": [recorder("join"), recorder("store", Lane.MEMBERSHIP)],
+    }
+    dispatch_table = compile_dispatch_table(registry)
+
+    assert set(dispatch_table) == {"single", "multiple", "tournament", "battle", "j"}
+    assert set(dispatch_table["j"]) == {Lane.MAIN, Lane.MEMBERSHIP}
+    assert set(dispatch_table["single"]) == {Lane.MAIN}
+    # Single handlers are awaited directly
+    assert dispatch_table["single"][Lane.MAIN] is single.callback
+
+    for line in (
+        "single|",
+        "multiple|",
+        "tournament|update|{}",
+        "tournament|create|gen9ou|Single Elimination",
+        "battle|end",
+        "battle|start",
+        "battle",
+        "j| User 1",
+    ):
+        msg = message(line)
+        for dispatch in dispatch_table[msg.type].values():
+            await dispatch(msg)
+
+    assert calls == [
+        ("single", "single|"),
+        ("first", "multiple|"),
+        ("second", "multiple|"),
+        ("tournament", "tournament|update|{}"),
+        ("tournament", "tournament|create|gen9ou|Single Elimination"),
+        ("create", "tournament|create|gen9ou|Single Elimination"),
+        ("start", "battle|start"),
+        ("join", "j| User 1"),
+        ("store", "j| User 1"),
+    ]
+
+
+def test_registered_handlers() -> None:
+    dispatch_table = compile_dispatch_table(handlers)
+
+    # Tournament updates are not dispatched to `tournament_create`
+    assert "tournament" in dispatch_table
+    assert "tournament|create" in handlers
+    assert "tournament" not in handlers
+
+    # Chat messages never wait for membership updates
+    assert set(dispatch_table["c:"]) == {Lane.MAIN}
+    assert set(dispatch_table["users"]) == {Lane.MAIN, Lane.MEMBERSHIP}
+
+
+class LaneConnection:
+    def __init__(self, registry: dict[str, list[Handler]]) -> None:
+        self.dispatch_table = compile_dispatch_table(registry)
+        self.tasks: set[asyncio.Task[None]] = set()
+
+    def create_task(self, coro: Coroutine[None, None, None]) -> asyncio.Task[None]:
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        return task
+
+
+async def test_lanes() -> None:
+    membership_done = asyncio.Event()
+    calls: list[str] = []
+
+    async def join(msg: ProtocolMessage) -> None:
+        calls.append(msg.msg)
+
+    async def store_joined_user(msg: ProtocolMessage) -> None:
+        await membership_done.wait()
+        calls.append(f"stored {msg.msg}")
+
+    async def chat(msg: ProtocolMessage) -> None:
+        calls.append(msg.msg)
+
+    conn = LaneConnection(
+        {
+            "j": [
+                Handler(join, None),
+                Handler(store_joined_user, None, Lane.MEMBERSHIP),
+            ],
+            "c": [Handler(chat, None)],
+        }
+    )
+    room = Room(conn, "room1")  # type: ignore[arg-type]
+
+    for line in ("j| User 1", "j| User 2", "c| User 1|.command"):
+        room.add_message_to_queue(ProtocolMessage(room, line))
+    await asyncio.sleep(0)
+
+    # Membership updates are still pending, while the main lane is already processed
+    assert calls == ["j| User 1", "j| User 2", "c| User 1|.command"]
+    assert room.queue_depth == 1
+
+    membership_done.set()
+    await room.process_all_messages()
+    assert calls[3:] == ["stored j| User 1", "stored j| User 2"]
+    await asyncio.gather(*conn.tasks)
+    assert room.queue_depth == 0
@@ -1,5 +1,9 @@
 from collections import Counter
 
+from sqlalchemy import select
+
+import cerbottana.databases.database as d
+from cerbottana.database import Database
 from cerbottana.models.room import Room
 from cerbottana.models.user import User
 
@@ -141,3 +145,94 @@ async def test_room(mock_connection) -> None:
         assert await conn.get_messages() == Counter()
         assert User.get(conn, "cerbottana").global_rank == "+"
         assert User.get(conn, "cerbottana").rank(room1) == "*"
+
+
+async def test_userlist(mock_connection) -> None:
+    async with mock_connection() as conn:
+        await conn.add_messages(
+            [
+                ">room1",
+                "|init|chat",
+                "|users|4,*cerbottana, User 1,%User 2@!,+User 3",
+            ],
+            [
+                ">room2",
+                "|init|chat",
+                "|users|2,%User 2, User 4",
+            ],
+        )
+
+        # Only ranked users are queried, once
+        assert await conn.get_messages() == Counter(
+            [
+                "|/cmd roominfo room1",
+                "room1|/roomlanguage",
+                "|/cmd roominfo room2",
+                "room2|/roomlanguage",
+                "|/cmd userdetails cerbottana",
+                "|/cmd userdetails user2",
+                "|/cmd userdetails user3",
+            ]
+        )
+        room1 = Room.get(conn, "room1")
+        room2 = Room.get(conn, "room2")
+        assert room1.roombot
+        assert {str(user) for user in room1.users} == {
+            "cerbottana",
+            "User 1",
+            "User 2",
+            "User 3",
+        }
+        assert {str(user) for user in room2.users} == {"User 2", "User 4"}
+
+        db = Database.open()
+        await db.writes.flush()
+        with db.get_session() as session:
+            usernames = session.scalars(select(d.Users.username)).all()
+        assert sorted(usernames) == [
+            "User 1",
+            "User 2",
+            "User 3",
+            "User 4",
+            "cerbottana",
+        ]
+
+
+async def test_user_rooms(mock_connection) -> None:
+    async with mock_connection() as conn:
+        await conn.add_messages(
+            [">room1", "|init|chat", "|users|2,*cerbottana, User 1"],
+            [">room2", "|init|chat", "|users|2, cerbottana, User 1"],
+        )
+        await conn.get_messages()
+        room1 = Room.get(conn, "room1")
+        room2 = Room.get(conn, "room2")
+        user1 = User.get(conn, "user1")
+
+        assert user1.rooms == {room1, room2}
+        assert conn.roombot_rooms == {room1}
+        assert user1.can_pminfobox_to() is room1
+
+        # Renames
+        await conn.add_messages([">room1", "|n| User 2|user1"])
+        await conn.get_messages()
+        user2 = User.get(conn, "user2")
+        assert user1.rooms == {room2}
+        assert user2.rooms == {room1}
+        assert user1.can_pminfobox_to() is None
+        assert user2.can_pminfobox_to() is room1
+
+        # Reconnects send a new userlist
+        await conn.add_messages(
+            [">room1", "|init|chat", "|users|2, cerbottana, User 1"]
+        )
+        await conn.get_messages()
+        assert user1.rooms == {room1, room2}
+        assert user2.rooms == set()
+        assert conn.roombot_rooms == set()
+
+        # The bot leaves a room
+        await conn.add_messages([">room2", "|deinit"])
+        await conn.get_messages()
+        assert user1.rooms == {room1}
+        assert set(conn.user_rooms) == {"cerbottana", "user1"}
@@ -0,0 +1,52 @@
+import pytest
+
+from cerbottana.models.message import Message
+from cerbottana.models.protocol_message import ProtocolMessage
+from cerbottana.models.room import Room
+from cerbottana.models.user import User
+
+
+@pytest.mark.parametrize(
+    ("raw", "type_", "params"),
+    [
+        ("init|chat", "init", ["chat"]),
+        ("c|+user|hi|there", "c", ["+user", "hi", "there"]),
+        ("deinit", "deinit", []),
+        ("j|", "j", [""]),
+        ("", "", []),
+    ],
+)
+async def test_protocol_message(
+    mock_connection, raw: str, type_: str, params: list[str]
+) -> None:
+    async with mock_connection() as conn:
+        msg = ProtocolMessage(Room.get(conn, "room1"), raw)
+
+        assert msg.type == type_
+        assert msg.params == params
+        assert msg.params is msg.params  # parsed once
+        with pytest.raises(AttributeError):
+            msg.extra = None  # type: ignore[attr-defined]
+
+
+@pytest.mark.parametrize(
+    ("message", "arg", "args"),
+    [
+        (".cmd", "", []),
+        (".cmd  a ", "a", ["a"]),
+        (".cmd a, b ,c", "a, b ,c", ["a", "b", "c"]),
+    ],
+)
+async def test_message_args(
+    mock_connection, message: str, arg: str, args: list[str]
+) -> None:
+    async with mock_connection() as conn:
+        msg = Message(None, User.get(conn, "user"), message)
+
+        assert msg.arg == arg
+        assert msg.args == args
+        assert msg.args is msg.args  # split once
+
+        msg.args = [*args, "d"]
+        assert msg.arg == ",".join([*args, "d"])
+        assert msg.args == [*args, "d"]
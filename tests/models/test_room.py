@@ -1,3 +1,5 @@
+from collections import Counter
+
 import pytest
 
 from cerbottana.models.room import Room
@@ -35,6 +37,18 @@ async def test_roomid(mock_connection, room: str, roomid: str) -> None:
             ],
             ["msg1", "msg2"],
         ),
+        (
+            [
+                [
+                    ">room1",
+                    "|c|user|msg1",
+                    "|:|1500000000",
+                    "|c:|1400000000|user|old",
+                    "|c:|1600000000|user|new",
+                ],
+            ],
+            ["msg1", "old", "new"],
+        ),
         (
             [
                 [
@@ -160,3 +174,32 @@ async def test_users(
                 users.pop(user)
 
         assert room.users == users
+
+
+@pytest.mark.parametrize(
+    ("messages", "escape", "max_lines", "frames"),
+    [
+        (["msg1"], True, 3, ["room1|msg1"]),
+        (["/msg1", "!msg2"], True, 3, ["room1|//msg1\n !msg2"]),
+        (["/msg1", "!msg2"], False, 3, ["room1|/msg1\n!msg2"]),
+        (
+            ["msg1", "msg2", "msg3", "msg4"],
+            True,
+            3,
+            ["room1|msg1\nmsg2\nmsg3", "room1|msg4"],
+        ),
+        (["msg1", "msg2", "msg3", "msg4"], True, 6, ["room1|msg1\nmsg2\nmsg3\nmsg4"]),
+        ([], True, 3, []),
+    ],
+)
+async def test_send_batch(
+    mock_connection,
+    messages: list[str],
+    escape: bool,
+    max_lines: int,
+    frames: list[str],
+) -> None:
+    async with mock_connection() as conn:
+        room = Room.get(conn, "room1")
+        await room.send_batch(messages, escape, max_lines=max_lines)
+        assert await conn.get_messages() == Counter(frames)
@@ -0,0 +1,15 @@
+from cerbottana.models.user import User
+
+
+async def test_userid(mock_connection) -> None:
+    async with mock_connection() as conn:
+        user = User.get(conn, "User 1@!")
+        assert user.userid == "user1"
+        assert user == User(conn, "USER 1")
+        assert hash(user) == hash(User(conn, "user1"))
+
+        # The userid follows the userstring
+        user.userstring = "User 2"
+        assert user.userid == "user2"
+        assert user == User(conn, "user2")
+        assert hash(user) == hash(User(conn, "user2"))
@@ -0,0 +1,32 @@
+from cerbottana.custom_permissions import CustomPermissionCache
+from cerbottana.database import Database
+from cerbottana.typedefs import RoomId
+
+
+async def test_custom_permission_cache(mocker) -> None:
+    room1 = RoomId("room1")
+    room2 = RoomId("room2")
+
+    cache = CustomPermissionCache.open()
+    assert CustomPermissionCache.open() is cache
+    assert cache.get(room1, ".8ball") is None
+
+    await cache.set(room1, ".8ball", "driver")
+    await cache.set(room2, ".8ball", "voice")
+    await cache.set(room2, ".media", "mod")
+    await cache.set(room2, ".media", None)
+
+    get_session = mocker.spy(Database, "get_session")
+    assert cache.get(room1, ".8ball") == "driver"
+    assert cache.get(room2, ".8ball") == "voice"
+    assert cache.get(room2, ".media") is None
+    get_session.assert_not_called()
+
+    # Writes go through to the database
+    reloaded = CustomPermissionCache(Database.open())
+    await reloaded.load()
+    get_session.reset_mock()
+    assert reloaded.get(room1, ".8ball") == "driver"
+    assert reloaded.get(room2, ".8ball") == "voice"
+    assert reloaded.get(room2, ".media") is None
+    get_session.assert_not_called()
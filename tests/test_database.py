@@ -0,0 +1,135 @@
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+import cerbottana.databases.database as d
+from cerbottana.database import READ_ONLY_PROFILE, Database, EngineProfile, WriteBuffer
+
+
+class RollbackError(Exception):
+    pass
+
+
+async def test_run() -> None:
+    db = Database.open()
+
+    def add_quote(session: Session) -> str:
+        session.add(d.Quotes(message="quote", roomid="room1", author="user1"))
+        return threading.current_thread().name
+
+    thread_name = await db.run(add_quote)
+    assert thread_name.startswith("database-")
+    assert thread_name != threading.current_thread().name
+
+    # The session is committed
+    with db.get_session() as session:
+        assert session.scalar(select(d.Quotes.message)) == "quote"
+
+    # Exceptions are propagated, after rolling the session back
+    def fail(session: Session) -> None:
+        session.add(d.Quotes(message="other quote", roomid="room1"))
+        raise RollbackError
+
+    with pytest.raises(RollbackError):
+        await db.run(fail)
+    with db.get_session() as session:
+        assert session.scalars(select(d.Quotes.message)).all() == ["quote"]
+
+    # The thread is stopped by close, and started again on demand
+    await db.close()
+    assert not any(t.name.startswith("database-") for t in threading.enumerate())
+    assert await db.run(lambda session: session.scalar(text("SELECT 1"))) == 1
+
+
+def test_engine_profiles(mocker, monkeypatch, tmp_path) -> None:
+    mocker.stopall()  # use the real engines
+    monkeypatch.setenv("CERBOTTANA_CONFIG_PATH", str(tmp_path))
+
+    db = Database("database")
+    with db.get_session() as session:
+        assert session.scalar(text("PRAGMA journal_mode")) == "wal"
+        assert session.scalar(text("PRAGMA synchronous")) == 1  # NORMAL
+        assert session.scalar(text("PRAGMA temp_store")) == 2  # MEMORY
+    db.engine.dispose()
+
+    db = Database("veekun", EngineProfile())
+    with db.get_session() as session:
+        session.execute(text("CREATE TABLE pokemon (identifier TEXT)"))
+        session.execute(text("INSERT INTO pokemon VALUES ('pikachu')"))
+    db.engine.dispose()
+
+    db = Database("veekun")
+    assert db.profile is READ_ONLY_PROFILE
+    with db.get_session() as session:
+        assert session.scalar(text("SELECT identifier FROM pokemon")) == "pikachu"
+        assert session.scalar(text("PRAGMA query_only")) == 1
+        with pytest.raises(OperationalError):
+            session.execute(text("INSERT INTO pokemon VALUES ('eevee')"))
+    db.engine.dispose()
+
+
+def test_write_buffer_event_loops() -> None:
+    db = Database.open()
+    writes = WriteBuffer(db, flush_interval=0.01)
+
+    async def add_user(userid: str) -> None:
+        writes.upsert(d.Users, {"userid": userid}, {"username": userid})
+        await asyncio.sleep(0.1)
+
+    # The background flusher keeps working on a new event loop
+    asyncio.run(add_user("user1"))
+    asyncio.run(add_user("user2"))
+    assert len(writes) == 0
+
+    with db.get_session() as session:
+        assert session.scalars(select(d.Users.userid)).all() == ["user1", "user2"]
+
+
+async def test_write_buffer(mocker) -> None:
+    db = Database.open()
+    writes = WriteBuffer(db, flush_interval=60, max_items=3)
+    run = mocker.spy(db, "run")
+
+    # Writes to the same row are merged
+    writes.upsert(d.Users, {"userid": "user1"}, {"username": "User 1"})
+    writes.upsert(d.Users, {"userid": "user1"}, {"avatar": "1"})
+    writes.upsert(d.Users, {"userid": "user1"}, {"username": "USER 1"})
+    writes.upsert(d.Users, {"userid": "user2"}, {"username": "User 2"})
+    assert len(writes) == 2
+    await writes.flush()
+    assert len(writes) == 0
+    assert run.call_count == 1
+
+    with db.get_session() as session:
+        stmt = select(d.Users.userid, d.Users.username, d.Users.avatar)
+        assert sorted(session.execute(stmt).tuples()) == [
+            ("user1", "USER 1", "1"),
+            ("user2", "User 2", None),
+        ]
+
+    # Updates don't insert missing rows
+    with db.get_session() as session:
+        session.add(d.TemporaryVoices(roomid="room1", userid="user1", date="0"))
+    writes.update(
+        d.TemporaryVoices, {"roomid": "room1", "userid": "user1"}, {"date": "1"}
+    )
+    writes.update(
+        d.TemporaryVoices, {"roomid": "room1", "userid": "user2"}, {"date": "1"}
+    )
+
+    # Reaching max_items flushes in the background
+    writes.upsert(d.Users, {"userid": "user3"}, {"username": "User 3"})
+    await asyncio.sleep(0.1)
+    assert len(writes) == 0
+    assert run.call_count == 2
+
+    with db.get_session() as session:
+        stmt_voices = select(d.TemporaryVoices.userid, d.TemporaryVoices.date)
+        assert session.execute(stmt_voices).tuples().all() == [("user1", "1")]
+        assert session.scalar(select(d.Users.username).filter_by(userid="user3")) == (
+            "User 3"
+        )
@@ -0,0 +1,26 @@
+import asyncio
+import sys
+
+from cerbottana import event_loop
+
+
+async def get_loop() -> asyncio.AbstractEventLoop:
+    return asyncio.get_running_loop()
+
+
+def test_run() -> None:
+    loop = event_loop.run(get_loop())
+    assert type(loop) is asyncio.EventLoop
+
+
+def test_fallback(monkeypatch, caplog) -> None:
+    # Make `import uvloop` fail even if it's installed
+    monkeypatch.setitem(sys.modules, "uvloop", None)
+
+    assert event_loop.get_loop_factory("uvloop") is None
+    assert event_loop.get_loop_factory("tokio") is None
+    assert event_loop.get_loop_factory("asyncio") is None
+    assert [record.getMessage() for record in caplog.records] == [
+        "uvloop is not installed, falling back to asyncio",
+        "Unknown event loop 'tokio', falling back to asyncio",
+    ]
@@ -0,0 +1,50 @@
+import json
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from cerbottana.fake_server import FakeShowdownServer, LoadProfile
+
+
+async def test_fake_server() -> None:
+    profile = LoadProfile(rooms=2, users=20, rate=1000, command_ratio=0.5)
+    server = FakeShowdownServer(profile, seed=0)
+
+    async with TestClient(TestServer(server.app)) as client:
+        resp = await client.post("/api/login")
+        assert json.loads((await resp.text())[1:])["assertion"]
+
+        websocket = await client.ws_connect("/showdown/websocket")
+        assert (await websocket.receive_str()).startswith("|challstr|4|")
+
+        await websocket.send_str("|/trn cerbottana,0,assertion")
+        assert (await websocket.receive_str()).startswith("|updateuser| cerbottana|")
+        await websocket.receive_str()  # |formats|
+
+        await websocket.send_str("|/cmd userdetails room1user0")
+        userdetails = await websocket.receive_str()
+        assert json.loads(userdetails.split("|", 3)[3])["rooms"] == {"%room1": {}}
+
+        await websocket.send_str("|/autojoin room0,room1")
+        for roomid in ("room0", "room1"):
+            init = (await websocket.receive_str()).split("\n")
+            assert init[:2] == [f">{roomid}", "|init|chat"]
+            assert init[3].startswith("|users|21,*cerbottana,")
+
+        while True:
+            frame = await websocket.receive_str()
+            # Only reply to room commands, not to PMs
+            if (
+                frame.startswith(">")
+                and "|c:|" in frame
+                and frame.endswith(f"|{profile.command}")
+            ):
+                roomid = frame.split("\n")[0][1:]
+                await websocket.send_str(f"{roomid}|/modnote ignored")
+                await websocket.send_str(f"{roomid}|not a reply")
+                await websocket.send_str(f"{roomid}|3 seconds")
+                break
+
+        await websocket.close()
+
+    assert server.stats.commands_sent >= 1
+    assert len(server.stats.latencies) == 1
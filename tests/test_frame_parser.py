@@ -0,0 +1,58 @@
+import pytest
+
+from cerbottana.frame_parser import ProtocolLine, parse_frame
+
+
+@pytest.mark.parametrize(
+    ("frame", "roomid"),
+    [
+        ("|updateuser| cerbottana|1|1|{}", "lobby"),
+        (">room1\n|c|user|msg", "room1"),
+        (">Room 2\n|c|user|msg", "room2"),
+    ],
+)
+def test_roomid(frame: str, roomid: str) -> None:
+    assert parse_frame(frame).roomid == roomid
+
+
+def test_lines() -> None:
+    frame = parse_frame(
+        ">room1\n|c|user|msg|with|pipes\n\nnot a protocol line\n|J| user"
+    )
+
+    assert frame.lines == [
+        ProtocolLine("c|user|msg|with|pipes", "c", ["user", "msg", "with", "pipes"]),
+        ProtocolLine("J| user", "J", [" user"]),
+    ]
+    assert frame.language_name is None
+
+
+def test_language() -> None:
+    frame = parse_frame(">room1\nThis room's primary language is Italian")
+
+    assert frame.language_name == "Italian"
+    assert frame.lines == []
+
+
+@pytest.mark.parametrize(
+    ("frame", "types"),
+    [
+        (
+            ">room1\n|init|chat\n|:|1500000000\n|c:|1400000000|user|old\n"
+            "|c:|1600000000|user|new",
+            ["init", ":", "c:", "c:"],
+        ),
+        (
+            ">room1\n|init|chat\n|title|Room 1\n|tournament|update|{}\n|c|user|msg",
+            ["init", "title"],
+        ),
+        (
+            ">room1\n|tournament|update|{}\n|c|user|msg",
+            ["tournament", "c"],
+        ),
+    ],
+)
+def test_init_backlog(frame: str, types: list[str]) -> None:
+    parsed = parse_frame(frame)
+
+    assert [line.type for line in parsed.lines] == types
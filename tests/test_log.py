@@ -0,0 +1,65 @@
+import logging
+
+import pytest
+
+from cerbottana.log import get_logger, setup_logging
+
+
+@pytest.fixture
+def listener():
+    listeners = []
+    propagate = logging.getLogger("cerbottana").propagate
+
+    def make_listener(*args, **kwargs):
+        listener = setup_logging(*args, **kwargs)
+        listeners.append(listener)
+        return listener
+
+    yield make_listener
+
+    for listener in listeners:
+        listener.stop()
+    for category in ("", ".protocol", ".protocol.in", ".handlers"):
+        logger = logging.getLogger(f"cerbottana{category}")
+        logger.setLevel(logging.NOTSET)
+        logger.filters.clear()
+    logging.getLogger("cerbottana").handlers.clear()
+    logging.getLogger("cerbottana").propagate = propagate
+
+
+def test_levels(listener) -> None:
+    listener("INFO", levels={"handlers": "WARNING"})
+
+    assert get_logger("commands").isEnabledFor(logging.INFO)
+    assert not get_logger("handlers").isEnabledFor(logging.INFO)
+    assert get_logger("handlers").isEnabledFor(logging.WARNING)
+    # Wire-level dumps are disabled by default
+    assert not get_logger("protocol.in").isEnabledFor(logging.DEBUG)
+    assert not get_logger("protocol.out").isEnabledFor(logging.DEBUG)
+
+
+def test_protocol_on_demand(listener) -> None:
+    listener("INFO", levels={"protocol": "DEBUG"})
+
+    assert get_logger("protocol.in").isEnabledFor(logging.DEBUG)
+    assert get_logger("protocol.out").isEnabledFor(logging.DEBUG)
+    assert not get_logger("commands").isEnabledFor(logging.DEBUG)
+
+
+def test_sampling(listener, caplog) -> None:
+    log_listener = listener(
+        "INFO",
+        levels={"protocol": "DEBUG"},
+        sampling={"protocol": 3, "protocol.out": 2},
+    )
+    log_listener.handlers = (*log_listener.handlers, caplog.handler)
+
+    for i in range(6):
+        get_logger("protocol.in").debug("in %d", i)
+    for i in range(4):
+        get_logger("protocol.out").debug("out %d", i)
+    get_logger("protocol.in").warning("warning")
+    get_logger("connection").info("unsampled")
+    log_listener.stop()
+
+    assert caplog.messages == ["in 0", "in 3", "out 0", "out 2", "warning", "unsampled"]
@@ -0,0 +1,114 @@
+import pytest
+
+from cerbottana import metrics
+
+
+@pytest.fixture
+def registry() -> list[metrics.Renderable]:
+    # Keep the test metrics out of the global registry
+    return []
+
+
+def test_histogram(registry) -> None:
+    histogram = metrics.Histogram(
+        "test_histogram_seconds",
+        "Test histogram.",
+        ("name",),
+        buckets=(0.1, 1),
+        registry=registry,
+    )
+    value = histogram.labels('a "quoted" name')
+    value.observe(0.05)
+    value.observe(0.1)
+    value.observe(0.5)
+    value.observe(5)
+
+    assert histogram.render() == [
+        "# HELP test_histogram_seconds Test histogram.",
+        "# TYPE test_histogram_seconds histogram",
+        r'test_histogram_seconds_bucket{name="a \"quoted\" name",le="0.1"} 2',
+        r'test_histogram_seconds_bucket{name="a \"quoted\" name",le="1"} 3',
+        r'test_histogram_seconds_bucket{name="a \"quoted\" name",le="+Inf"} 4',
+        r'test_histogram_seconds_sum{name="a \"quoted\" name"} 5.65',
+        r'test_histogram_seconds_count{name="a \"quoted\" name"} 4',
+    ]
+
+    with pytest.raises(ValueError, match="expects labels"):
+        histogram.labels()
+
+
+def test_counter_and_gauge(registry) -> None:
+    counter = metrics.Counter("test_counter_total", "Test counter.", registry=registry)
+    counter.labels().inc()
+    counter.labels().inc(2)
+    gauge = metrics.Gauge("test_gauge", "Test gauge.", ("room",), registry=registry)
+    gauge.labels("room1").set(3)
+
+    assert counter.render()[-1] == "test_counter_total 3"
+    assert gauge.render()[-1] == 'test_gauge{room="room1"} 3'
+    gauge.clear()
+    assert len(gauge.render()) == 2
+
+    exposition = metrics.render_all(registry)
+    assert "test_counter_total 3\n" in exposition
+    assert exposition.endswith("\n")
+    assert "test_counter_total" not in metrics.render_all()
+
+
+def test_abstract_metric() -> None:
+    class IncompleteMetric(metrics.Metric[metrics.Value]):
+        type = "counter"
+
+    with pytest.raises(TypeError):
+        IncompleteMetric("test_incomplete", "Test incomplete.", registry=[])
+
+
+async def test_timed(registry) -> None:
+    histogram = metrics.Histogram(
+        "test_timed_seconds", "Test timed.", registry=registry
+    )
+
+    async def func(fail: bool) -> None:
+        if fail:
+            raise ValueError
+
+    wrapped = metrics.timed(histogram.labels(), func, activity="test func")
+    await wrapped(False)
+    with pytest.raises(ValueError):  # noqa: PT011
+        await wrapped(True)
+
+    assert wrapped.__name__ == "func"
+    assert histogram.labels().count == 2
+    assert metrics.activities[func] == "test func"
+
+
+async def test_collect(mock_connection) -> None:
+    async with mock_connection() as conn:
+        command = metrics.command_latency.labels("eightball")
+        handler = metrics.handler_latency.labels("chat.chat")
+        commands, handlers = command.count, handler.count
+
+        await conn.add_messages(
+            [
+                ">room1",
+                "|init|chat",
+                "|title|Room 1",
+                "|users|2,*cerbottana,+user",
+            ],
+            [
+                ">room1",
+                "|c|+user|.8ball",
+            ],
+        )
+        await conn.get_messages()
+
+        assert command.count == commands + 1
+        assert handler.count == handlers + 1
+
+        metrics.collect([conn])
+        exposition = metrics.render_all()
+        assert (
+            'cerbottana_room_queue_depth{account="cerbottana",room="room1"} 0'
+            in exposition
+        )
+        assert 'cerbottana_running_tasks{account="cerbottana"} ' in exposition
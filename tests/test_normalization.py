@@ -0,0 +1,72 @@
+import random
+import re
+import string
+import unicodedata
+
+import pytest
+
+from cerbottana import normalization
+from cerbottana.typedefs import RoomId
+
+# Any string is a valid input: compare the normalization functions with their
+# straightforward regex implementations, on random strings mixing ASCII, accented
+# letters, PS rank symbols and characters whose lowercase form is ASCII
+
+ALPHABET = (
+    string.printable
+    + "àèéìòùÀÈÉÌÒÙçÇñÑüÜßøØæÆ"
+    + "~&#★@%§*☆+^!✖‽"
+    + "\u0130\u212a\u00a0\u3000ポケモン"  # İ, Kelvin sign, no-break and CJK spaces
+)
+
+
+def random_strings(seed: int, count: int = 500) -> list[str]:
+    rng = random.Random(seed)
+    return ["".join(rng.choices(ALPHABET, k=rng.randrange(20))) for _ in range(count)]
+
+
+def reference_to_id(text: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", text.lower())
+
+
+def reference_to_room_id(room: str, fallback: RoomId) -> RoomId:
+    roomid = RoomId(re.sub(r"[^a-z0-9-]", "", room.lower()))
+    if not roomid:
+        roomid = fallback
+    return roomid
+
+
+def reference_remove_diacritics(text: str) -> str:
+    return "".join(
+        [c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c)]
+    )
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_identifiers(seed: int) -> None:
+    for text in random_strings(seed):
+        assert normalization.to_id(text) == reference_to_id(text)
+        assert normalization.to_user_id(text) == reference_to_id(text)
+        assert normalization.to_room_id(text) == reference_to_room_id(
+            text, RoomId("lobby")
+        )
+        assert normalization.to_room_id(text, RoomId("")) == reference_to_room_id(
+            text, RoomId("")
+        )
+        assert normalization.remove_diacritics(text) == reference_remove_diacritics(
+            text
+        )
+
+
+def test_languages() -> None:
+    names = [*normalization.LANGUAGES, *normalization.LANGUAGE_IDS]
+    names += [name.upper() for name in names] + ["English ", "Italiano", ""]
+    names += random_strings(0, 100)
+
+    for name in names:
+        assert normalization.get_language(name) == normalization.LANGUAGES.get(
+            re.sub(r"[^a-z]", "", name.lower())
+        )
+        assert normalization.get_language_id(
+            name, fallback=0
+        ) == normalization.LANGUAGE_IDS.get(reference_to_id(name), 0)
@@ -0,0 +1,102 @@
+import asyncio
+
+from cerbottana.outbound import OutboundScheduler, Priority
+
+
+async def test_priority() -> None:
+    sent: list[str] = []
+
+    async def write(message: str) -> None:
+        sent.append(message)
+
+    scheduler = OutboundScheduler(write, rate=1000, burst=1)
+
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(scheduler.send("background", Priority.BACKGROUND))
+        tg.create_task(scheduler.send("command 1"))
+        tg.create_task(scheduler.send("moderation", Priority.MODERATION))
+        tg.create_task(scheduler.send("command 2", Priority.COMMAND))
+
+    # Every message is queued before the worker starts
+    assert sent == ["moderation", "command 1", "command 2", "background"]
+    assert scheduler.queue_depth() == 0
+    assert scheduler.stats[Priority.COMMAND].sent == 2
+    assert scheduler.stats[Priority.MODERATION].sent == 1
+    assert scheduler.stats[Priority.BACKGROUND].sent == 1
+
+
+async def test_token_bucket() -> None:
+    loop = asyncio.get_running_loop()
+    sent: list[float] = []
+
+    async def write(message: str) -> None:
+        sent.append(loop.time())
+
+    scheduler = OutboundScheduler(write, rate=20, burst=3)
+
+    async with asyncio.TaskGroup() as tg:
+        for i in range(5):
+            tg.create_task(scheduler.send(f"message {i}"))
+
+    # Three messages are sent immediately, the other two are throttled
+    assert sent[2] - sent[0] < 0.025
+    assert sent[3] - sent[2] > 0.025
+    assert sent[4] - sent[3] > 0.025
+    assert scheduler.stats[Priority.COMMAND].max_wait > 0.05
+
+
+async def test_cancel() -> None:
+    sent: list[str] = []
+
+    async def write(message: str) -> None:
+        sent.append(message)
+
+    scheduler = OutboundScheduler(write, rate=20, burst=1)
+
+    await scheduler.send("message 1")
+    task = asyncio.create_task(scheduler.send("message 2"))
+    await asyncio.sleep(0)
+    assert scheduler.queue_depth(Priority.COMMAND) == 1
+    task.cancel()
+    await scheduler.send("message 3")
+
+    assert sent == ["message 1", "message 3"]
+
+
+async def test_clear() -> None:
+    sent: list[str] = []
+
+    async def write(message: str) -> None:
+        sent.append(message)
+
+    scheduler = OutboundScheduler(write, rate=20, burst=1)
+
+    await scheduler.send("message 1")
+    task = asyncio.create_task(scheduler.send("message 2"))
+    await asyncio.sleep(0)
+    scheduler.clear()
+    await task
+
+    assert sent == ["message 1"]
+    assert scheduler.queue_depth() == 0
+
+
+async def test_close() -> None:
+    sent: list[str] = []
+
+    async def write(message: str) -> None:
+        sent.append(message)
+
+    scheduler = OutboundScheduler(write, rate=20, burst=1)
+
+    await scheduler.send("message 1")
+    task = asyncio.create_task(scheduler.send("message 2"))
+    await asyncio.sleep(0)
+    await scheduler.close()
+    await task
+    assert scheduler._worker is None
+
+    # The worker is started again on demand
+    await scheduler.send("message 3")
+    assert sent == ["message 1", "message 3"]
+    await scheduler.close()
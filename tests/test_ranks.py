@@ -0,0 +1,48 @@
+import string
+from typing import get_args
+
+import pytest
+
+from cerbottana import ranks
+from cerbottana.typedefs import Role
+
+SYMBOLS = ["", *ranks.ROLE_SYMBOLS["voice"], *"*★☆^ !✖‽-Ωa0", "%user", "★Ω"]
+
+
+def reference_has_role(role: Role, user: str, strict_voice_check: bool) -> bool:
+    # Implementation before the role masks were precomputed
+    if user:
+        if role == "disabled":
+            return False
+        if role == "regularuser":
+            return True
+        if user[0] in ranks.ROLE_SYMBOLS[role]:
+            return True
+        if (
+            role == "voice"
+            and not strict_voice_check
+            and user[0] not in "*★☆^ "
+            and user[0] not in string.ascii_letters + string.digits
+        ):
+            return True
+    return False
+
+
+@pytest.mark.parametrize("strict_voice_check", [False, True])
+def test_has_role(strict_voice_check: bool) -> None:
+    for role in get_args(Role):
+        for symbol in SYMBOLS:
+            assert ranks.has_role(
+                role, symbol, strict_voice_check
+            ) == reference_has_role(role, symbol, strict_voice_check)
+
+
+def test_rank_order() -> None:
+    assert sorted(["+", " ", "@", "Ω", None, "~"], key=ranks.rank_order) == [
+        "~",
+        "@",
+        "Ω",
+        "+",
+        " ",
+        None,
+    ]
@@ -0,0 +1,87 @@
+import gzip
+import json
+import time
+from collections import Counter
+
+from cerbottana.capture import CaptureRecorder, read_capture
+from cerbottana.models.room import Room
+from cerbottana.models.user import User
+from cerbottana.replay import ReplayConnection, replay
+
+
+def test_capture(tmp_path) -> None:
+    path = tmp_path / "capture.jsonl.gz"
+    frames = [">room1\n|c|user|msg", "|updateuser| cerbottana|1|1|{}"]
+
+    recorder = CaptureRecorder(path)
+    recorder.record(frames[0])
+    recorder.close()
+    # Captures are appended to across sessions
+    recorder = CaptureRecorder(path)
+    recorder.record(frames[1])
+    recorder.close()
+
+    captured = list(read_capture(path))
+    assert [frame for _, frame in captured] == frames
+    assert captured[0][0] <= captured[1][0]
+
+
+def test_capture_flush(tmp_path) -> None:
+    path = tmp_path / "capture.jsonl.gz"
+
+    recorder = CaptureRecorder(path, flush_interval=0)
+    recorder.record("|challstr|4|abcdef")
+    # Wait for the recorder thread to flush the frame, without closing it
+    for _ in range(100):
+        if path.is_file() and list(read_capture(path)):
+            break
+        time.sleep(0.01)
+    assert [frame for _, frame in read_capture(path)] == ["|challstr|4|abcdef"]
+    recorder.close()
+
+
+def test_truncated_capture(tmp_path) -> None:
+    path = tmp_path / "capture.jsonl.gz"
+
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(json.dumps([0, "frame1"]) + "\n")
+        f.flush()
+        flushed = path.read_bytes()
+        f.write(json.dumps([1, "frame2"]) + "\n" + json.dumps([2, "frame3"]))
+    closed = path.read_bytes()
+
+    # The process was killed after the first flush
+    path.write_bytes(flushed)
+    assert list(read_capture(path)) == [(0, "frame1")]
+    # The process was killed while writing the last line
+    path.write_bytes(closed[:-8])  # strip the gzip trailer
+    assert list(read_capture(path)) == [(0, "frame1"), (1, "frame2")]
+
+
+async def test_replay(tmp_path) -> None:
+    path = tmp_path / "capture.jsonl.gz"
+
+    recorder = CaptureRecorder(path)
+    recorder.record("|challstr|4|abcdef")
+    recorder.record(">room1\n|init|chat\n|title|Room 1\n|users|2,*cerbottana, user1")
+    recorder.record(">room1\n|j| user2")
+    recorder.close()
+
+    conn = ReplayConnection(path, username="cerbottana")
+    stats = await replay(conn)
+
+    assert stats.frames == 2
+    assert stats.lines == 6
+    assert stats.sent == Counter(
+        [
+            "|/cmd roominfo room1",
+            "room1|/roomlanguage",
+            "|/cmd userdetails cerbottana",
+            "|/cmd userdetails user2",
+        ]
+    )
+
+    room1 = Room.get(conn, "room1")
+    assert room1.title == "Room 1"
+    assert User.get(conn, "user1") in room1
+    assert User.get(conn, "user2") in room1
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from cerbottana.connection import Connection
+from cerbottana.database import Database
+from cerbottana.supervisor import Supervisor
+from cerbottana.tasks import run_once
+
+
+class RecordingConnection(Connection):
+    def __init__(self, username: str, database: str) -> None:
+        super().__init__(
+            url="",
+            username=username,
+            password="",
+            avatar="",
+            statustext="",
+            rooms=[],
+            main_room="lobby",
+            command_character=".",
+            base_url="",
+            webhooks={},
+            database=database,
+        )
+
+    async def _start_websocket(self) -> None:
+        self.seen = (self.client_session, Database.open().dbname)
+
+
+async def test_supervisor() -> None:
+    conns = [
+        RecordingConnection("bot1", "database"),
+        RecordingConnection("bot2", "bot2"),
+    ]
+    await Supervisor(conns).run()
+
+    session1, dbname1 = conns[0].seen
+    session2, dbname2 = conns[1].seen
+    assert session1 is session2
+    assert session1.closed
+    assert (dbname1, dbname2) == ("database", "bot2")
+    # The default database is unaffected
+    assert Database.open().dbname == "database"
+
+
+class CrashingConnection(RecordingConnection):
+    async def _start_websocket(self) -> None:
+        raise RuntimeError
+
+
+class SlowConnection(RecordingConnection):
+    async def _start_websocket(self) -> None:
+        await asyncio.sleep(0.05)
+        await super()._start_websocket()
+
+
+async def test_supervisor_crash(caplog) -> None:
+    conns = [
+        CrashingConnection("bot1", "database"),
+        SlowConnection("bot2", "database"),
+    ]
+    # The watchdog is stopped once every connection is done
+    assert await Supervisor(conns, watchdog_threshold=1).run()
+
+    # The crashed connection doesn't cancel the other one
+    assert not hasattr(conns[0], "seen")
+    assert conns[1].seen[1] == "database"
+    assert "bot1 crashed" in caplog.text
+
+    conns = [
+        CrashingConnection("bot1", "database"),
+        CrashingConnection("bot2", "database"),
+    ]
+    assert not await Supervisor(conns).run()
+    assert "Every connection crashed" in caplog.text
+
+
+class DatabaseConnection(RecordingConnection):
+    async def _start_websocket(self) -> None:
+        await asyncio.sleep(0.05)
+        self.result = await Database.open().run(
+            lambda session: session.scalar(text("SELECT 1"))
+        )
+
+
+async def test_supervisor_shared_database(mocker) -> None:
+    close = mocker.spy(Database, "close")
+    slow_conn = DatabaseConnection("bot2", "database")
+    await Supervisor([RecordingConnection("bot1", "database"), slow_conn]).run()
+
+    # The shared database is only closed once, after the last connection is done
+    assert slow_conn.result == 1
+    close.assert_called_once()
+    assert Database.open()._executor is None
+
+
+def test_supervisor_duplicate_accounts() -> None:
+    conns = [
+        RecordingConnection("bot1", "database"),
+        RecordingConnection("Bot 1", "bot1"),
+    ]
+    with pytest.raises(ValueError, match="different account"):
+        Supervisor(conns)
+
+
+async def test_run_once() -> None:
+    calls = []
+
+    async def init_task(conn: Connection) -> None:
+        calls.append(conn)
+
+    wrapped = run_once(init_task)
+    await wrapped(None)  # type: ignore[arg-type]
+    await wrapped(None)  # type: ignore[arg-type]
+
+    assert calls == [None]
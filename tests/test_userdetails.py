@@ -0,0 +1,55 @@
+from collections import Counter
+
+from cerbottana.models.room import Room
+from cerbottana.models.user import User
+from cerbottana.typedefs import RoomId
+from cerbottana.userdetails import Userdetails
+
+
+def test_rank_symbol() -> None:
+    details = Userdetails("+", {RoomId("room1"): "%", RoomId("room2"): " "})
+
+    assert details.rank_symbol(RoomId("room1")) == "%"
+    assert details.rank_symbol(RoomId("room2")) == "+"
+    assert details.rank_symbol(RoomId("room3")) == "+"
+
+
+async def test_userdetails_scheduler(mock_connection) -> None:
+    async with mock_connection() as conn:
+        await conn.add_messages([">room1", "|init|chat"], [">room2", "|init|chat"])
+        await conn.get_messages()
+
+        # Users are queried only once
+        await conn.add_messages(
+            [">room1", "|j|%User 1"], [">room2", "|j|%User 1"], [">room1", "|j|+User 2"]
+        )
+        assert await conn.get_messages() == Counter(
+            ["|/cmd userdetails user1", "|/cmd userdetails user2"]
+        )
+        await conn.add_queryresponse_userdetails(
+            "User 1", rooms={"room1": "%", "room2": "%"}
+        )
+        await conn.add_queryresponse_userdetails("User 2", group="+")
+        await conn.get_messages()
+
+        room1 = Room.get(conn, "room1")
+        user1 = User.get(conn, "user1")
+        assert user1.rank(room1) == "%"
+
+        # Cached ranks are reused as long as the rank symbol matches
+        await conn.add_messages(
+            [">room1", "|l|user1"],
+            [">room1", "|j|%User 1"],
+            [">room1", "|n|+User 2|user2"],
+        )
+        assert await conn.get_messages() == Counter()
+        assert user1.rank(room1) == "%"
+
+        # Rank changes are queried again
+        await conn.add_messages([">room1", "|n|@User 1|user1"])
+        assert await conn.get_messages() == Counter(["|/cmd userdetails user1"])
+
+        # Stale ranks are queried again
+        conn.userdetails.ttl = 0
+        await conn.add_messages([">room2", "|n|%User 1|user1"])
+        assert await conn.get_messages() == Counter(["|/cmd userdetails user1"])
@@ -0,0 +1,40 @@
+import asyncio
+import sys
+import time
+
+from cerbottana import metrics
+from cerbottana.watchdog import Watchdog, attribute
+
+
+def test_attribute() -> None:
+    activity, location = attribute(sys._getframe())
+    # No cerbottana frames in the stack
+    assert activity == "event loop"
+    assert location == "unknown location"
+
+
+async def test_watchdog() -> None:
+    blocked = metrics.loop_blocked.labels("command blocking")
+    count = blocked.count
+
+    async def blocking() -> None:
+        time.sleep(0.3)  # noqa: ASYNC251
+
+    wrapped = metrics.timed(
+        metrics.Histogram("test_blocking_seconds", "Test.", registry=[]).labels(),
+        blocking,
+        activity="command blocking",
+    )
+
+    watchdog = Watchdog(0.05)
+    task = asyncio.create_task(watchdog.run())
+    await asyncio.sleep(0.1)
+
+    await wrapped()
+    await asyncio.sleep(0.1)
+
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert blocked.count == count + 1
+    assert blocked.sum >= 0.2